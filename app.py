@@ -12,6 +12,20 @@ import platform
 import json
 import streamlit.components.v1 as components
 from components.sidebar import render_sidebar_toggle
+from components.status_funnel import log_status_event
+from components.scrape_manifest import scraped_row_count, content_key, manifest_path
+from components.fuzzy_dedup import FUZZY_THRESHOLD
+from components.sheet_pipelines import split_duplicates, baseline_from_sheets, rows_not_in_baseline
+from components.dedup_engine import key_hashes
+from components.workbook_reader import load_workbook_cached, evict_workbook, workbook_cache_info, content_hash
+from components.workbook_writer import write_workbook, throughput_caption
+from components.chunked_dedup import dedup_out_of_core, input_columns, profile_inputs, cleanup
+from components.crm_index import load_meta as load_crm_index_meta, refresh_index as refresh_crm_index, match_against_crm, mark_lead_dirty
+from components.column_profile import recommend_keys
+from components.scrape_progress import PROGRESS_FILE as SCRAPE_PROGRESS_FILE, LIVE_RESULTS_FILE as SCRAPE_LIVE_FILE, read_progress, read_live_results, reset as reset_progress, format_eta
+from components.parallel_jobs import parse_workbooks, hash_baseline_files, clean_files
+from components.baseline_index import list_indexes, load_index, add_to_index, column_mismatch, delete_index, provenance
+from components.crm_stats import record_lead_created, record_lead_updated, record_lead_deleted, headline_metrics, sync_if_drifted, BACKEND_OWNER
 from st_keyup import st_keyup
 
 # Detect Environment
@@ -97,6 +111,7 @@ EXECUTIONS_API = f"{BACKEND_BASE}/executions"
 LEADS_API = f"{BACKEND_BASE}/leads"
 STATS_API = f"{BACKEND_BASE}/stats"
 LEAD_GEN_API = f"{BACKEND_BASE}/lead-gen"
+PREVIEW_PAGE_ROWS = 500  # rows sent to the browser per result preview page
 
 # Render the collapsible sidebar toggle (Must be called early)
 render_sidebar_toggle()
@@ -1570,16 +1585,43 @@ def fetch_data(url):
         pass
     return []
 
-def update_lead(lead_id, data):
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_scraped_results(path, cache_key):
+    """Parses the scraper CSV once per content version (cache_key from the sidecar manifest)."""
+    return pd.read_csv(path, on_bad_lines='skip')
+
+def update_lead(lead_id, data, previous=None):
+    """`previous` is the lead as it was before the edit; pass it so status counters and the transition log stay in sync."""
     try:
-        requests.put(f"{LEADS_API}/{lead_id}", json=data)
+        r = requests.put(f"{LEADS_API}/{lead_id}", json=data)
+        if not r.ok:
+            # Rejected by the backend: the lead is unchanged, so counters and the transition log are too
+            return False
+        if any(k in data for k in ("phone", "email", "businessName")):
+            mark_lead_dirty(lead_id)
+        if previous is not None:
+            record_lead_updated(previous, data)
+            if "status" in data:
+                log_status_event(lead_id, previous.get("status") or "", data["status"])
         return True
     except:
         return False
 
 def create_lead(data):
     try:
-        requests.post(f"{BACKEND_BASE}/leads", json=data)
+        r = requests.post(f"{BACKEND_BASE}/leads", json=data)
+        if not r.ok:
+            return False
+        try:
+            new_id = r.json()["id"]
+        except Exception:
+            new_id = None
+        record_lead_created(data, lead_id=new_id)
+        if new_id is not None:
+            try:
+                log_status_event(new_id, None, data.get("status") or "Generated")
+            except Exception:
+                pass
         return True
     except:
         return False
@@ -1600,9 +1642,14 @@ def normalize_phone(phone):
         s = s[2:]
     return s
 
-def delete_lead(lead_id):
+def delete_lead(lead_id, previous=None):
     try:
-        requests.delete(f"{LEADS_API}/{lead_id}")
+        r = requests.delete(f"{LEADS_API}/{lead_id}")
+        if not r.ok:
+            return False
+        mark_lead_dirty(lead_id)
+        if previous is not None:
+            record_lead_deleted(previous)
         return True
     except:
         return False
@@ -1949,21 +1996,11 @@ if "Dashboard" in page:
     </div>
     """, unsafe_allow_html=True)
     
-    # Fetch all leads directly to calculate custom splits
+    # Fetch leads for the 24h import window (pipeline cards read materialized counters)
     leads = fetch_data(LEADS_API)
     df_all = pd.DataFrame(leads)
     
     # ALWAYS RENDER CARDS (Empty or Not)
-    # Split Data
-    if df_all.empty:
-        df_generated = pd.DataFrame(columns=["id", "status"])
-        df_crm = pd.DataFrame(columns=["id", "status"])
-    else:
-        # 1. Generated (Fresh leads, unworked)
-        df_generated = df_all[df_all['status'] == 'Generated']
-        # 2. CRM (Everything else)
-        df_crm = df_all[df_all['status'] != 'Generated']
-    
     # --- SECTION 1: LEAD GENERATION ---
     st.subheader("⚡ Lead Generation (Data Mining)")
     
@@ -2015,23 +2052,14 @@ if "Dashboard" in page:
     st.markdown("---")
     st.subheader("💼 Active Pipeline (CRM)")
     
-    # Calculate CRM specific metrics
-    crm_total = len(df_crm)
-    
-    hot_leads = 0
-    meetings = 0
-    closed_won = 0
-    
-    if not df_crm.empty:
-        # Hot Leads (Robust Check)
-        if 'priority' in df_crm.columns:
-            hot_leads = len(df_crm[df_crm['priority'].astype(str).str.upper() == 'HOT'])
-            
-        # Meetings (Robust Check)
-        if 'status' in df_crm.columns:
-            meetings = len(df_crm[df_crm['status'].astype(str).str.contains("Meeting", case=False, na=False)])
-            # Closed Won (Robust Check for 'Won' or 'Closed - Won')
-            closed_won = len(df_crm[df_crm['status'].astype(str).str.contains("Won", case=False, na=False)])
+    # Calculate CRM specific metrics from the materialized counters. They are re-counted only
+    # when the leads fetched above show drift (count or newest id differ, e.g. server-side
+    # /lead-gen or /leads/bulk inserts); an empty list may just be an unreachable backend.
+    crm_metrics = headline_metrics([BACKEND_OWNER], stats=sync_if_drifted(leads) if leads else None)
+    crm_total = crm_metrics["pipeline"]
+    hot_leads = crm_metrics["hot"]
+    meetings = crm_metrics["meetings"]
+    closed_won = crm_metrics["won"]
     
     c_a, c_b, c_c, c_d = st.columns(4)
     with c_a: 
@@ -2822,7 +2850,7 @@ if "CRM Grid" in page:
                     "nextFollowUpDate": str(new_next) if new_next else None
                 }
                 
-                if update_lead(lead_id, updates):
+                if update_lead(lead_id, updates, previous=current_data):
                     st.success("Saved!")
                     st.session_state["edit_trigger"] = None # Clear trigger
                     st.rerun()
@@ -3027,7 +3055,7 @@ if "CRM Grid" in page:
                      for index, updates in edited_rows.items():
                          if index < len(snapshot_df):
                              lead_id = int(snapshot_df.iloc[index]["id"])
-                             if update_lead(lead_id, updates):
+                             if update_lead(lead_id, updates, previous=snapshot_df.iloc[index].to_dict()):
                                  count += 1
                  if added_rows:
                      for row in added_rows:
@@ -3038,7 +3066,7 @@ if "CRM Grid" in page:
                      for index in deleted_rows:
                          if index in snapshot_df.index:
                              lead_id = int(snapshot_df.loc[index]["id"])
-                             if delete_lead(lead_id):
+                             if delete_lead(lead_id, previous=snapshot_df.loc[index].to_dict()):
                                  count += 1
                  if count > 0:
                      st.toast(f"💾 Auto-saved {count} changes!", icon="✅")
@@ -3105,17 +3133,6 @@ if "Spreadsheet" in page:
     # Ensure openpyxl is installed for Excel writing (standard in streamlit envs)
 
     # --- HELPERS ---
-    def normalize_text(text):
-        """Strict normalization: lower, trim, remove special chars. Returns None for noise."""
-        if pd.isna(text):
-            return None
-        s = str(text).strip().lower()
-        if s in ["", "none", "nan", "null"]:
-            return None
-        # Remove special characters (keep alphanumeric and spaces)
-        s = re.sub(r'[^a-zA-Z0-9\s]', '', s)
-        return s if s.strip() != "" else None
-
     # Helper for styled sub-sections
     def styled_header(title, icon="🚀"):
         st.markdown(f"""
@@ -3132,7 +3149,78 @@ if "Spreadsheet" in page:
         </div>
         """, unsafe_allow_html=True)
 
-    tab1, tab2, tab3 = st.tabs(["📂 Single File Analysis (Dups vs Uniques)", "🔁 1-vs-1 Comparison", "📚 Multi-File vs Baseline"])
+    # Paged result preview. Runs as a fragment: opening it or turning a page reruns
+    # only this block against the frames already in memory, and at most one page of
+    # rows is serialized to the browser. Closed previews send nothing.
+    @st.fragment
+    def paged_preview(frames, key, label="👁️ Preview rows"):
+        frames = {name: df for name, df in frames.items() if df is not None and len(df)}
+        if not frames:
+            return
+        total_rows = sum(len(df) for df in frames.values())
+        if not st.toggle(f"{label} ({total_rows:,})", key=f"{key}_open"):
+            return
+        names = list(frames)
+        name = st.selectbox("Sheet", names, key=f"{key}_sheet") if len(names) > 1 else names[0]
+        df = frames[name]
+        pages = -(-len(df) // PREVIEW_PAGE_ROWS)
+        page = st.number_input(f"Page (of {pages:,})", 1, pages, 1, key=f"{key}_page_{name}") if pages > 1 else 1
+        start = (int(page) - 1) * PREVIEW_PAGE_ROWS
+        st.dataframe(df.iloc[start:start + PREVIEW_PAGE_ROWS], use_container_width=True)
+        st.caption(f"Rows {start + 1:,}–{min(start + PREVIEW_PAGE_ROWS, len(df)):,} of {len(df):,}")
+
+    # Parsed uploads are cached by content hash across reruns
+    cache_info = workbook_cache_info()
+    if cache_info["entries"]:
+        c_cache_txt, c_cache_btn = st.columns([4, 1])
+        c_cache_txt.caption(f"🗂️ {cache_info['entries']} parsed workbook(s) cached ({cache_info['bytes'] / 1e6:.1f} MB of {cache_info['max_bytes'] / 1e6:.0f} MB)")
+        if c_cache_btn.button("🧹 Clear Cache", key="sit_clear_cache"):
+            evict_workbook()
+            st.rerun()
+
+    # Saved baseline indexes (1-vs-1 and Multi-File tabs)
+    def baseline_batches(files, match_cols, respect_filters):
+        """(file, sheet, sha256, hashes, row_numbers) for every sheet holding all match columns."""
+        for f in files:
+            digest = content_hash(f)
+            sheets, _ = load_workbook_cached(f, respect_filters, keep_row_numbers=True)
+            for s_name, df in sheets.items():
+                if any(c not in df.columns for c in match_cols): continue
+                hashes, has_key = key_hashes(df, match_cols)
+                yield f.name, s_name, digest, hashes[has_key], df["__row_idx"].to_numpy()[has_key]
+
+    def saved_baseline_picker(key):
+        """Lets the user swap File(s) A for a saved index. Returns its name, or None to upload."""
+        indexes = list_indexes()
+        if not indexes:
+            return None
+        mode = st.radio("Baseline Source", ["Upload File(s) A", "Saved Baseline Index"], horizontal=True, key=f"{key}_mode")
+        if mode != "Saved Baseline Index":
+            return None
+        names = [m["name"] for m in indexes]
+        name = st.selectbox("Saved Baseline", names, key=f"{key}_name")
+        meta = indexes[names.index(name)]
+        st.caption(f"Keyed on **{', '.join(meta['columns'])}** · {meta['keys']:,} unique keys from {len(meta['sources'])} sheet(s) · updated {meta.get('updated_at', '')}")
+        with st.popover("🗑️ Delete Index"):
+            st.caption(f"Permanently removes **{meta['name']}** and its stored keys.")
+            if st.button("Delete", type="primary", key=f"{key}_delete"):
+                delete_index(meta["name"])
+                st.rerun()
+        return meta["name"]
+
+    def save_baseline_controls(key, files, match_cols, respect_filters):
+        with st.expander("💾 Save File(s) A as a Reusable Baseline Index"):
+            st.caption("Stores hashed keys with file/sheet/row provenance. Saving into an existing name only adds sheets it has not indexed yet.")
+            name = st.text_input("Index Name", key=f"{key}_save_name", placeholder="e.g. master_list")
+            if st.button("💾 Save / Update Index", key=f"{key}_save_btn", disabled=not name.strip()):
+                try:
+                    with st.spinner("Indexing baseline..."):
+                        meta, added = add_to_index(name, match_cols, baseline_batches(files, match_cols, respect_filters))
+                    st.success(f"✅ '{meta['name']}' now holds {meta['keys']:,} unique keys (+{added:,} new).")
+                except ValueError as e:
+                    st.error(str(e))
+
+    tab1, tab2, tab3, tab4 = st.tabs(["📂 Single File Analysis (Dups vs Uniques)", "🔁 1-vs-1 Comparison", "📚 Multi-File vs Baseline", "🗂️ Against CRM"])
 
     # ==========================
     # TAB 1: SINGLE FILE (ALL SHEETS)
@@ -3141,75 +3229,68 @@ if "Spreadsheet" in page:
         styled_header("Single File Duplicate Analysis")
         st.markdown("<p style='color:#64748b; margin-bottom:15px; font-size:0.95rem;'>Process a workbook to separate Duplicates and Unique rows into distinct sheets.</p>", unsafe_allow_html=True)
 
-        # Define Helper
-        def load_excel_safe_single(file_obj, respect_filters=True):
-            if not respect_filters:
-                file_obj.seek(0)
-                return pd.read_excel(file_obj, sheet_name=None), 0
-
-            import openpyxl
-            file_obj.seek(0)
-            wb = openpyxl.load_workbook(file_obj, data_only=True, read_only=False)
-            xls = {}
-            total_hidden_skipped = 0
-            
-            for s_name in wb.sheetnames:
-                ws = wb[s_name]
-                if ws.sheet_state != 'visible': continue
-                    
-                data = []
-                sheet_hidden_count = 0
-                
-                rows_iter = ws.iter_rows()
-                try:
-                    header_row = next(rows_iter)
-                    raw_headers = [cell.value for cell in header_row]
-                    headers = []
-                    counts = {}
-                    for i, h in enumerate(raw_headers):
-                        h_str = str(h).strip() if h is not None else f"Unnamed: {i}"
-                        if h_str == "": h_str = f"Unnamed: {i}"
-                        if h_str in counts:
-                            counts[h_str] += 1
-                            headers.append(f"{h_str}.{counts[h_str]}")
-                        else:
-                            counts[h_str] = 0
-                            headers.append(h_str)
-                except StopIteration:
-                    continue # Empty sheet
-
-                for row in rows_iter:
-                    current_row_idx = row[0].row
-                    is_hidden = False
-                    if current_row_idx in ws.row_dimensions:
-                        dim = ws.row_dimensions[current_row_idx]
-                        if dim.hidden: is_hidden = True
-                        
-                    if is_hidden:
-                        sheet_hidden_count += 1
-                    else:
-                        row_values = [cell.value for cell in row]
-                        if len(row_values) < len(headers):
-                            row_values += [None] * (len(headers) - len(row_values))
-                        elif len(row_values) > len(headers):
-                            row_values = row_values[:len(headers)]
-                        data.append(row_values)
-                
-                total_hidden_skipped += sheet_hidden_count
-                if data:
-                    xls[s_name] = pd.DataFrame(data, columns=headers)
-                else:
-                    xls[s_name] = pd.DataFrame(columns=headers)
-            
-            return xls, total_hidden_skipped
-
         st.markdown("#### 🚀 Single File Duplicate Analysis")
         st.caption("Process a workbook to separate Duplicates and Unique rows into distinct sheets.")
 
+        large_mode = st.toggle("🐘 Large File Mode (out-of-core, CSV or XLSX)", key="single_large_mode", help="For multi-million-row dumps: rows are streamed in chunks and only hashed keys are kept in memory. Output is a ZIP of Uniques / Duplicates CSVs.")
+
         # STEP 1: UPLOAD
         with st.container(border=True):
             st.markdown("**📁 Step 1: Upload Workbook**")
-            f_single = st.file_uploader("Upload Excel Workbook (.xlsx)", type=['xlsx'], key="sit_single")
+            if large_mode:
+                f_single = None
+                large_files = st.file_uploader("Upload CSV / Excel Files", type=['csv', 'xlsx'], accept_multiple_files=True, key="sit_single_large")
+            else:
+                f_single = st.file_uploader("Upload Excel Workbook (.xlsx)", type=['xlsx'], key="sit_single")
+
+        if large_mode:
+            large_sources = list(large_files or [])
+
+            if large_sources:
+                try:
+                    with st.container(border=True):
+                        st.markdown("**⚙️ Step 2: Configure Analysis**")
+                        use_filters_large = st.checkbox("Respect Excel Filters (Exclude Hidden Rows)", value=True, key="large_filter_check")
+                        # Hashed once per rerun; the column list and profile are cached on these digests
+                        large_digests = [content_hash(f) for f in large_sources]
+                        # Full profile once a run has streamed every row; until then the first chunk of each file
+                        full_profile = st.session_state.get("large_full_profile")
+                        if full_profile and full_profile[0] == (tuple(large_digests), use_filters_large):
+                            large_profile, profile_scope = full_profile[1], "all rows"
+                        else:
+                            large_profile = profile_inputs(large_sources, use_filters_large, digests=large_digests)
+                            profile_scope = "first 100k rows of each file"
+                        large_suggested = recommend_keys(large_profile)
+                        with st.expander(f"📊 Column Profile ({profile_scope})" + (f" · 💡 Suggested keys: {', '.join(large_suggested)}" if large_suggested else "")):
+                            st.dataframe(large_profile, use_container_width=True, hide_index=True)
+                        large_keys = st.multiselect("Select Duplicate Key Columns (e.g. Email, Phone)", input_columns(large_sources, use_filters_large, digests=large_digests), default=large_suggested, key="large_key_cols")
+
+                    if large_keys and st.button("🚀 Process Files (Out-of-Core)", type="primary", use_container_width=True, key="btn_large"):
+                        status = st.empty()
+                        def show_large_progress(stage, rows_done):
+                            status.caption(f"{stage}... {rows_done:,} rows")
+                        large_result = dedup_out_of_core(large_sources, large_keys, use_filters_large, on_progress=show_large_progress, profile=True)
+                        status.empty()
+                        st.session_state.large_full_profile = ((tuple(large_digests), use_filters_large), large_result["profile"])
+
+                        m1, m2, m3 = st.columns(3)
+                        m1.metric("Rows Scanned", large_result["rows"])
+                        m2.metric("Total Duplicates", large_result["duplicates"], delta_color="inverse")
+                        m3.metric("Total Unique", large_result["uniques"])
+                        st.caption(f"Processed in {large_result['seconds']}s ({int(large_result['rows'] / max(large_result['seconds'], 0.001)):,} rows/s)")
+
+                        with open(large_result["zip_path"], "rb") as zf_large:
+                            large_zip = zf_large.read()
+                        cleanup(large_result)
+                        st.download_button(
+                            label="📥 Download Uniques / Duplicates (ZIP of CSVs)",
+                            data=large_zip,
+                            file_name="deduplicated.zip",
+                            mime="application/zip",
+                            type="primary"
+                        )
+                except Exception as e:
+                    st.error(f"Error: {e}")
 
         if f_single:
             try:
@@ -3219,7 +3300,8 @@ if "Spreadsheet" in page:
                     
                     use_excel_filters = st.checkbox("Respect Excel Filters (Exclude Hidden Rows)", value=True, help="Make sure to SAVE your Excel file with the filters active before uploading.")
                     
-                    xls, total_hidden_skipped = load_excel_safe_single(f_single, use_excel_filters)
+                    # Column profile is built while the workbook is parsed (cached with it)
+                    xls, total_hidden_skipped, col_profile = load_workbook_cached(f_single, use_excel_filters, profile=True)
                     
                     if use_excel_filters:
                         if total_hidden_skipped > 0:
@@ -3241,8 +3323,26 @@ if "Spreadsheet" in page:
                         all_cols = set()
                         for df in valid_sheets.values():
                             all_cols.update(df.columns.astype(str))
+
+                        recommended_keys = recommend_keys(col_profile)
+                        with st.expander("📊 Column Profile" + (f" · 💡 Suggested keys: {', '.join(recommended_keys)}" if recommended_keys else "")):
+                            st.dataframe(col_profile, use_container_width=True, hide_index=True)
+                            st.caption("Distinct counts are estimates over normalized values (HyperLogLog). Good keys are mostly filled and mostly unique.")
+                            if recommended_keys:
+                                st.button("Use Suggested Keys", key="use_suggested_keys",
+                                          on_click=lambda keys=recommended_keys: st.session_state.update(single_key_cols=keys))
                         
-                        target_cols = st.multiselect("Select Duplicate Key Columns (e.g. Email, Phone)", sorted(list(all_cols)))
+                        match_mode = st.radio("Matching Mode", ["Exact (Normalized Keys)", "Fuzzy (Names & Phones)"], horizontal=True, key="single_match_mode", help="Fuzzy mode links rows like 'Dr. Shah Dental Clinic' and 'Shah Dental Clinic & Implant Centre', or the same phone written differently.")
+                        fuzzy_mode = match_mode.startswith("Fuzzy")
+                        if fuzzy_mode:
+                            fc1, fc2, fc3 = st.columns(3)
+                            fuzzy_name_col = fc1.selectbox("Business Name Column", ["(none)"] + sorted(list(all_cols)), key="fuzzy_name_col")
+                            fuzzy_phone_col = fc2.selectbox("Phone Column", ["(none)"] + sorted(list(all_cols)), key="fuzzy_phone_col")
+                            fuzzy_threshold = fc3.slider("Match Threshold", 0.5, 1.0, FUZZY_THRESHOLD, 0.05, key="fuzzy_threshold",
+                                                         help="Minimum name-match confidence. Rows with the same phone number are always matched, whatever the threshold.")
+                            target_cols = [c for c in (fuzzy_name_col, fuzzy_phone_col) if c != "(none)"]
+                        else:
+                            target_cols = st.multiselect("Select Duplicate Key Columns (e.g. Email, Phone)", sorted(list(all_cols)), key="single_key_cols")
 
                 if target_cols:
                      if st.button("🚀 Process Workbook", type="primary", use_container_width=True):
@@ -3255,136 +3355,36 @@ if "Spreadsheet" in page:
 
 
                         with st.spinner("Analyzing across all sheets..."):
-                            
-                            # A. PREPARE GLOBAL DATASET FOR DETECTION
-                            # We need to track: (SheetName, OriginalIndex) -> NormalizedKey
-                            global_rows = []
-                            
-                            for s_name, df in valid_sheets.items():
-                                # Check if target cols exist in this sheet
-                                missing = [c for c in target_cols if c not in df.columns]
-                                if missing:
-                                    # Skip or handle? Let's treat missing cols as None
-                                    pass
-                                
-                                # Normalize
-                                temp_df = df.copy()
-                                temp_df['_sheet'] = s_name
-                                temp_df['_idx'] = temp_df.index
-                                
-                                # normalization
-                                norm_vals = []
-                                for c in target_cols:
-                                    if c in df.columns:
-                                        # Apply norm
-                                        temp_df[f'__norm_{c}'] = temp_df[c].apply(normalize_text)
-                                    else:
-                                        temp_df[f'__norm_{c}'] = None
-                                
-                                global_rows.append(temp_df)
-                            
-                            if not global_rows:
+                            out_sheets, results_summary = split_duplicates(
+                                valid_sheets, target_cols, fuzzy=fuzzy_mode,
+                                name_col=fuzzy_name_col if fuzzy_mode else None,
+                                phone_col=fuzzy_phone_col if fuzzy_mode else None,
+                                threshold=fuzzy_threshold if fuzzy_mode else FUZZY_THRESHOLD,
+                            )
+                            total_dups = sum(c['dups'] for c in results_summary.values())
+                            total_uniques = sum(c['uniques'] for c in results_summary.values())
+
+                            if not results_summary:
                                 st.error("No data found to process.")
                             else:
-                                master_df = pd.concat(global_rows, ignore_index=True)
-                                
-                                # Norm Cols Key
-                                norm_keys = [f'__norm_{c}' for c in target_cols]
-                                
-                                # Do NOT drop rows with empty keys, preserve them as Unique
-                                master_valid = master_df.copy()
-                                
-                                # 1. Identify ALL duplicate instances (for location reporting)
-                                all_dups_mask = master_valid.duplicated(subset=norm_keys, keep=False)
-                                
-                                # Handle empty keys 
-                                empty_mask = master_valid[norm_keys].isna().all(axis=1)
-                                all_dups_mask = all_dups_mask & (~empty_mask)
-
-                                # 2. Identify ONLY 2nd+ instances (for removal/splitting)
-                                # keep='first' marks duplicates as True, except the first one (Unique).
-                                split_mask = master_valid.duplicated(subset=norm_keys, keep='first')
-                                split_mask = split_mask & (~empty_mask)
-                                
-                                master_valid['is_duplicate'] = split_mask
-
-                                # 3. Generate Location Map using ALL instances
-                                if not master_valid.empty and all_dups_mask.any():
-                                    dup_rows_all = master_valid[all_dups_mask].copy()
-                                    dup_rows_all['__loc_label'] = dup_rows_all['_sheet'] + " (Row " + (dup_rows_all['_idx'] + 2).astype(str) + ")"
-                                    dup_rows_all['__group_key'] = dup_rows_all[norm_keys].apply(tuple, axis=1)
-                                    
-                                    loc_map = dup_rows_all.groupby('__group_key')['__loc_label'].apply(lambda x: ", ".join(x)).to_dict()
-                                    
-                                    master_valid['__group_key'] = master_valid[norm_keys].apply(tuple, axis=1)
-                                    master_valid['duplicate_locations'] = master_valid['__group_key'].map(loc_map)
-                                else:
-                                    master_valid['duplicate_locations'] = None
-                                
-                                # Now we map back to splitting Dups vs Uniques per sheet
-                                # Create Output Excel
-                                output = io.BytesIO()
-                                writer = pd.ExcelWriter(output, engine='openpyxl')
-                                
-                                total_dups = 0
-                                total_uniques = 0
-                                
-                                results_summary = {} # {sheet: {'dups': count, 'uniques': count}}
-                                
-                                for s_name in valid_sheets.keys():
-                                    # Get rows belonging to this sheet from valid set
-                                    sheet_subset = master_valid[master_valid['_sheet'] == s_name]
-                                    
-                                    # Split
-                                    dups_df = sheet_subset[sheet_subset['is_duplicate'] == True]
-                                    uniques_df = sheet_subset[sheet_subset['is_duplicate'] == False]
-                                    
-                                    # Clean helper cols
-                                    # Retrieve original rows using index is tricky after concat/drop.
-                                    # Better: Use the stored original index or just columns.
-                                    # We have original columns in sheet_subset. Just drop helpers.
-                                    drop_cols = ['_sheet', '_idx', 'is_duplicate'] + norm_keys
-                                    
-                                    # For original DF cols
-                                    orig_cols = list(valid_sheets[s_name].columns)
-                                    
-                                    # Add 'duplicate_locations' to dups output
-                                    final_dups = dups_df[orig_cols + ['duplicate_locations']]
-                                    final_uniques = uniques_df[orig_cols]
-                                    
-                                    total_dups += len(final_dups)
-                                    total_uniques += len(final_uniques)
-                                    results_summary[s_name] = {'dups': len(final_dups), 'uniques': len(final_uniques)}
-                                    
-                                    # Write to Excel
-                                    if not final_dups.empty:
-                                        final_dups.to_excel(writer, sheet_name=f"{s_name[:20]}_Dups", index=False)
-                                    if not final_uniques.empty:
-                                        final_uniques.to_excel(writer, sheet_name=f"{s_name[:20]}_Uniques", index=False)
-                                
-                                writer.close()
+                                processed_data, write_stats = write_workbook(out_sheets)
                                 
                                 # UI METRICS
                                 m1, m2, m3 = st.columns(3)
-                                m1.metric("Rows Scanned", len(master_valid))
+                                m1.metric("Rows Scanned", total_dups + total_uniques)
                                 m2.metric("Total Duplicates", total_dups, delta_color="inverse")
                                 m3.metric("Total Unique", total_uniques)
                                 
                                 st.markdown("### 📋 Sheet Breakdown")
-                                for s in valid_sheets.keys():
-                                    # Filter again for display logic
-                                    sub = master_valid[master_valid['_sheet'] == s]
-                                    d_rows = sub[sub['is_duplicate'] == True]
-                                    u_count = len(sub) - len(d_rows)
-                                    
-                                    # Restore original cols for display
-                                    orig_cols = list(valid_sheets[s].columns)
-                                    d_disp = d_rows[orig_cols + ['duplicate_locations']]
+                                for s, s_counts in results_summary.items():
+                                    # Duplicates frame already queued for the workbook (no second copy)
+                                    d_disp = out_sheets.get(f"{s[:20]}_Dups")
+                                    u_count = s_counts['uniques']
                                     
-                                    with st.expander(f"{s} (Dups: {len(d_disp)} | Uniques: {u_count})"):
-                                        if not d_disp.empty:
-                                            st.warning(f"Found {len(d_disp)} duplicates.")
-                                            st.dataframe(d_disp, use_container_width=True)
+                                    with st.expander(f"{s} (Dups: {s_counts['dups']} | Uniques: {u_count})"):
+                                        if s_counts['dups']:
+                                            st.warning(f"Found {s_counts['dups']} duplicates.")
+                                            paged_preview({s: d_disp}, key=f"single_dups_{s}")
                                         else:
                                             st.success("No duplicates in this sheet.")
                                             
@@ -3392,7 +3392,7 @@ if "Spreadsheet" in page:
                                             st.info(f"Sheet contains {u_count} unique rows.")
 
                                 # DOWNLOAD
-                                processed_data = output.getvalue()
+                                st.caption(throughput_caption(write_stats))
                                 st.download_button(
                                     label="📥 Download Split Workbook (XLSX)",
                                     data=processed_data,
@@ -3408,62 +3408,6 @@ if "Spreadsheet" in page:
     # TAB 2: CROSS FILE (A vs B)
     # ==========================
     with tab2:
-        # Define helper first (cleaner scope)
-        def load_excel_safe(file_obj, respect_filters=True):
-            """Helper to load excel, respecting hidden rows if requested."""
-            if not respect_filters:
-                file_obj.seek(0)
-                return pd.read_excel(file_obj, sheet_name=None)
-            
-            import openpyxl
-            file_obj.seek(0)
-            wb = openpyxl.load_workbook(file_obj, data_only=True, read_only=False)
-            res = {}
-            for s_name in wb.sheetnames:
-                ws = wb[s_name]
-                if ws.sheet_state != 'visible': continue
-                
-                data = []
-                rows_iter = ws.iter_rows()
-                try:
-                    header_row = next(rows_iter)
-                    raw_headers = [cell.value for cell in header_row]
-                    headers = []
-                    counts = {}
-                    for i, h in enumerate(raw_headers):
-                        h_str = str(h).strip() if h is not None else f"Unnamed: {i}"
-                        if h_str == "": h_str = f"Unnamed: {i}"
-                        if h_str in counts:
-                            counts[h_str] += 1
-                            headers.append(f"{h_str}.{counts[h_str]}")
-                        else:
-                            counts[h_str] = 0
-                            headers.append(h_str)
-                except StopIteration:
-                    continue
-
-                for row in rows_iter:
-                    current_row_idx = row[0].row
-                    is_hidden = False
-                    if current_row_idx in ws.row_dimensions:
-                        dim = ws.row_dimensions[current_row_idx]
-                        if dim.hidden:
-                            is_hidden = True
-                    
-                    if not is_hidden:
-                        row_values = [cell.value for cell in row]
-                        if len(row_values) < len(headers):
-                            row_values += [None] * (len(headers) - len(row_values))
-                        elif len(row_values) > len(headers):
-                            row_values = row_values[:len(headers)]
-                        data.append(row_values)
-                
-                if data:
-                    res[s_name] = pd.DataFrame(data, columns=headers)
-                else:
-                    res[s_name] = pd.DataFrame(columns=headers)
-            return res
-
         # UI STRUTURE
         st.markdown("#### 🚀 Compare Two Excel Files")
         st.caption("Identify rows in File B (New) that are missing from File A (Baseline).")
@@ -3471,11 +3415,16 @@ if "Spreadsheet" in page:
         # STEP 1: UPLOADS
         with st.container(border=True):
             st.markdown("**📁 Step 1: Upload Files**")
+            saved_a = saved_baseline_picker("cross_base")
             c1, c2 = st.columns(2)
-            f_a = c1.file_uploader("File A (Baseline / Old)", type=['xlsx'], key="sit_a_1")
+            if saved_a:
+                f_a = None
+                c1.info(f"📚 Baseline: saved index **{saved_a}**")
+            else:
+                f_a = c1.file_uploader("File A (Baseline / Old)", type=['xlsx'], key="sit_a_1")
             f_b = c2.file_uploader("File B (New / Update)", type=['xlsx'], key="sit_b_1")
 
-        if f_a and f_b:
+        if (f_a or saved_a) and f_b:
             try:
                 # 1. READ BOTH
                 with st.container(border=True):
@@ -3483,10 +3432,10 @@ if "Spreadsheet" in page:
                     
                     use_filters_cross = st.checkbox("Respect Excel Filters (Exclude Hidden Rows)", value=True, help="Make sure to SAVE your Excel files with filters active.", key="cross_filter_check_1")
 
-                    xls_a = load_excel_safe(f_a, use_filters_cross)
-                    xls_b = load_excel_safe(f_b, use_filters_cross)
+                    xls_a = load_workbook_cached(f_a, use_filters_cross)[0] if f_a else {}
+                    xls_b, _ = load_workbook_cached(f_b, use_filters_cross)
                     
-                    if not xls_a or not xls_b:
+                    if (f_a and not xls_a) or not xls_b:
                         st.error("One or both workbooks contain no visible data.")
                     else:
                         all_cols_b = set()
@@ -3497,99 +3446,32 @@ if "Spreadsheet" in page:
                         
                         match_cols = st.multiselect("Select Unique Identifier Columns (e.g. Email, ID)", sorted(list(all_cols_b)), key="ms_1")
 
+                        if saved_a:
+                            index_error = column_mismatch(load_index(saved_a)["meta"], match_cols) if match_cols else None
+                            if index_error:
+                                st.error(f"{index_error} Select the same columns of File B in the same order.")
+                                match_cols = []
+                        elif match_cols:
+                            save_baseline_controls("cross_base", [f_a], match_cols, use_filters_cross)
+
                 if match_cols and st.button("🚀 Find New Rows in B", type="primary", use_container_width=True, key="btn_1"):
                     
-                    # Helper for styling
-                    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-                    from openpyxl.utils import get_column_letter
-
-                    def format_and_autofit_sheet(ws, df):
-                        # 1. Header Style
-                        header_font = Font(bold=True, color="FFFFFF")
-                        header_fill = PatternFill(start_color="2E7D32", end_color="2E7D32", fill_type="solid") # Green like screenshot
-                        center_align = Alignment(horizontal="left", vertical="center", wrap_text=True)
-                        
-                        # Apply to Row 1
-                        for cell in ws[1]:
-                            cell.font = header_font
-                            cell.fill = header_fill
-                            cell.alignment = center_align
-                        
-                        # 2. Auto-Filter & Freeze Panes
-                        ws.auto_filter.ref = ws.dimensions
-                        ws.freeze_panes = "A2"
-                        
-                        # 3. Auto-fit Columns
-                        for i, col in enumerate(df.columns, 1):
-                            max_len = len(str(col)) + 4
-                            col_letter = get_column_letter(i)
-                            
-                            # Sample data for width
-                            for row_x in range(min(len(df), 20)):
-                                val = df.iloc[row_x, i-1]
-                                if val:
-                                    max_len = max(max_len, len(str(val)))
-                            
-                            # Cap width
-                            adjusted_width = min(max_len + 2, 50) 
-                            ws.column_dimensions[col_letter].width = adjusted_width
-                            
-                            # Apply wrap text to all data cells
-                            for cell in ws[col_letter]:
-                                cell.alignment = Alignment(wrap_text=True, vertical="top")
-                                # Reset header align
-                                if cell.row == 1:
-                                    cell.alignment = center_align
-
                     with st.spinner("Building baseline from File A..."):
-                        baseline_tuples = set()
-                        count_a = 0
-                        for df in xls_a.values():
-                            valid_cols = [c for c in match_cols if c in df.columns]
-                            if len(valid_cols) != len(match_cols): continue
-                            temp = df[valid_cols].copy()
-                            for c in valid_cols:
-                                temp[c] = temp[c].apply(normalize_text)
-                            temp = temp.dropna(how='all')
-                            count_a += len(temp)
-                            baseline_tuples.update(list(temp.itertuples(index=False, name=None)))
-                        
-                    with st.spinner(f"Comparing File B ({len(xls_b)} sheets) against {len(baseline_tuples)} unique baseline records..."):
-                        output_b = io.BytesIO()
-                        writer_b = pd.ExcelWriter(output_b, engine='openpyxl')
-                        total_new = 0
-                        results_b = {}
+                        if saved_a:
+                            # Memory-mapped: only the pages the binary search touches are read
+                            baseline_index = load_index(saved_a)
+                            baseline_keys = baseline_index["keys"]
+                            count_a = baseline_index["meta"]["rows"]
+                        else:
+                            baseline_keys, count_a = baseline_from_sheets(xls_a, match_cols)
                         
-                        for s_name, df in xls_b.items():
-                            # Remove 'Unnamed' columns from processing/output
-                            df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-                            
-                            valid_cols = [c for c in match_cols if c in df.columns]
-                            if len(valid_cols) != len(match_cols): continue
-                            temp_b = df.copy()
-                            norm_keys = []
-                            for c in valid_cols:
-                                norm_n = f"__norm_{c}"
-                                temp_b[norm_n] = temp_b[c].apply(normalize_text)
-                                norm_keys.append(norm_n)
-                            temp_b_valid = temp_b.dropna(subset=norm_keys, how='all')
-                            temp_b_valid['__tuple'] = temp_b_valid[norm_keys].apply(tuple, axis=1)
-                            new_rows_mask = ~temp_b_valid['__tuple'].isin(baseline_tuples)
-                            new_rows_df = temp_b_valid[new_rows_mask]
-                            
-                            # Use cleaned columns for output
-                            final_new = new_rows_df[[c for c in df.columns if c in new_rows_df.columns]]
-                            
-                            cnt = len(final_new)
-                            total_new += cnt
-                            results_b[s_name] = final_new
-                            if cnt > 0:
-                                sheet_n = f"{s_name[:20]}_New"
-                                final_new.to_excel(writer_b, sheet_name=sheet_n, index=False)
-                                # Apply Styling
-                                format_and_autofit_sheet(writer_b.sheets[sheet_n], final_new)
+                    with st.spinner(f"Comparing File B ({len(xls_b)} sheets) against {len(baseline_keys)} unique baseline records..."):
+                        results_b = rows_not_in_baseline(xls_b, match_cols, baseline_keys)
+                        total_new = sum(len(d) for d in results_b.values())
+                        out_sheets_b = {f"{s_name[:20]}_New": df_new for s_name, df_new in results_b.items() if len(df_new)}
                         
-                        writer_b.close()
+                        # Styled header, frozen first row, auto-filter, sampled column widths
+                        processed_b, write_stats_b = write_workbook(out_sheets_b, styled=True)
                         
                         c_m1, c_m2, c_m3 = st.columns(3)
                         c_m1.metric("Baseline Rows (A)", count_a)
@@ -3602,7 +3484,7 @@ if "Spreadsheet" in page:
                             if cnt > 0:
                                 with st.expander(f"{s} ({cnt} New Rows)"):
                                     st.warning(f"Found {cnt} rows unique to File B.")
-                                    st.dataframe(df_new, use_container_width=True)
+                                    paged_preview({s: df_new}, key=f"cmp_new_{s}")
                             else:
                                 with st.expander(f"{s} (No New Rows)"):
                                     st.success("All rows in this sheet already exist in File A.")
@@ -3612,12 +3494,8 @@ if "Spreadsheet" in page:
                         st.subheader("👁️ Full File Content Preview")
                         st.caption("Browse all generated new rows across all sheets.")
                         
-                        valid_sheets_res = [s for s, d in results_b.items() if not d.empty]
-                        if valid_sheets_res:
-                            sheet_tabs = st.tabs(valid_sheets_res)
-                            for i, s_name in enumerate(valid_sheets_res):
-                                with sheet_tabs[i]:
-                                    st.dataframe(results_b[s_name], height=600, use_container_width=True)
+                        if total_new > 0:
+                            paged_preview(results_b, key="cmp_full", label="👁️ Browse new rows")
                         else:
                             st.info("No new rows found to preview.")
 
@@ -3634,7 +3512,7 @@ if "Spreadsheet" in page:
                         col_actions = st.columns([1, 1, 2])
                         
                         if total_new > 0:
-                            processed_b = output_b.getvalue()
+                            st.caption(throughput_caption(write_stats_b))
                             
                             # 1. Download Button
                             with col_actions[0]:
@@ -3708,67 +3586,6 @@ if "Spreadsheet" in page:
     # TAB 3: MULTI FILE (Multiple vs One)
     # ==========================
     with tab3:
-        # Define Helper First
-        def load_excel_safe_multi(file_obj, respect_filters=True):
-            # We need to always use openpyxl to get row indices, even if filters are off
-            # because we need to map back to the original file for deletion.
-            import openpyxl
-            file_obj.seek(0)
-            wb = openpyxl.load_workbook(file_obj, data_only=True, read_only=False)
-            res = {}
-            for s_name in wb.sheetnames:
-                ws = wb[s_name]
-                if ws.sheet_state != 'visible': continue
-                
-                data = []
-                rows_iter = ws.iter_rows()
-                try:
-                    header_row = next(rows_iter)
-                    raw_headers = [cell.value for cell in header_row]
-                    headers = []
-                    counts = {}
-                    for i, h in enumerate(raw_headers):
-                        h_str = str(h).strip() if h is not None else f"Unnamed: {i}"
-                        if h_str == "": h_str = f"Unnamed: {i}"
-                        if h_str in counts:
-                            counts[h_str] += 1
-                            headers.append(f"{h_str}.{counts[h_str]}")
-                        else:
-                            counts[h_str] = 0
-                            headers.append(h_str)
-                except StopIteration:
-                        continue
-
-                # Add a special column for Row Index
-                headers.append("__row_idx")
-
-                for row in rows_iter:
-                    current_row_idx = row[0].row
-                    is_hidden = False
-                    if respect_filters and current_row_idx in ws.row_dimensions:
-                        dim = ws.row_dimensions[current_row_idx]
-                        if dim.hidden: is_hidden = True
-                    
-                    if not is_hidden:
-                        row_values = [cell.value for cell in row]
-                        # Pad or trim
-                        # The headers list now includes __row_idx at the end, so we compare against len(headers)-1
-                        expected_cols = len(headers) - 1
-                        if len(row_values) < expected_cols:
-                            row_values += [None] * (expected_cols - len(row_values))
-                        elif len(row_values) > expected_cols:
-                            row_values = row_values[:expected_cols]
-                        
-                        # Append the row index
-                        row_values.append(current_row_idx)
-                        data.append(row_values)
-                
-                if data:
-                    res[s_name] = pd.DataFrame(data, columns=headers)
-                else:
-                    res[s_name] = pd.DataFrame(columns=headers)
-            return res
-
         # UI
         st.markdown("#### 🚀 Multi-File Deduplication")
         st.caption("Compares Multiple Files (B) against One Baseline File (A). Outputs Cleaned Versions of B.")
@@ -3776,11 +3593,16 @@ if "Spreadsheet" in page:
         # STEP 1: UPLOAD
         with st.container(border=True):
             st.markdown("**📁 Step 1: Upload Files**")
+            saved_a_multi = saved_baseline_picker("multi_base")
             c1, c2 = st.columns(2)
-            files_a_multi = c1.file_uploader("Files A (Baseline / Old)", type=['xlsx'], accept_multiple_files=True, key="sit_a_multi")
+            if saved_a_multi:
+                files_a_multi = []
+                c1.info(f"📚 Baseline: saved index **{saved_a_multi}**")
+            else:
+                files_a_multi = c1.file_uploader("Files A (Baseline / Old)", type=['xlsx'], accept_multiple_files=True, key="sit_a_multi")
             files_b_multi = c2.file_uploader("Files B (New / Update)", type=['xlsx'], accept_multiple_files=True, key="sit_b_multi")
 
-        if files_a_multi and files_b_multi:
+        if (files_a_multi or saved_a_multi) and files_b_multi:
             try:
                 # STEP 2: CONFIGURE
                 with st.container(border=True):
@@ -3788,50 +3610,59 @@ if "Spreadsheet" in page:
                     
                     use_filters_multi = st.checkbox("Respect Excel Filters (Exclude Hidden Rows)", value=True, help="Make sure to SAVE your Excel files with filters active.", key="cross_filter_check_multi")
 
-                    # Load A (Baseline)
-                    xls_a_map = {}
-                    for f in files_a_multi:
-                        xls_a_map[f.name] = load_excel_safe_multi(f, use_filters_multi)
-                    
-                    # Load B (Target)
-                    xls_b_map = {} 
-                    for f in files_b_multi:
-                        xls_b_map[f.name] = load_excel_safe_multi(f, use_filters_multi)
-
-                    if not xls_a_map or not xls_b_map:
+                    # Parse A (Baseline) and B (Target) one file per worker process.
+                    # Row numbers map results back to the original file for deletion
+                    # A and B are parsed separately and kept as lists in upload order:
+                    # an A file and a B file may share a name
+                    parse_bar = st.empty()
+                    def show_parse_progress(side):
+                        def update(done, total, name):
+                            parse_bar.progress(done / total, text=f"Parsed {done}/{total} {side} workbooks ({name})")
+                        return update
+                    xls_a_list = parse_workbooks(list(files_a_multi), use_filters_multi, True, show_parse_progress("A")) if files_a_multi else []
+                    xls_b_list = parse_workbooks(list(files_b_multi), use_filters_multi, True, show_parse_progress("B"))
+                    parse_bar.empty()
+
+                    if (files_a_multi and not any(xls_a_list)) or not any(xls_b_list):
                         st.error("Baseline or Comparison files contain no visible data.")
                     else:
                         # Collect all columns from B (excluding __row_idx) to choose match cols
                         all_cols_b = set()
-                        for f_name, sheets in xls_b_map.items():
+                        for sheets in xls_b_list:
                             for df in sheets.values():
                                 cols = [c for c in df.columns if c != "__row_idx"]
                                 all_cols_b.update(cols)
                         
                         match_cols = st.multiselect("Select Unique Identifier Columns", sorted(list(all_cols_b)), key="multi_col_select")
 
+                        if saved_a_multi:
+                            index_error = column_mismatch(load_index(saved_a_multi)["meta"], match_cols) if match_cols else None
+                            if index_error:
+                                st.error(f"{index_error} Select the same columns of Files B in the same order.")
+                                match_cols = []
+                        elif match_cols:
+                            save_baseline_controls("multi_base", files_a_multi, match_cols, use_filters_multi)
+
                     if match_cols:
                         if st.button("🚀 Find New Rows (Clean Files)", type="primary", use_container_width=True, key="btn_multi"):
                             
                             # 1. BUILD BASELINE
-                            with st.spinner("Building combined baseline from Files A..."):
-                                baseline_tuples = set()
-                                count_a = 0
-                                for f_name, sheets in xls_a_map.items():
-                                    for df in sheets.values():
-                                        valid_cols = [c for c in match_cols if c in df.columns]
-                                        if len(valid_cols) != len(match_cols): continue
-                                        temp = df[valid_cols].copy()
-                                        for c in valid_cols:
-                                            temp[c] = temp[c].apply(normalize_text)
-                                        temp = temp.dropna(how='all')
-                                        count_a += len(temp)
-                                        baseline_tuples.update(list(temp.itertuples(index=False, name=None)))
+                            progress_bar = st.progress(0.0, text="Building combined baseline from Files A...")
+                            def show_progress(stage, start, span):
+                                def update(done, total, name):
+                                    progress_bar.progress(start + span * done / total, text=f"{stage} {done}/{total} ({name})")
+                                return update
+
+                            baseline_index = load_index(saved_a_multi) if saved_a_multi else None
+                            if baseline_index:
+                                baseline_keys = baseline_index["keys"]
+                                count_a = baseline_index["meta"]["rows"]
+                            else:
+                                baseline_keys, count_a = hash_baseline_files(files_a_multi, xls_a_list, match_cols, show_progress("Hashed baseline file", 0.0, 0.3))
                             
-                            # 2. PROCESS FILES
+                            # 2. PROCESS FILES (one worker per B file: hash keys, match, write cleaned copy)
                             import zipfile
                             import io
-                            import openpyxl
 
                             # We will create a Zip file containing the "Cleaned" versions of File B
                             zip_buffer = io.BytesIO()
@@ -3839,64 +3670,43 @@ if "Spreadsheet" in page:
                             with st.spinner("Processing files... Removing duplicates while preserving styles."):
                                 processed_count = 0
                                 total_removed = 0
+                                removed_preview = []
                                 
+                                cleaned_files = clean_files(
+                                    files_b_multi, xls_b_list, match_cols, baseline_keys,
+                                    on_progress=show_progress("Cleaned file", 0.3, 0.7),
+                                    baseline_path=baseline_index["keys_path"] if baseline_index else None,
+                                )
+                                progress_bar.empty()
+
                                 with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
                                     
-                                    for f_obj in files_b_multi:
-                                        f_name = f_obj.name
-                                        sheets_data = xls_b_map.get(f_name, {})
-                                        
-                                        # We need to modify the ORIGINAL file
-                                        f_obj.seek(0)
-                                        wb = openpyxl.load_workbook(f_obj)
-                                        
-                                        file_removed_count = 0
-                                        
-                                        for s_name, df in sheets_data.items():
-                                            if s_name not in wb.sheetnames: continue
-                                            ws = wb[s_name]
-
-                                            valid_cols = [c for c in match_cols if c in df.columns]
-                                            if len(valid_cols) != len(match_cols): continue
-                                            
-                                            # Normalize and match
-                                            temp_b = df.copy()
-                                            norm_keys = []
-                                            for c in valid_cols:
-                                                norm_n = f"__norm_{c}"
-                                                temp_b[norm_n] = temp_b[c].apply(normalize_text)
-                                                norm_keys.append(norm_n)
-                                            
-                                            # Identify rows to DELETE (Duplicates)
-                                            # Row must NOT be empty in keys to be a duplicate
-                                            temp_b_valid = temp_b.dropna(subset=norm_keys, how='all')
-                                            temp_b_valid['__tuple'] = temp_b_valid[norm_keys].apply(tuple, axis=1)
-                                            
-                                            # Mask: True if it IS in baseline (Duplicate)
-                                            duplicates_mask = temp_b_valid['__tuple'].isin(baseline_tuples)
-                                            
-                                            # Get the __row_idx of these duplicates
-                                            rows_to_delete = temp_b_valid.loc[duplicates_mask, '__row_idx'].tolist()
-                                            
-                                            if rows_to_delete:
-                                                file_removed_count += len(rows_to_delete)
-                                                # Delete rows in descending order to avoid shifting indices
-                                                for r_idx in sorted(rows_to_delete, reverse=True):
-                                                    ws.delete_rows(r_idx)
+                                    for f_b, sheets_b, (cleaned_bytes, removed_by_sheet) in zip(files_b_multi, xls_b_list, cleaned_files):
+                                        f_name = f_b.name
+                                        for s_name, (rows_removed, hashes_removed) in removed_by_sheet.items():
+                                            total_removed += len(rows_removed)
+                                            if baseline_index:
+                                                df = sheets_b[s_name]
+                                                matched = df[df['__row_idx'].isin(rows_removed)].drop(columns="__row_idx").copy()
+                                                matched.insert(0, "File", f_name)
+                                                matched.insert(1, "Row", rows_removed)
+                                                matched.insert(2, "First Seen In", provenance(baseline_index, hashes_removed))
+                                                removed_preview.append(matched)
                                         
-                                        total_removed += file_removed_count
                                         processed_count += 1
                                         
-                                        # Save the modified workbook to the zip
-                                        out = io.BytesIO()
-                                        wb.save(out)
+                                        # Save the cleaned workbook to the zip
                                         clean_name = f"Cleaned_{f_name}"
-                                        zf.writestr(clean_name, out.getvalue())
+                                        zf.writestr(clean_name, cleaned_bytes)
 
                                 # 3. METRICS & DOWNLOAD
                                 c_m1, c_m2 = st.columns(2)
                                 c_m1.metric("Baseline Rows (A)", count_a)
                                 c_m2.metric("Duplicate Rows Removed from B", total_removed)
+
+                                if removed_preview:
+                                    with st.expander(f"🔎 Removed Rows and Where They Were First Seen ({total_removed})"):
+                                        paged_preview({"Removed": pd.concat(removed_preview, ignore_index=True)}, key="multi_removed")
                                 
                                 if processed_count > 0:
                                     zip_buffer.seek(0)
@@ -3912,6 +3722,89 @@ if "Spreadsheet" in page:
             except Exception as e:
                 st.error(f" Comparison Error: {e}")
 
+    # ==========================
+    # TAB 4: AGAINST LIVE CRM
+    # ==========================
+    with tab4:
+        st.markdown("#### 🚀 Check a List Against the CRM")
+        st.caption("Split an uploaded workbook into leads that are new and leads already in the CRM, matched on normalized phone, email and business name.")
+
+        # CRM KEY INDEX (hashed phone / email / name, synced incrementally)
+        with st.container(border=True):
+            crm_meta = load_crm_index_meta()
+            ci1, ci2, ci3 = st.columns([3, 1, 1])
+            if crm_meta["generation"]:
+                ci1.markdown(f"**🗂️ CRM Index:** {crm_meta['leads']:,} leads · synced {crm_meta.get('updated_at', '-')}")
+            else:
+                ci1.markdown("**🗂️ CRM Index:** not built yet")
+            sync_clicked = ci2.button("🔄 Sync", use_container_width=True, key="crm_index_sync")
+            rebuild_clicked = ci3.button("♻️ Rebuild", use_container_width=True, key="crm_index_rebuild")
+            if sync_clicked or rebuild_clicked:
+                try:
+                    with st.spinner("Fetching lead keys from the CRM..."):
+                        crm_meta, fetched = refresh_crm_index(rebuild=rebuild_clicked)
+                    st.success(f"Index up to date ({fetched:,} lead(s) fetched).")
+                except Exception as e:
+                    st.error(f"Could not reach the CRM backend: {e}")
+
+        with st.container(border=True):
+            st.markdown("**📁 Step 1: Upload Workbook**")
+            f_crm = st.file_uploader("Purchased / Scraped List (.xlsx)", type=['xlsx'], key="sit_crm")
+
+        if f_crm:
+            try:
+                use_filters_crm = st.checkbox("Respect Excel Filters (Exclude Hidden Rows)", value=True, key="crm_filter_check")
+                xls_crm, _ = load_workbook_cached(f_crm, use_filters_crm)
+                crm_cols = sorted({str(c) for df in xls_crm.values() for c in df.columns})
+
+                with st.container(border=True):
+                    st.markdown("**⚙️ Step 2: Map Key Columns**")
+                    k1, k2, k3 = st.columns(3)
+                    crm_map = {
+                        "phone": k1.selectbox("Phone Column", ["(none)"] + crm_cols, key="crm_phone_col"),
+                        "email": k2.selectbox("Email Column", ["(none)"] + crm_cols, key="crm_email_col"),
+                        "name": k3.selectbox("Business Name Column", ["(none)"] + crm_cols, key="crm_name_col", help="Exact match after normalization. Common names can collide across cities; leave as (none) to match on phone / email only."),
+                    }
+                    crm_map = {k: v for k, v in crm_map.items() if v != "(none)"}
+
+                if not crm_meta["generation"]:
+                    st.info("Build the CRM index first (🔄 Sync).")
+                elif crm_map and st.button("🚀 Split New vs Already in CRM", type="primary", use_container_width=True, key="btn_crm"):
+                    crm_out = {}
+                    total_new = total_known = 0
+                    with st.spinner("Matching against the CRM index..."):
+                        for s_name, df in xls_crm.items():
+                            if df.empty:
+                                continue
+                            in_crm, matched_on, crm_lead_id = match_against_crm(df, crm_map)
+                            new_df = df[~in_crm]
+                            known_df = df[in_crm].assign(**{"CRM Match": matched_on[in_crm], "CRM Lead ID": crm_lead_id[in_crm]})
+                            total_new += len(new_df)
+                            total_known += len(known_df)
+                            if len(new_df):
+                                crm_out[f"{s_name[:20]}_New"] = new_df
+                            if len(known_df):
+                                crm_out[f"{s_name[:20]}_In_CRM"] = known_df
+                        crm_data, crm_stats = write_workbook(crm_out, styled=True)
+
+                    m1, m2, m3 = st.columns(3)
+                    m1.metric("Rows Checked", total_new + total_known)
+                    m2.metric("New Leads", total_new)
+                    m3.metric("Already in CRM", total_known, delta_color="inverse")
+                    for s_name in [s for s in crm_out if s.endswith("_In_CRM")]:
+                        with st.expander(f"{s_name} ({len(crm_out[s_name])} rows)"):
+                            paged_preview({s_name: crm_out[s_name]}, key=f"crm_known_{s_name}")
+                    st.caption(throughput_caption(crm_stats))
+                    st.download_button(
+                        label="📥 Download New vs In-CRM Workbook",
+                        data=crm_data,
+                        file_name=f"crm_checked_{f_crm.name}",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        type="primary"
+                    )
+            except Exception as e:
+                st.error(f" Comparison Error: {e}")
+
 
 # ================== POWER DIALER ==================
 if "Power Dialer" in page:
@@ -4666,7 +4559,7 @@ div[data-testid="stVerticalBlock"]:has(div#{key}) {{
                 
                 # Update if changed
                 if new_prio != current_prio:
-                    update_lead(lead['id'], {"priority": new_prio})
+                    update_lead(lead['id'], {"priority": new_prio}, previous=lead)
                     st.toast(f"Priority updated to {new_prio}")
                     time.sleep(0.5)
                     st.rerun()
@@ -4759,7 +4652,7 @@ div[data-testid="stVerticalBlock"]:has(div#actions_card) div.stButton:nth-of-typ
                 update_lead(lead['id'], {
                     "status": "Interested", "priority": "HOT", 
                     "callNotes": st.session_state[notes_key], "lastFollowUpDate": today_date
-                })
+                }, previous=lead)
                 st.toast("Marked Interested! 🚀")
                 next_lead()
                 time.sleep(0.5)
@@ -4784,7 +4677,7 @@ div[data-testid="stVerticalBlock"]:has(div#actions_card) div.stButton:nth-of-typ
                             "status": "Meeting set", "priority": "HOT",
                             "callNotes": st.session_state[notes_key], "lastFollowUpDate": today_date,
                             "meetingDate": str(ts), "nextFollowUpDate": str(d)
-                        })
+                        }, previous=lead)
                         st.success("Meeting Scheduled!")
                         del st.session_state[f"open_meet_{lead['id']}"]
                         next_lead()
@@ -4799,7 +4692,7 @@ div[data-testid="stVerticalBlock"]:has(div#actions_card) div.stButton:nth-of-typ
                 update_lead(lead['id'], {
                     "status": "Not picking", "callNotes": st.session_state[notes_key],
                     "lastFollowUpDate": today_date, "nextFollowUpDate": str(next_d_val)
-                })
+                }, previous=lead)
                 st.toast(f"Marked Not Picking (Next: {next_d_val})")
                 next_lead()
                 time.sleep(0.3)
@@ -4813,7 +4706,7 @@ div[data-testid="stVerticalBlock"]:has(div#actions_card) div.stButton:nth-of-typ
                 update_lead(lead['id'], {
                     "status": "Call Later", "callNotes": st.session_state[notes_key],
                     "lastFollowUpDate": today_date, "nextFollowUpDate": str(next_d_val)
-                })
+                }, previous=lead)
                 st.toast(f"Snoozed until {next_d_val}")
                 next_lead()
                 time.sleep(0.3)
@@ -4826,7 +4719,7 @@ div[data-testid="stVerticalBlock"]:has(div#actions_card) div.stButton:nth-of-typ
                 update_lead(lead['id'], {
                     "status": "Not Interested", "priority": "COLD",
                     "callNotes": st.session_state[notes_key], "lastFollowUpDate": today_date
-                })
+                }, previous=lead)
                 st.toast("Marked Not Interested")
                 next_lead()
                 time.sleep(0.3)
@@ -5338,6 +5231,9 @@ if "Google Maps Scraper" in page:
         
         st.write("") 
         
+        skip_known = st.checkbox("Skip places found in earlier scrapes", value=True, help="Uses the place index (place_index.sqlite3) to skip businesses already scraped, so re-running an area only opens new places.")
+        browser_fallback = st.checkbox("Open JS-only websites in a browser", value=False, help="Business websites are fetched over plain HTTP for email extraction. Turn this on to retry sites whose content is built by JavaScript in a headless browser (slower).")
+
         # Action Button (Simple Mode)
         start_scrape = st.button("Launch Scraper", type="primary", use_container_width=True)
 
@@ -5349,6 +5245,29 @@ if "Google Maps Scraper" in page:
 
         st.markdown("</div>", unsafe_allow_html=True)
     
+    # --- LIVE EDITS ---
+    # Status / Priority / Notes set on live rows while a crawl runs, keyed by Map Link,
+    # so they survive new rows arriving and carry over to the final results table.
+    if "live_edits" not in st.session_state:
+        st.session_state.live_edits = {}
+
+    def apply_live_edits(df):
+        if not st.session_state.live_edits or "Map Link" not in df.columns:
+            return df
+        df = df.copy()
+        for pos, link in enumerate(df["Map Link"].tolist()):
+            for col, val in st.session_state.live_edits.get(link, {}).items():
+                if col in df.columns:
+                    df.iat[pos, df.columns.get_loc(col)] = val
+        return df
+
+    def save_live_edits(editor_key, df):
+        if "Map Link" not in df.columns:
+            return
+        for pos, changes in st.session_state[editor_key].get("edited_rows", {}).items():
+            link = df["Map Link"].iloc[int(pos)]
+            st.session_state.live_edits.setdefault(link, {}).update(changes)
+
     # --- SHOW EXISTING SCRAPED RESULTS ---
     output_file = "scraped_results.csv"
     if os.path.exists(output_file) and not start_scrape:
@@ -5356,11 +5275,11 @@ if "Google Maps Scraper" in page:
             if os.stat(output_file).st_size == 0:
                 df_existing = pd.DataFrame()
             else:
-                df_existing = pd.read_csv(output_file, on_bad_lines='skip')
+                df_existing = load_scraped_results(output_file, content_key(output_file))
             
             if not df_existing.empty:
                 st.markdown("---")
-                st.subheader(f"📊 Previous Scrape Results ({len(df_existing)} leads)")
+                st.subheader(f"📊 Previous Scrape Results ({scraped_row_count(output_file)} leads)")
                 
                 # Reorder and Rename Columns
                 # Reorder and Rename Columns
@@ -5396,7 +5315,7 @@ if "Google Maps Scraper" in page:
                 remaining_cols = [c for c in df_existing.columns if c not in final_cols and c not in ["query", "location", "rating", "reviews"]]
                 final_cols.extend(remaining_cols)
                 
-                df_display_existing = df_existing[final_cols]
+                df_display_existing = apply_live_edits(df_existing[final_cols])
                 
                 # Force string type for phone to avoid decimals causing issues later
                 if "Phone Number" in df_display_existing.columns:
@@ -5748,11 +5667,15 @@ if "Google Maps Scraper" in page:
             
             output_file = "scraped_results.csv"
             
-            # Remove previous file if exists
-            if os.path.exists(output_file):
-                try:
-                    os.remove(output_file)
-                except: pass
+            # Remove previous file (its manifest and live stream) if exists
+            reset_progress(SCRAPE_LIVE_FILE)
+            st.session_state.live_edits = {}
+            st.session_state.live_rows_shown = 0
+            for stale in [output_file, manifest_path(output_file), SCRAPE_LIVE_FILE]:
+                if os.path.exists(stale):
+                    try:
+                        os.remove(stale)
+                    except: pass
             
             scraper_dir = os.path.join(os.getcwd(), "dental_scraper")
             # Output in root
@@ -5773,6 +5696,9 @@ if "Google Maps Scraper" in page:
                 "-a", f"must_have_phone={str(filter_phone).lower()}",
                 "-a", f"no_website={str(filter_website).lower()}",
                 "-a", f"scroll_limit={s_limit}",
+                "-a", f"skip_known={str(skip_known).lower()}",
+                "-a", f"browser_fallback={str(browser_fallback).lower()}",
+                "-a", f"query_workers={4 if perf_deep else 3 if perf_turbo else 2}",
                 "-O", f"../{output_file}"
             ]
             
@@ -5803,13 +5729,13 @@ if "Google Maps Scraper" in page:
             import subprocess
             import time
             
-            # Clean up old progress file
-            progress_file = "scraper_progress.txt"
-            if os.path.exists(progress_file):
+            # Clean up old progress stream (the spider also starts a fresh one)
+            if os.path.exists(SCRAPE_PROGRESS_FILE):
                 try:
-                    os.remove(progress_file)
+                    os.remove(SCRAPE_PROGRESS_FILE)
                 except:
                     pass
+            reset_progress(SCRAPE_PROGRESS_FILE)
             
             try:
                 # Redirect output to file for debugging
@@ -5840,6 +5766,162 @@ if "Google Maps Scraper" in page:
             except Exception as e:
                 st.error(f"Execution Error: {e}")
 
+    # Status card for a running crawl. A fragment that re-runs itself every second:
+    # only the card is refreshed (reading just the new progress events), not the
+    # whole page. When the process exits it triggers one full rerun for the results.
+    @st.fragment(run_every=1)
+    def scraper_status_fragment(process):
+        if process.poll() is not None:
+            st.rerun()
+        progress = read_progress(SCRAPE_PROGRESS_FILE)
+        count_info = f"{progress['done']}/{progress['total']}" if progress["total"] else "Starting..."
+        stage = progress["stage"]
+        current_query = progress["query"] or "Initializing..."
+        rate_info = f"{progress['rate'] * 60:.1f} leads/min" if progress["rate"] else "measuring rate"
+        eta_info = format_eta(progress["eta_s"])
+        error_info = f" · ⚠️ {progress['errors']} failed" if progress["errors"] else ""
+
+        # STYLE DISPATCHER FOR STATUS CARD
+        if st.session_state.get("google_ui_mode", False):
+            # Google Material Style
+            s_bg = "#ffffff"
+            s_border = "1px solid #dadce0"
+            s_shadow = "0 1px 3px 0 rgba(60,64,67,0.3), 0 4px 8px 3px rgba(60,64,67,0.15)"
+            s_text_main = "#202124"
+            s_text_sub = "#5f6368"
+            s_icon_bg = "#e8f0fe"
+            s_rocket_filter = "none" 
+            s_scale = "1.005"
+        else:
+            # Stealth/Cyber Gradient Style
+            s_bg = "linear-gradient(135deg, #3b82f6 0%, #8b5cf6 100%)"
+            s_border = "1px solid rgba(255, 255, 255, 0.2)"
+            s_shadow = "0 8px 32px rgba(59, 130, 246, 0.3)"
+            s_text_main = "white"
+            s_text_sub = "rgba(255, 255, 255, 0.9)"
+            s_icon_bg = "rgba(255, 255, 255, 0.2)"
+            s_rocket_filter = "none"
+            s_scale = "1.02"
+
+        st.markdown(f"""
+        <div style="
+            background: {s_bg};
+            border-radius: 16px;
+            padding: 24px 32px;
+            margin: 20px 0;
+            box-shadow: {s_shadow};
+            border: {s_border};
+            animation: pulse 2s ease-in-out infinite;
+        ">
+            <div style="display: flex; align-items: center; gap: 16px;">
+                <div style="
+                    width: 48px;
+                    height: 48px;
+                    background: {s_icon_bg};
+                    border-radius: 50%;
+                    display: flex;
+                    align-items: center;
+                    justify-content: center;
+                    font-size: 24px;
+                    animation: pulse 1s ease-in-out infinite;
+                    filter: {s_rocket_filter};
+                ">
+                    🚀
+                </div>
+                <div style="flex: 1;">
+                    <div style="
+                        color: {s_text_main};
+                        font-size: 18px;
+                        font-weight: 700;
+                        margin-bottom: 4px;
+                        font-family: 'Product Sans', sans-serif;
+                    ">
+                        Agents Active / Leads Found ({count_info}) · {stage}
+                    </div>
+                    <div style="
+                        color: {s_text_sub};
+                        font-size: 14px;
+                        font-weight: 500;
+                    ">
+                        Now searching: <strong>'{current_query}'</strong> · {rate_info} · ETA {eta_info}{error_info}
+                    </div>
+                </div>
+            </div>
+        </div>
+        <style>
+            @keyframes pulse {{
+                0%, 100% {{ transform: scale(1); box-shadow: {s_shadow}; }}
+                50% {{ transform: scale({s_scale}); box-shadow: {s_shadow}; }}
+            }}
+            @keyframes spin {{
+                from {{ transform: rotate(0deg); }}
+                to {{ transform: rotate(360deg); }}
+            }}
+        </style>
+        """, unsafe_allow_html=True)
+
+        if progress["recent_errors"]:
+            with st.expander(f"⚠️ Recent errors ({progress['errors']})"):
+                for err in progress["recent_errors"]:
+                    st.caption(err)
+
+        if st.button("🛑 Stop Scraper"):
+            process.terminate()
+            st.session_state.scraper_running = False
+            st.rerun()
+
+    # Live results table for a running crawl: tails scraped_results.jsonl every two
+    # seconds so leads can be qualified before the crawl (and its CSV) is finished.
+    @st.fragment(run_every=2)
+    def live_results_fragment():
+        live = read_live_results(SCRAPE_LIVE_FILE)
+        if live.empty:
+            st.caption("⚡ Leads will appear here as soon as the first one is scraped.")
+            return
+        # The editor keeps one key and an unchanged frame between refreshes, so it is never
+        # remounted under the user. New leads are appended beneath on the next refresh, or,
+        # once the table has edits, held back until the user asks for them.
+        shown = st.session_state.get("live_rows_shown", 0)
+        if len(live) > shown and (not shown or not st.session_state.live_edits):
+            shown = st.session_state.live_rows_shown = len(live)
+        pending = max(len(live) - shown, 0)
+        df_live = live.iloc[:shown].rename(columns={
+            "clinic_name": "Business Name",
+            "phone_number": "Phone Number",
+            "address": "Address",
+            "website_url": "Website",
+            "email": "Email",
+            "place_url": "Map Link",
+        })
+        df_live["Status"] = "Generated"
+        df_live["Priority"] = "WARM"
+        df_live["Notes"] = ""
+        live_cols = ["Business Name", "Phone Number", "Address", "Website", "Email", "Map Link", "Status", "Priority", "Notes"]
+        df_live = apply_live_edits(df_live[[c for c in live_cols if c in df_live.columns]])
+
+        st.markdown(f"#### ⚡ Live Results ({len(live)} leads so far)")
+        if pending:
+            st.button(f"⬇️ Show {pending} new lead(s)", key="live_show_new",
+                      on_click=lambda n=len(live): st.session_state.update(live_rows_shown=n))
+        editor_key = "live_results_editor"
+        st.data_editor(
+            df_live,
+            column_config={
+                "Status": st.column_config.SelectboxColumn("Status", options=["Generated", "Interested", "Not picking", "Asked to call later", "Meeting set", "Meeting Done", "Proposal sent", "Follow-up scheduled", "Not interested", "Closed - Won", "Closed - Lost"], required=True, width="medium"),
+                "Priority": st.column_config.SelectboxColumn("Priority", options=["HOT", "WARM", "COLD"], required=True, width="small"),
+                "Map Link": st.column_config.LinkColumn("Map Link", display_text="View on Map"),
+                "Website": st.column_config.LinkColumn("Website", display_text="Visit"),
+                "Notes": st.column_config.TextColumn("Notes", width="large"),
+            },
+            disabled=[c for c in df_live.columns if c not in ("Status", "Priority", "Notes")],
+            use_container_width=True,
+            height=400,
+            hide_index=True,
+            key=editor_key,
+            on_change=save_live_edits,
+            args=(editor_key, df_live),
+        )
+
     # --- BACKGROUND MONITOR ---
     if st.session_state.scraper_running:
         status_container = st.empty()
@@ -5854,107 +5936,8 @@ if "Google Maps Scraper" in page:
             
             if poll is None:
                 # --- RUNNING ---
-                # Read progress
-                progress_file = "scraper_progress.txt"
-                count_info = "Starting..."
-                current_query = "Initializing..."
-                
-                if os.path.exists(progress_file):
-                    try:
-                        with open(progress_file, "r") as f:
-                            progress = f.read().strip()
-                            parts = progress.split("|")
-                            if len(parts) == 2:
-                                count_info = parts[0]
-                                current_query = parts[1]
-                    except: pass
-                
-                # STYLE DISPATCHER FOR STATUS CARD
-                if st.session_state.get("google_ui_mode", False):
-                    # Google Material Style
-                    s_bg = "#ffffff"
-                    s_border = "1px solid #dadce0"
-                    s_shadow = "0 1px 3px 0 rgba(60,64,67,0.3), 0 4px 8px 3px rgba(60,64,67,0.15)"
-                    s_text_main = "#202124"
-                    s_text_sub = "#5f6368"
-                    s_icon_bg = "#e8f0fe"
-                    s_rocket_filter = "none" 
-                    s_scale = "1.005"
-                else:
-                    # Stealth/Cyber Gradient Style
-                    s_bg = "linear-gradient(135deg, #3b82f6 0%, #8b5cf6 100%)"
-                    s_border = "1px solid rgba(255, 255, 255, 0.2)"
-                    s_shadow = "0 8px 32px rgba(59, 130, 246, 0.3)"
-                    s_text_main = "white"
-                    s_text_sub = "rgba(255, 255, 255, 0.9)"
-                    s_icon_bg = "rgba(255, 255, 255, 0.2)"
-                    s_rocket_filter = "none"
-                    s_scale = "1.02"
-
-                status_container.markdown(f"""
-                <div style="
-                    background: {s_bg};
-                    border-radius: 16px;
-                    padding: 24px 32px;
-                    margin: 20px 0;
-                    box-shadow: {s_shadow};
-                    border: {s_border};
-                    animation: pulse 2s ease-in-out infinite;
-                ">
-                    <div style="display: flex; align-items: center; gap: 16px;">
-                        <div style="
-                            width: 48px;
-                            height: 48px;
-                            background: {s_icon_bg};
-                            border-radius: 50%;
-                            display: flex;
-                            align-items: center;
-                            justify-content: center;
-                            font-size: 24px;
-                            animation: pulse 1s ease-in-out infinite;
-                            filter: {s_rocket_filter};
-                        ">
-                            🚀
-                        </div>
-                        <div style="flex: 1;">
-                            <div style="
-                                color: {s_text_main};
-                                font-size: 18px;
-                                font-weight: 700;
-                                margin-bottom: 4px;
-                                font-family: 'Product Sans', sans-serif;
-                            ">
-                                Agents Active / Leads Found ({count_info})
-                            </div>
-                            <div style="
-                                color: {s_text_sub};
-                                font-size: 14px;
-                                font-weight: 500;
-                            ">
-                                Now searching: <strong>'{current_query}'</strong>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                <style>
-                    @keyframes pulse {{
-                        0%, 100% {{ transform: scale(1); box-shadow: {s_shadow}; }}
-                        50% {{ transform: scale({s_scale}); box-shadow: {s_shadow}; }}
-                    }}
-                    @keyframes spin {{
-                        from {{ transform: rotate(0deg); }}
-                        to {{ transform: rotate(360deg); }}
-                    }}
-                </style>
-                """, unsafe_allow_html=True)
-
-                if st.button("🛑 Stop Scraper"):
-                    process.terminate()
-                    st.session_state.scraper_running = False
-                    st.rerun()
-
-                time.sleep(1)
-                st.rerun()
+                scraper_status_fragment(process)
+                live_results_fragment()
             
             else:
                 # --- FINISHED ---
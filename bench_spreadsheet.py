@@ -0,0 +1,307 @@
+import argparse
+import io
+import json
+import os
+import platform
+import re
+import time
+import zipfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from components.dedup_engine import build_baseline, in_baseline, key_hashes, normalize_series, normalize_text
+from components.parallel_jobs import clean_files, hash_baseline_files, parse_workbooks
+from components.sheet_pipelines import baseline_from_sheets, rows_not_in_baseline, split_duplicates
+from components.workbook_reader import read_workbook
+from components.workbook_writer import write_workbook
+
+# Benchmarks for the Spreadsheet Tool's dedup pipeline.
+#   micro:    normalize_text vs normalize_series, tuple sets vs hashed baselines
+#   pipeline: synthetic workbooks through the same component calls each tab makes
+#             (components/sheet_pipelines.py, parallel_jobs.py), timed per stage
+#             (load, normalize, key, dedup / compare, write) via their on_stage hooks
+# Usage: python bench_spreadsheet.py [cells]                       (micro, default 1,000,000)
+#        python bench_spreadsheet.py --suite pipeline --rows 200000 --sheets 3 --json bench_report.json
+
+
+def make_cells(n, seed=7):
+    """Mixed key-like cells: emails, phones, names with punctuation, numbers, noise, nulls."""
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, n // 4 + 1, n)
+    kind = rng.integers(0, 6, n)
+    cells = np.empty(n, dtype=object)
+    cells[kind == 0] = [f"User.{i}@Example.com " for i in ids[kind == 0]]
+    cells[kind == 1] = [f"+91 (98) {i:07d}" for i in ids[kind == 1]]
+    cells[kind == 2] = [f"Dr. Smith's Clinic #{i}" for i in ids[kind == 2]]
+    cells[kind == 3] = ids[kind == 3].astype(float)
+    cells[kind == 4] = rng.choice(["", "None", "NaN", "null", "  "], (kind == 4).sum())
+    cells[kind == 5] = None
+    return pd.Series(cells, dtype=object)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def bench_normalize(n, text_only=False):
+    cells = make_cells(n)
+    if text_only:
+        # Typical key column (emails/phones/names): strings plus blanks
+        cells = cells.where(cells.map(lambda v: isinstance(v, str)), None)
+    slow, t_apply = timed(lambda s: s.apply(normalize_text), cells)
+    fast, t_vec = timed(normalize_series, cells)
+    same = (slow.isna() == fast.isna()).all() and (slow.dropna() == fast.dropna()).all()
+    assert same, "vectorized keys differ from normalize_text"
+    return {"cells": n, "apply_s": round(t_apply, 3), "vectorized_s": round(t_vec, 3), "speedup": round(t_apply / t_vec, 1)}
+
+
+def make_keys(n, seed=11):
+    """Two-column key frame (email, phone) with ~50% overlap between seeds."""
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, n * 2, n)
+    return pd.DataFrame({
+        "Email": [f"user{i}@example.com" for i in ids],
+        "Phone": [f"+91 {i % 10_000_000_000:010d}" for i in ids],
+    })
+
+
+def bench_baseline(n):
+    """Tuple-set membership (old) vs sorted uint64 hashes (new) for an n-row baseline and batch."""
+    base_df, batch_df = make_keys(n, 11), make_keys(n, 12)
+    cols = ["Email", "Phone"]
+
+    def tuples():
+        norm_a = pd.DataFrame({c: base_df[c].apply(normalize_text) for c in cols}).dropna(how="all")
+        base = set(norm_a.itertuples(index=False, name=None))
+        norm_b = pd.DataFrame({c: batch_df[c].apply(normalize_text) for c in cols})
+        return norm_b.apply(tuple, axis=1).isin(base).to_numpy()
+
+    def hashed():
+        h_a, has_a = key_hashes(base_df, cols)
+        base = build_baseline([h_a[has_a]])
+        h_b, has_b = key_hashes(batch_df, cols)
+        return has_b & in_baseline(h_b, base)
+
+    old, t_old = timed(tuples)
+    new, t_new = timed(hashed)
+    assert (old == new).all(), "hashed membership differs from tuple membership"
+    return {"rows": n, "tuples_s": round(t_old, 3), "hashed_s": round(t_new, 3), "speedup": round(t_old / t_new, 1)}
+
+
+# --- SYNTHETIC WORKBOOKS ---
+class NamedBytes(io.BytesIO):
+    """Stands in for a Streamlit UploadedFile (bytes + .name)."""
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+def _messy_email(ids, variant):
+    base = np.array([f"user{i}@example.com" for i in ids], dtype=object)
+    out = base.copy()
+    out[variant == 1] = [e.upper() for e in base[variant == 1]]
+    out[variant == 2] = [f"  {e} " for e in base[variant == 2]]
+    out[variant == 3] = [e.capitalize() + "." for e in base[variant == 3]]
+    return out
+
+
+def _messy_phone(ids, variant):
+    digits = np.array([f"98{i % 100_000_000:08d}" for i in ids], dtype=object)
+    out = np.array([f"+91 {d}" for d in digits], dtype=object)
+    out[variant == 1] = [f"(+91) {d}" for d in digits[variant == 1]]
+    out[variant == 2] = [f"+91 {d[:5]}-{d[5:]}" for d in digits[variant == 2]]
+    out[variant == 3] = [f"+91 {d}." for d in digits[variant == 3]]
+    return out
+
+
+def make_sheets(rows, sheets, dup_rate, hidden_rate, seed=3, id_offset=0):
+    """
+    {sheet: DataFrame} with `rows` rows in total plus ground truth. A dup_rate share of
+    rows repeat an earlier record (any sheet) with differently formatted email/phone
+    that normalizes to the same key; hidden_rate of rows are marked hidden.
+    Returns (sheets, hidden_masks, record_ids).
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(rows) + id_offset
+    repeat = rng.random(rows) < dup_rate
+    repeat[0] = False
+    # Each repeated row copies a random earlier row's record
+    src = (rng.random(rows) * np.arange(rows)).astype(np.int64)
+    ids = np.where(repeat, -1, ids)
+    for i in np.flatnonzero(repeat):
+        ids[i] = ids[src[i]]
+    variant = rng.integers(0, 4, rows)
+    frame = pd.DataFrame({
+        "Name": [f"Clinic {i}" for i in ids],
+        "Email": _messy_email(ids, variant),
+        "Phone": _messy_phone(ids, variant),
+        "City": rng.choice(["Pune", "Mumbai", "Delhi", "Chennai"], rows),
+        "Notes": rng.choice(["", "None", "call back", "null", "visited 2024-01-01"], rows),
+    })
+    hidden = rng.random(rows) < hidden_rate
+    bounds = np.linspace(0, rows, sheets + 1).astype(int)
+    out, masks, truth = {}, {}, {}
+    for k in range(sheets):
+        part = slice(bounds[k], bounds[k + 1])
+        out[f"Sheet{k + 1}"] = frame.iloc[part].reset_index(drop=True)
+        masks[f"Sheet{k + 1}"] = hidden[part]
+        truth[f"Sheet{k + 1}"] = ids[part]
+    return out, masks, truth
+
+
+def _hide_rows(data, hidden_masks):
+    """Marks rows hidden (as an Excel filter would) in xlsx bytes written by write_workbook."""
+    src = zipfile.ZipFile(io.BytesIO(data))
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for item in src.infolist():
+            body = src.read(item.filename)
+            m = re.match(r"xl/worksheets/sheet(\d+)\.xml$", item.filename)
+            if m:
+                mask = list(hidden_masks.values())[int(m.group(1)) - 1]
+                hidden_rows = {str(r + 2) for r in np.flatnonzero(mask)}
+                body = re.sub(rb'<row r="(\d+)">',
+                              lambda mm: (b'<row r="%s" hidden="1">' % mm.group(1)) if mm.group(1).decode() in hidden_rows else mm.group(0),
+                              body)
+            zf.writestr(item, body)
+    return out.getvalue()
+
+
+def make_workbook(name, rows, sheets, dup_rate, hidden_rate, seed=3, id_offset=0):
+    """Synthetic .xlsx upload plus the record id of every visible row (ground truth for dedup)."""
+    frames, masks, truth = make_sheets(rows, sheets, dup_rate, hidden_rate, seed, id_offset)
+    data, _ = write_workbook(frames)
+    visible_ids = np.concatenate([truth[s][~masks[s]] for s in frames])
+    return NamedBytes(name, _hide_rows(data, masks)), visible_ids
+
+
+# --- PIPELINES (the component calls each tab makes, minus Streamlit) ---
+KEY_COLS = ["Email", "Phone"]
+
+
+def _stage(report, name, fn, *args):
+    out, seconds = timed(fn, *args)
+    report["stages"][name] = round(seconds, 3)
+    return out
+
+
+def _stage_hook(report):
+    """on_stage callback for the components: adds each step's seconds to report["stages"]."""
+    def on_stage(name, seconds):
+        report["stages"][name] = round(report["stages"].get(name, 0.0) + seconds, 3)
+    return on_stage
+
+
+def bench_single(rows, sheets, dup_rate, hidden_rate):
+    """Tab 1: one workbook, duplicates across all sheets, Dups/Uniques workbook out."""
+    f, visible_ids = make_workbook("single.xlsx", rows, sheets, dup_rate, hidden_rate)
+    report = {"tab": "single", "stages": {}}
+    xls, hidden = _stage(report, "load", read_workbook, f, True)
+    valid = {k: v for k, v in xls.items() if not v.empty}
+    out_sheets, summary = split_duplicates(valid, KEY_COLS, on_stage=_stage_hook(report))
+    _, write_stats = _stage(report, "write", write_workbook, out_sheets)
+
+    expected = len(visible_ids) - len(np.unique(visible_ids))
+    report.update(rows_loaded=sum(len(d) for d in valid.values()), hidden_skipped=hidden,
+                  duplicates_found=sum(c["dups"] for c in summary.values()),
+                  duplicates_expected=int(expected), output_bytes=write_stats["bytes"])
+    return report
+
+
+def bench_compare(rows, sheets, dup_rate, hidden_rate, overlap=0.5):
+    """Tab 2: File B rows not in File A; about `overlap` of B's records also exist in A."""
+    f_a, ids_a = make_workbook("a.xlsx", rows, sheets, dup_rate, hidden_rate, seed=3)
+    f_b, ids_b = make_workbook("b.xlsx", rows, sheets, dup_rate, hidden_rate, seed=4, id_offset=int(rows * (1 - overlap)))
+    report = {"tab": "compare", "stages": {}}
+    (xls_a, _), (xls_b, _) = _stage(report, "load", lambda: (read_workbook(f_a), read_workbook(f_b)))
+    on_stage = _stage_hook(report)
+    baseline, count_a = baseline_from_sheets(xls_a, KEY_COLS, on_stage=on_stage)
+    new_rows = rows_not_in_baseline(xls_b, KEY_COLS, baseline, on_stage=on_stage)
+    new_frames = {f"{s[:20]}_New": d for s, d in new_rows.items() if len(d)}
+    _, write_stats = _stage(report, "write", write_workbook, new_frames, True)
+
+    expected = int((~np.isin(ids_b, ids_a)).sum())
+    report.update(rows_a=count_a, rows_b=sum(len(d) for d in xls_b.values()),
+                  new_found=sum(len(d) for d in new_rows.values()), new_expected=expected,
+                  output_bytes=write_stats["bytes"])
+    return report
+
+
+def bench_multi(rows, sheets, dup_rate, hidden_rate, files=3, overlap=0.5):
+    """
+    Tab 3: several A and B files, parsed/hashed/cleaned in the process pool. Load is
+    wall time; normalize/key/compare/write are worker seconds summed over files.
+    """
+    per_file = max(1, rows // files)
+    files_a = [make_workbook(f"a{k}.xlsx", per_file, sheets, dup_rate, hidden_rate, seed=10 + k, id_offset=k * per_file)[0]
+               for k in range(files)]
+    files_b = [make_workbook(f"b{k}.xlsx", per_file, sheets, dup_rate, hidden_rate, seed=20 + k,
+                             id_offset=int((k + 1 - overlap) * per_file))[0] for k in range(files)]
+    report = {"tab": "multi", "stages": {}, "files": files}
+    # A and B parsed separately, as in the tab (their file names may collide)
+    xls_a, xls_b = _stage(report, "load", lambda: (parse_workbooks(files_a, True, True), parse_workbooks(files_b, True, True)))
+    on_stage = _stage_hook(report)
+    baseline, count_a = hash_baseline_files(files_a, xls_a, KEY_COLS, on_stage=on_stage)
+    cleaned = clean_files(files_b, xls_b, KEY_COLS, baseline, on_stage=on_stage)
+    report.update(rows_a=count_a, removed=int(sum(len(r) for _, by_sheet in cleaned for r, _ in by_sheet.values())),
+                  output_bytes=sum(len(b) for b, _ in cleaned))
+    return report
+
+
+def pipeline_suite(rows, sheets, dup_rate, hidden_rate, tabs=("single", "compare", "multi")):
+    benches = {"single": bench_single, "compare": bench_compare, "multi": bench_multi}
+    results = []
+    for tab in tabs:
+        t0 = time.perf_counter()
+        r = benches[tab](rows, sheets, dup_rate, hidden_rate)
+        r["total_s"] = round(sum(r["stages"].values()), 3)
+        r["rows_per_s"] = int(rows / r["total_s"]) if r["total_s"] else rows
+        r["wall_s"] = round(time.perf_counter() - t0, 3)  # includes synthetic data generation
+        results.append(r)
+    return results
+
+
+def environment():
+    return {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Spreadsheet Tool benchmarks")
+    parser.add_argument("cells", nargs="?", type=int, default=1_000_000, help="cells for the micro suite")
+    parser.add_argument("--suite", choices=["micro", "pipeline", "all"], default="micro")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows per workbook (pipeline)")
+    parser.add_argument("--sheets", type=int, default=3)
+    parser.add_argument("--dup-rate", type=float, default=0.2)
+    parser.add_argument("--hidden-rate", type=float, default=0.05)
+    parser.add_argument("--tabs", default="single,compare,multi")
+    parser.add_argument("--json", metavar="PATH", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = {"generated_at": datetime.now().isoformat(timespec="seconds"), "environment": environment()}
+    if args.suite in ("micro", "all"):
+        n = args.cells
+        report["micro"] = {}
+        for label, text_only in [("mixed", False), ("text", True)]:
+            r = bench_normalize(n, text_only)
+            report["micro"][f"normalize_{label}"] = r
+            print(f"normalize ({label}): {r['cells']:,} cells | apply {r['apply_s']}s | vectorized {r['vectorized_s']}s | {r['speedup']}x")
+        r = bench_baseline(n)
+        report["micro"]["baseline"] = r
+        print(f"baseline: {r['rows']:,} rows vs {r['rows']:,} | tuple set {r['tuples_s']}s | uint64 hashes {r['hashed_s']}s | {r['speedup']}x")
+    if args.suite in ("pipeline", "all"):
+        report["pipeline"] = {"params": {"rows": args.rows, "sheets": args.sheets, "dup_rate": args.dup_rate,
+                                         "hidden_rate": args.hidden_rate},
+                              "results": pipeline_suite(args.rows, args.sheets, args.dup_rate, args.hidden_rate,
+                                                        [t.strip() for t in args.tabs.split(",") if t.strip()])}
+        for r in report["pipeline"]["results"]:
+            stages = " | ".join(f"{k} {v}s" for k, v in r["stages"].items())
+            print(f"{r['tab']}: {args.rows:,} rows x {args.sheets} sheets | {stages} | {r['rows_per_s']:,} rows/s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report: {args.json}")
@@ -1,12 +1,37 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import numpy as np
-from datetime import datetime, timedelta
 import os
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from components.auth import AuthManager, Role
+from components.lead_rollups import refresh_rollups, trend_series
+from components.crm_stats import headline_metrics, BACKEND_OWNER
+from components.scrape_manifest import scraped_row_count
+from components.status_funnel import compute_funnel, load_status_events
 
 CHART_PALETTE = ["#3b82f6", "#94a3b8", "#10b981", "#f59e0b"]
+CRM_LOAD_WORKERS = 8
+
+def load_user_crm_counts(username):
+    """Reads one user's crm_data folder and returns lead/call/meeting/deal counts."""
+    crm_path = os.path.join("crm_data", username)
+    counts = {'leads': 0, 'calls': 0, 'meetings': 0, 'deals': 0}
+    if not os.path.exists(crm_path):
+        return counts
+    for f in sorted(os.listdir(crm_path)):
+        if f.endswith(".json"):
+            try:
+                tmp = pd.read_json(os.path.join(crm_path, f))
+                counts['leads'] += len(tmp)
+                if 'status' in tmp.columns:
+                    statuses = tmp['status'].dropna().astype(str).str.lower().str.strip()
+                    counts['calls'] += len(statuses[(statuses != '') & (statuses != 'new')])
+                    counts['meetings'] += len(statuses[statuses.str.contains('meeting')])
+                    counts['deals'] += len(statuses[statuses.str.contains('closed')])
+            except:
+                pass
+    return counts
 
 def render_analytics_dashboard():
 
@@ -311,29 +336,13 @@ div[data-testid="stHorizontalBlock"] button:hover {
                 filtered_users = [users[u] for u in sel_users]
 
     # ── Global Metrics ────────────────────────────────────────────────────────
-    try:
-        df_master     = pd.read_csv("scraped_results.csv")
-        total_leads   = len(df_master)
-    except:
-        total_leads = 0
-
-    total_calls = 0
-    total_meetings = 0
-    total_deals = 0
-    
-    if os.path.exists("crm_data"):
-        for root, dirs, files in os.walk("crm_data"):
-            for f in files:
-                if f.endswith(".json"):
-                    try:
-                        df = pd.read_json(os.path.join(root, f))
-                        if 'status' in df.columns:
-                            statuses = df['status'].dropna().astype(str).str.lower().str.strip()
-                            total_calls += len(statuses[(statuses != '') & (statuses != 'new')])
-                            total_meetings += len(statuses[statuses.str.contains('meeting')])
-                            total_deals += len(statuses[statuses.str.contains('closed')])
-                    except:
-                        pass
+    total_leads = scraped_row_count("scraped_results.csv")
+
+    # Calls / meetings / deals come from the materialized per-owner counters (crm_data folders)
+    folder_metrics = headline_metrics(exclude=[BACKEND_OWNER])
+    total_calls = folder_metrics["calls"]
+    total_meetings = folder_metrics["meetings"]
+    total_deals = folder_metrics["deals"]
 
     def mc(label, value, unit, pct, desc, accent):
         return f"""
@@ -357,33 +366,20 @@ div[data-testid="stHorizontalBlock"] button:hover {
     with c4: st.markdown(mc("Total Deal Closed",   f"{total_deals:,}",    "deals",   "2.01%", "Closed monthly deals",    "amber"),  unsafe_allow_html=True)
 
     # ── Collect User Stats ────────────────────────────────────────────────────
+    # Folder reads are I/O bound (slow on network volumes), so fan them out over a
+    # small thread pool; pool.map keeps results in the same order as filtered_users.
+    with ThreadPoolExecutor(max_workers=max(1, min(CRM_LOAD_WORKERS, len(filtered_users)))) as pool:
+        folder_counts = list(pool.map(load_user_crm_counts, [u.username for u in filtered_users]))
+
     user_stats = []
-    for u in filtered_users:
-        crm_path = os.path.join("crm_data", u.username)
-        leads_count = 0
-        calls_made = 0
-        meetings_booked = 0
-        deals_closed = 0
-        if os.path.exists(crm_path):
-            for f in os.listdir(crm_path):
-                if f.endswith(".json"):
-                    try:
-                        tmp = pd.read_json(os.path.join(crm_path, f))
-                        leads_count += len(tmp)
-                        if 'status' in tmp.columns:
-                            statuses = tmp['status'].dropna().astype(str).str.lower().str.strip()
-                            calls_made += len(statuses[(statuses != '') & (statuses != 'new')])
-                            meetings_booked += len(statuses[statuses.str.contains('meeting')])
-                            deals_closed += len(statuses[statuses.str.contains('closed')])
-                    except:
-                        pass
+    for u, counts in zip(filtered_users, folder_counts):
         user_stats.append({
             'Name': u.name,
             'Role': u.role.value if hasattr(u.role, 'value') else u.role,
-            'Leads Generated': leads_count,
-            'Calls Made': calls_made,
-            'Meetings Booked': meetings_booked,
-            'Deals Closed': deals_closed
+            'Leads Generated': counts['leads'],
+            'Calls Made': counts['calls'],
+            'Meetings Booked': counts['meetings'],
+            'Deals Closed': counts['deals']
         })
 
     df_perf = pd.DataFrame(user_stats)
@@ -468,16 +464,49 @@ div[data-testid="stHorizontalBlock"] button:hover {
             )
             st.plotly_chart(fig2, use_container_width=True, config={"displayModeBar": False})
 
+    # ── Pipeline Funnel ───────────────────────────────────────────────────────
+    st.markdown("<div class='analytics-divider'></div>", unsafe_allow_html=True)
+    st.markdown('<div class="section-label">Pipeline Funnel</div>', unsafe_allow_html=True)
+
+    today = datetime.now().date()
+    fw, _ = st.columns([2, 6])
+    with fw:
+        window = st.date_input("Leads entering between", value=(today - timedelta(days=30), today), key="funnel_window")
+    w_start, w_end = (window if isinstance(window, (list, tuple)) and len(window) == 2 else (window, window))
+
+    df_funnel = compute_funnel(load_status_events(), w_start, w_end)
+    if df_funnel['Leads'].iloc[0] == 0:
+        st.info("ℹ️ No status changes logged for leads entering this window yet.")
+    else:
+        fl, fr = st.columns([3, 2])
+        with fl:
+            fig_f = go.Figure(go.Funnel(
+                y=df_funnel['Stage'], x=df_funnel['Leads'],
+                textinfo="value+percent initial",
+                marker=dict(color=CHART_PALETTE[0]),
+            ))
+            fig_f.update_layout(
+                **base_layout(),
+                title=dict(text="Stage Reach", font=dict(size=15, color="#0f172a", weight=700), x=0.01, y=0.97),
+                height=370, margin=dict(t=55, l=10, r=10, b=30),
+            )
+            st.plotly_chart(fig_f, use_container_width=True, config={"displayModeBar": False})
+        with fr:
+            st.dataframe(
+                df_funnel.set_index('Stage')[['Conversion %', 'Drop-off %', 'Median Days', 'P90 Days']],
+                use_container_width=True, height=370
+            )
+
     # ── Lead Generation Trend ─────────────────────────────────────────────────
     st.markdown("<div class='analytics-divider'></div>", unsafe_allow_html=True)
     st.markdown('<div class="section-label">Lead Generation Trend</div>', unsafe_allow_html=True)
 
-    today = datetime.now().date()
-    dates = [today - timedelta(days=x) for x in range(14, -1, -1)]
-    base  = total_leads if total_leads > 0 else 20
-    np.random.seed(42)
-    y1 = [max(base + int(np.sin(x) * base * 0.2 + np.random.normal(0, base * 0.1)), 0) for x in range(15)]
-    y2 = [max(int(v * 0.85 + np.random.normal(0, base * 0.05)), 0) for v in y1]
+    # Daily rollup of CRM lead createdAt + scrape execution dates (only new rows are fetched,
+    # at most once a minute). Backend leads and scrape runs carry no owner, so the trend
+    # covers every user regardless of the team filter above.
+    st.caption("All users · CRM leads created + leads scraped per day (not filtered by the team selection)")
+    rollups = refresh_rollups()
+    dates, y1, y2 = trend_series(rollups, days=15)
 
     fig3 = go.Figure()
     fig3.add_trace(go.Scatter(
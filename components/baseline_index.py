@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from components.dedup_engine import in_baseline
+
+# --- CONFIG ---
+INDEX_DIR = "baseline_indexes"
+
+# One folder per named baseline:
+#   baseline_indexes/<name>/meta.json      columns, sources, generation, counts
+#   baseline_indexes/<name>/keys-<gen>.npy sorted unique uint64 key hashes (see dedup_engine.hash_keys)
+#   baseline_indexes/<name>/src-<gen>.npy  uint32 index into meta["sources"] for each key
+#   baseline_indexes/<name>/row-<gen>.npy  uint32 original row number for each key
+# Arrays are opened memory-mapped, so checking a batch against a multi-million-row
+# history only pages in the parts the binary search touches. Updates write a new
+# generation and then swap meta.json, so readers never see half-written arrays.
+# meta["columns"] records the key column names in hash order: hashes only match
+# when the same columns are selected in the same order, so anything else is refused.
+
+
+def _column_norm(name):
+    return str(name).strip().casefold()
+
+
+def column_mismatch(meta, columns):
+    """Error message when `columns` (names and order) differ from the index's key columns, else None."""
+    expected = list(meta["columns"])
+    if [_column_norm(c) for c in columns] == [_column_norm(c) for c in expected]:
+        return None
+    return (f"Index '{meta['name']}' is keyed on {', '.join(expected)} (in that order); "
+            f"got {', '.join(map(str, columns)) or 'no columns'}.")
+
+
+def index_slug(name):
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", str(name).strip()).strip("_")
+
+
+def _index_path(name):
+    return os.path.join(INDEX_DIR, index_slug(name))
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def list_indexes():
+    """Metadata for every saved baseline, newest first."""
+    if not os.path.isdir(INDEX_DIR):
+        return []
+    metas = [m for m in (_read_meta(os.path.join(INDEX_DIR, d)) for d in os.listdir(INDEX_DIR)) if m]
+    return sorted(metas, key=lambda m: m.get("updated_at", ""), reverse=True)
+
+
+def load_index(name):
+    """Returns {"meta", "keys", "src", "row", "keys_path"} with the arrays memory-mapped, or None."""
+    path = _index_path(name)
+    meta = _read_meta(path)
+    if meta is None:
+        return None
+    gen = meta["generation"]
+    arrays = {}
+    for part in ("keys", "src", "row"):
+        arrays[part] = np.load(os.path.join(path, f"{part}-{gen}.npy"), mmap_mode="r")
+    return {"meta": meta, "keys_path": os.path.join(path, f"keys-{gen}.npy"), **arrays}
+
+
+def add_to_index(name, columns, batches):
+    """
+    Creates or extends a baseline. `batches` yields (file_name, sheet_name,
+    sha256, hashes, row_numbers). Sheets already indexed (same sha256 + sheet)
+    are skipped; keys already present keep their original provenance.
+    Returns (meta, new_key_count).
+    """
+    path = _index_path(name)
+    meta = _read_meta(path)
+    if meta is None:
+        meta = {"name": str(name).strip(), "columns": list(columns), "sources": [], "generation": 0,
+                "rows": 0, "keys": 0, "created_at": datetime.now().isoformat(timespec="seconds")}
+        keys = np.empty(0, dtype=np.uint64)
+        src = np.empty(0, dtype=np.uint32)
+        row = np.empty(0, dtype=np.uint32)
+    else:
+        error = column_mismatch(meta, columns)
+        if error:
+            raise ValueError(error)
+        current = load_index(name)
+        keys, src, row = (np.array(current[p]) for p in ("keys", "src", "row"))
+
+    seen = {(s["sha256"], s["sheet"]) for s in meta["sources"]}
+    new_keys, new_src, new_row = [keys], [src], [row]
+    known = keys
+    added = 0
+    for file_name, sheet_name, sha256, hashes, row_numbers in batches:
+        if (sha256, sheet_name) in seen:
+            continue
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        # First occurrence of each key in this sheet, minus keys already in the index
+        uniq, first = np.unique(hashes, return_index=True)
+        fresh = ~in_baseline(uniq, known)
+        src_id = len(meta["sources"])
+        meta["sources"].append({"file": file_name, "sheet": sheet_name, "sha256": sha256, "rows": int(len(hashes)),
+                                "added_at": datetime.now().isoformat(timespec="seconds")})
+        seen.add((sha256, sheet_name))
+        meta["rows"] += int(len(hashes))
+        new_keys.append(uniq[fresh])
+        new_src.append(np.full(int(fresh.sum()), src_id, dtype=np.uint32))
+        new_row.append(np.asarray(row_numbers, dtype=np.uint32)[first[fresh]])
+        added += int(fresh.sum())
+        known = np.union1d(known, uniq[fresh])
+
+    if added == 0 and len(new_src) == 1 and meta["generation"]:
+        return meta, 0  # every sheet was already indexed
+
+    keys = np.concatenate(new_keys)
+    order = np.argsort(keys, kind="stable")
+    gen = meta["generation"] + 1
+    os.makedirs(path, exist_ok=True)
+    for part, arr in (("keys", keys[order]), ("src", np.concatenate(new_src)[order]), ("row", np.concatenate(new_row)[order])):
+        np.save(os.path.join(path, f"{part}-{gen}.npy"), arr)
+
+    old_gen = meta["generation"]
+    meta.update(generation=gen, keys=int(len(keys)), updated_at=datetime.now().isoformat(timespec="seconds"))
+    tmp_path = os.path.join(path, "meta.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+    for part in ("keys", "src", "row"):
+        try:
+            os.remove(os.path.join(path, f"{part}-{old_gen}.npy"))
+        except OSError:
+            pass  # first generation, or still mapped by a reader (Windows)
+    return meta, added
+
+
+def delete_index(name):
+    """Removes a saved baseline and all its generations."""
+    shutil.rmtree(_index_path(name), ignore_errors=True)
+
+
+def provenance(index, hashes, mask=None):
+    """'file / sheet (Row n)' for each hash found in the index, None otherwise."""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    out = np.full(len(hashes), None, dtype=object)
+    keys = index["keys"]
+    if not len(keys):
+        return out
+    pos = np.minimum(np.searchsorted(keys, hashes), len(keys) - 1)
+    found = keys[pos] == hashes
+    if mask is not None:
+        found &= mask
+    sources = index["meta"]["sources"]
+    for i in np.flatnonzero(found):
+        s = sources[int(index["src"][pos[i]])]
+        out[i] = f"{s['file']} / {s['sheet']} (Row {int(index['row'][pos[i]])})"
+    return out
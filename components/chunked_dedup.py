@@ -0,0 +1,247 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from components.column_profile import profile_frames, summarize
+from components.dedup_engine import key_hashes
+from components.workbook_reader import ROW_IDX_COL, content_hash, iter_sheet_chunks, sheet_headers
+
+# --- CONFIG ---
+CHUNK_ROWS = 100_000     # rows read, hashed and written per step
+PARTITION_BITS = 6       # 64 on-disk hash partitions
+CSV_SHEET = "CSV"        # sheet name reported for .csv inputs
+
+# Out-of-core duplicate split for inputs too large to hold as DataFrames.
+#   Pass 1: read each input in chunks, hash the key columns (dedup_engine.key_hashes,
+#           so keys match the in-memory mode exactly) and append (hash, seq) records
+#           to one of 2^PARTITION_BITS spill files chosen by the hash's top bits.
+#           Only row pointers (source, sheet, original row number) stay in memory.
+#   Resolve: each partition is loaded and sorted on its own; every occurrence after
+#           the first of a key gets the seq of that first occurrence in an on-disk
+#           memmap (-1 = unique).
+#   Pass 2: re-read the inputs chunk by chunk and stream rows into per-sheet
+#           Uniques / Duplicates CSVs, then zip them.
+# Peak memory is one chunk plus one partition plus 4 bytes per input row.
+
+_RECORD = np.dtype([("hash", "<u8"), ("seq", "<u8")])
+
+
+def _source_name(source):
+    return os.path.basename(getattr(source, "name", None) or str(source))
+
+
+def _is_csv(source):
+    return _source_name(source).lower().endswith(".csv")
+
+
+def iter_chunks(source, respect_filters=True, chunk_rows=CHUNK_ROWS, widths=None):
+    """Yields (sheet_name, DataFrame with ROW_IDX_COL) chunks from a .csv or .xlsx path / upload."""
+    if not _is_csv(source):
+        yield from iter_sheet_chunks(source, respect_filters, chunk_rows, widths)
+        return
+    if hasattr(source, "seek"):
+        source.seek(0)
+    # Text as-is: every chunk gets the same dtypes, so keys never depend on chunk boundaries
+    # Closed through the context manager: a reader abandoned mid-file (previews stop after
+    # one chunk) would otherwise close the caller's upload buffer when it is collected
+    with pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False, na_values=[""]) as reader:
+        line = 2  # first data row, 1-based, after the header
+        for chunk in reader:
+            chunk[ROW_IDX_COL] = np.arange(line, line + len(chunk), dtype=np.int64)
+            line += len(chunk)
+            yield CSV_SHEET, chunk.reset_index(drop=True)
+
+
+# --- CACHE ---
+# Column lists and profiles of the inputs, keyed by (sha256 of each input, options),
+# so widget reruns on the configure step reuse them instead of re-reading the files.
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _cached(kind, sources, respect_filters, digests, compute):
+    key = (kind, tuple(digests if digests is not None else (content_hash(s) for s in sources)), respect_filters)
+    with _cache_lock:
+        if key in _cache:
+            return _cache[key]
+    value = compute()
+    with _cache_lock:
+        if len(_cache) > 16:
+            _cache.clear()
+        _cache[key] = value
+    return value
+
+
+def input_columns(sources, respect_filters=True, digests=None):
+    """
+    Sorted union of the header names of every sheet (for column pickers). Only the
+    header rows are read. `digests` (content_hash of each source) skips re-hashing
+    when the caller has them.
+    """
+    def compute():
+        cols = set()
+        for source in sources:
+            if _is_csv(source):
+                if hasattr(source, "seek"):
+                    source.seek(0)
+                cols.update(str(c) for c in pd.read_csv(source, nrows=0).columns)
+            else:
+                for headers in sheet_headers(source, respect_filters).values():
+                    cols.update(headers)
+        return sorted(cols)
+    return _cached("columns", sources, respect_filters, digests, compute)
+
+
+def profile_inputs(sources, respect_filters=True, sample_rows=CHUNK_ROWS, digests=None):
+    """
+    Column profile (column_profile.summarize) over the first `sample_rows` rows of
+    every input. Reading stops after that chunk, so huge inputs are never scanned in full.
+    """
+    def compute():
+        profiles = {}
+        for source in sources:
+            for _, chunk in iter_chunks(source, respect_filters, chunk_rows=sample_rows):
+                profile_frames([chunk], profiles, skip=(ROW_IDX_COL,))
+                break
+        return summarize(profiles)
+    return _cached(("profile", sample_rows), sources, respect_filters, digests, compute)
+
+
+def _chunk_keys(chunk, key_cols):
+    # Key columns missing from a sheet count as empty (as in the in-memory mode)
+    frame = pd.DataFrame({c: chunk[c] if c in chunk.columns else None for c in key_cols}, index=chunk.index)
+    return key_hashes(frame, key_cols)
+
+
+def dedup_out_of_core(sources, key_cols, respect_filters=True, workdir=None, chunk_rows=CHUNK_ROWS, on_progress=None,
+                      profile=False):
+    """
+    Splits every row of `sources` (.csv / .xlsx paths or uploads) into uniques and
+    duplicates (2nd+ occurrence of a normalized key; rows with no key stay unique).
+    on_progress(stage, rows_done) is called after each chunk.
+    Returns a dict with "zip_path" (Uniques / Duplicates CSV per sheet; duplicates
+    carry a "Duplicate Of" column), "rows", "duplicates", "uniques", "seconds"
+    and "workdir" (delete it with cleanup() when done). profile=True adds "profile",
+    the column profile of every row, built from the pass-1 chunks as they are read.
+    """
+    t0 = time.perf_counter()
+    workdir = workdir or tempfile.mkdtemp(prefix="dedup_")
+    n_parts = 1 << PARTITION_BITS
+    shift = np.uint64(64 - PARTITION_BITS)
+    spills = [open(os.path.join(workdir, f"part-{p:03d}.bin"), "wb") for p in range(n_parts)]
+
+    # Row pointers: one (source, sheet, first seq) entry per sheet, original row number per row
+    blocks = []          # [(source_idx, sheet_name, start_seq)]
+    row_numbers = []     # uint32 arrays, concatenated after pass 1
+    widths = []          # per source: {sheet: column count} so pass 2 re-reads identical columns
+    seq = 0
+    profiles = {} if profile else None
+    try:
+        # PASS 1: hash keys, spill (hash, seq) by partition
+        for s_idx, source in enumerate(sources):
+            widths.append({})
+            for sheet, chunk in iter_chunks(source, respect_filters, chunk_rows):
+                if not blocks or blocks[-1][:2] != (s_idx, sheet):
+                    blocks.append((s_idx, sheet, seq))
+                widths[-1][sheet] = max(widths[-1].get(sheet, 0), chunk.shape[1] - 1)
+                hashes, has_key = _chunk_keys(chunk, key_cols)
+                records = np.empty(int(has_key.sum()), dtype=_RECORD)
+                records["hash"] = hashes[has_key]
+                records["seq"] = seq + np.flatnonzero(has_key)
+                part = (records["hash"] >> shift).astype(np.int64)
+                order = np.argsort(part, kind="stable")
+                records, part = records[order], part[order]
+                bounds = np.searchsorted(part, np.arange(n_parts + 1))
+                for p in np.flatnonzero(np.diff(bounds)):
+                    spills[p].write(records[bounds[p]:bounds[p + 1]].tobytes())
+                if profiles is not None:
+                    profile_frames([chunk], profiles, skip=(ROW_IDX_COL,))
+                row_numbers.append(chunk[ROW_IDX_COL].to_numpy(dtype=np.uint32))
+                seq += len(chunk)
+                if on_progress:
+                    on_progress("Hashing", seq)
+    finally:
+        for f in spills:
+            f.close()
+
+    total = seq
+    rows = np.concatenate(row_numbers) if row_numbers else np.empty(0, dtype=np.uint32)
+    del row_numbers
+    block_starts = np.array([b[2] for b in blocks], dtype=np.int64)
+
+    # RESOLVE: per partition, sort by (hash, seq); later occurrences point at the first
+    dup_of = np.lib.format.open_memmap(os.path.join(workdir, "dup_of.npy"), mode="w+", dtype=np.int64, shape=(total,))
+    dup_of[:] = -1
+    for p in range(n_parts):
+        part_path = os.path.join(workdir, f"part-{p:03d}.bin")
+        records = np.fromfile(part_path, dtype=_RECORD)
+        os.remove(part_path)
+        if len(records) < 2:
+            continue
+        records = records[np.lexsort((records["seq"], records["hash"]))]
+        h = records["hash"]
+        group_start = np.concatenate([[True], h[1:] != h[:-1]])
+        first_seq = records["seq"][np.flatnonzero(group_start)[np.cumsum(group_start) - 1]]
+        later = ~group_start
+        dup_of[records["seq"][later].astype(np.int64)] = first_seq[later].astype(np.int64)
+    dup_of.flush()
+
+    def locate(seqs):
+        """'file / sheet (Row n)' for global row seqs."""
+        b = np.searchsorted(block_starts, seqs, side="right") - 1
+        out = []
+        for blk, s in zip(b.tolist(), seqs.tolist()):
+            s_idx, sheet, _ = blocks[blk]
+            out.append(f"{_source_name(sources[s_idx])} / {sheet} (Row {int(rows[s])})")
+        return out
+
+    # PASS 2: stream rows into per-sheet CSVs
+    out_dir = os.path.join(workdir, "out")
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}  # file name -> rows
+    seq = 0
+    n_dups = 0
+    for s_idx, source in enumerate(sources):
+        stem = os.path.splitext(_source_name(source))[0]
+        for sheet, chunk in iter_chunks(source, respect_filters, chunk_rows, widths[s_idx]):
+            of = np.asarray(dup_of[seq:seq + len(chunk)])
+            is_dup = of >= 0
+            data = chunk.drop(columns=ROW_IDX_COL)
+            prefix = stem if _is_csv(source) else f"{stem}_{sheet}"
+            parts = [(f"{prefix}_Uniques.csv", data[~is_dup])]
+            if is_dup.any():
+                dups = data[is_dup].copy()
+                dups["Duplicate Of"] = locate(of[is_dup])
+                parts.append((f"{prefix}_Duplicates.csv", dups))
+                n_dups += int(is_dup.sum())
+            for fname, frame in parts:
+                if frame.empty and fname in written:
+                    continue
+                frame.to_csv(os.path.join(out_dir, fname), mode="a", index=False, header=fname not in written)
+                written[fname] = written.get(fname, 0) + len(frame)
+            seq += len(chunk)
+            if on_progress:
+                on_progress("Writing", seq)
+    del dup_of
+
+    zip_path = os.path.join(workdir, "deduplicated.zip")
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for fname in written:
+            zf.write(os.path.join(out_dir, fname), fname)
+            os.remove(os.path.join(out_dir, fname))
+
+    result = {"zip_path": zip_path, "workdir": workdir, "rows": total, "duplicates": n_dups,
+              "uniques": total - n_dups, "files": written, "seconds": round(time.perf_counter() - t0, 2)}
+    if profiles is not None:
+        result["profile"] = summarize(profiles)
+    return result
+
+
+def cleanup(result):
+    shutil.rmtree(result["workdir"], ignore_errors=True)
@@ -0,0 +1,157 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from components.dedup_engine import hash_keys, normalize_series
+
+# --- CONFIG ---
+HLL_BITS = 14          # 16384 registers: ~0.8% standard error on distinct counts
+TOP_K = 5              # top values reported per column
+TOP_TRACK = 200        # candidate values kept between chunks
+TYPE_SAMPLE = 500      # non-null values sampled for type detection
+TYPE_SHARE = 0.8       # share of the sample a type needs to win
+
+# Per-column profiles built from parsed chunks. Every statistic is mergeable, so
+# a sheet can be profiled in one call or chunk by chunk as a streaming reader
+# produces it:
+#   nulls / count   exact (empty or noise after key normalization)
+#   distinct        HyperLogLog over the normalized values' uint64 key hashes
+#   top values      exact per chunk, merged into a bounded candidate table
+#   type            phone / email / url / number / date / text from a value sample
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[a-z]{2,}\W*$", re.I)
+_URL_RE = re.compile(r"^(https?://|www\.)\S+$", re.I)
+_PHONE_RE = re.compile(r"^(?=(?:\D*\d){7,15}\D*$)[\d\s()+.\-/]+$")
+_M = 1 << HLL_BITS
+_ALPHA = 0.7213 / (1 + 1.079 / _M)
+
+
+def _bit_length(x):
+    """Exact bit length of uint64 values (float64 is exact on 32-bit halves)."""
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])
+
+
+def hll_add(registers, hashes):
+    """Folds uint64 hashes into an HLL register array (in place)."""
+    if not len(hashes):
+        return registers
+    idx = (hashes >> np.uint64(64 - HLL_BITS)).astype(np.int64)
+    rest = hashes & np.uint64((1 << (64 - HLL_BITS)) - 1)
+    rank = ((64 - HLL_BITS) - _bit_length(rest) + 1).astype(np.uint8)
+    np.maximum.at(registers, idx, rank)
+    return registers
+
+
+def hll_count(registers):
+    est = _ALPHA * _M * _M / np.sum(np.power(2.0, -registers.astype(np.float64)))
+    zeros = int((registers == 0).sum())
+    if est <= 2.5 * _M and zeros:
+        est = _M * np.log(_M / zeros)  # linear counting for small cardinalities
+    return int(round(est))
+
+
+def _detect_type(sample):
+    if not len(sample):
+        return "empty"
+    if pd.api.types.is_bool_dtype(sample) or pd.api.types.is_datetime64_any_dtype(sample):
+        return "date" if pd.api.types.is_datetime64_any_dtype(sample) else "text"
+    text = sample.astype(str).str.strip()
+    if pd.api.types.is_numeric_dtype(sample):
+        digits = text.str.replace(r"\.0$", "", regex=True).str.len()
+        return "phone" if ((digits >= 7) & (digits <= 13)).mean() >= TYPE_SHARE else "number"
+    for name, rx in (("email", _EMAIL_RE), ("url", _URL_RE), ("phone", _PHONE_RE)):
+        if text.str.match(rx).mean() >= TYPE_SHARE:
+            return name
+    if sample.map(lambda v: hasattr(v, "year")).mean() >= TYPE_SHARE:
+        return "date"
+    if pd.to_numeric(text, errors="coerce").notna().mean() >= TYPE_SHARE:
+        return "number"
+    return "text"
+
+
+def new_profile():
+    return {"count": 0, "nulls": 0, "hll": np.zeros(_M, dtype=np.uint8), "top": {}, "sample": []}
+
+
+def update_profile(profile, series):
+    """Adds one chunk of a column to its profile."""
+    # Distinct counts are over the normalized key (what deduplicating on this column would see)
+    norm = normalize_series(series)
+    blank = norm.isna().to_numpy()
+    values = series[~blank]
+    profile["count"] += len(series)
+    profile["nulls"] += int(blank.sum())
+    if len(values):
+        hll_add(profile["hll"], hash_keys(pd.DataFrame({0: norm[~blank]})))
+        for v, n in values.astype(str).str.strip().value_counts().head(TOP_TRACK).items():
+            profile["top"][v] = profile["top"].get(v, 0) + int(n)
+        if len(profile["top"]) > TOP_TRACK:
+            profile["top"] = dict(sorted(profile["top"].items(), key=lambda kv: -kv[1])[:TOP_TRACK])
+        if len(profile["sample"]) < TYPE_SAMPLE:
+            step = max(1, len(values) // TYPE_SAMPLE)
+            profile["sample"].extend(values.iloc[::step].iloc[:TYPE_SAMPLE - len(profile["sample"])].tolist())
+    return profile
+
+
+def merge_profiles(a, b):
+    out = new_profile()
+    out["count"] = a["count"] + b["count"]
+    out["nulls"] = a["nulls"] + b["nulls"]
+    out["hll"] = np.maximum(a["hll"], b["hll"])
+    for top in (a["top"], b["top"]):
+        for v, n in top.items():
+            out["top"][v] = out["top"].get(v, 0) + n
+    out["top"] = dict(sorted(out["top"].items(), key=lambda kv: -kv[1])[:TOP_TRACK])
+    out["sample"] = (a["sample"] + b["sample"])[:TYPE_SAMPLE]
+    return out
+
+
+def profile_frames(frames, profiles=None, skip=()):
+    """Updates {column: profile} with every DataFrame in `frames` (sheets or chunks)."""
+    profiles = {} if profiles is None else profiles
+    for df in frames:
+        for col in df.columns:
+            if col in skip:
+                continue
+            update_profile(profiles.setdefault(str(col), new_profile()), df[col])
+    return profiles
+
+
+def summarize(profiles):
+    """One row per column: type, fill rate, estimated distinct values, uniqueness, top values, key score."""
+    rows = []
+    for col, p in profiles.items():
+        filled = p["count"] - p["nulls"]
+        distinct = min(hll_count(p["hll"]), filled) if filled else 0
+        col_type = _detect_type(pd.Series(p["sample"], dtype=object).infer_objects())
+        uniqueness = distinct / filled if filled else 0.0
+        fill_rate = filled / p["count"] if p["count"] else 0.0
+        # Good duplicate keys identify a row (mostly unique) and are usually present
+        score = uniqueness * fill_rate * (1.5 if col_type in ("email", "phone") else 1.0)
+        if col_type in ("empty", "number", "date") or str(col).startswith("Unnamed"):
+            score *= 0.3
+        top = sorted(p["top"].items(), key=lambda kv: -kv[1])[:TOP_K]
+        rows.append({
+            "Column": col,
+            "Type": col_type,
+            "Filled %": round(100 * fill_rate, 1),
+            "Distinct (≈)": distinct,
+            "Unique %": round(100 * min(uniqueness, 1.0), 1),
+            "Top Values": ", ".join(f"{v} ({n})" for v, n in top),
+            "Key Score": round(score, 2),
+        })
+    return pd.DataFrame(rows).sort_values("Key Score", ascending=False, ignore_index=True) if rows else pd.DataFrame()
+
+
+def recommend_keys(summary, max_keys=2, min_score=0.5):
+    """Columns worth deduplicating on: contact columns first, then other near-unique ones."""
+    if summary.empty:
+        return []
+    good = summary[summary["Key Score"] >= min_score]
+    contact = good[good["Type"].isin(["email", "phone"])]
+    picks = contact if not contact.empty else good
+    return picks["Column"].head(max_keys).tolist()
+
@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import requests
+
+from components.dedup_engine import hash_keys, normalize_series
+from components.fuzzy_dedup import phone_digits
+
+# --- CONFIG ---
+BACKEND_BASE = os.getenv("BACKEND_URL", "http://localhost:3000")
+CRM_INDEX_DIR = "crm_key_index"
+PAGE_SIZE = 50_000  # lead keys per /leads/keys request
+KEY_FIELDS = {"phone": "phone", "email": "email", "name": "businessName"}
+
+# Hashed index of CRM lead keys for "is this row already in the CRM?" checks:
+#   crm_key_index/meta.json               last_lead_id, dirty_ids, generation, counts
+#   crm_key_index/<field>-keys-<gen>.npy  sorted uint64 hashes of the normalized key
+#   crm_key_index/<field>-ids-<gen>.npy   lead id for each hash
+# Only the key columns are ever fetched (GET /leads/keys). New leads are picked up
+# past last_lead_id, like the analytics rollups; edits and deletes made from the
+# dashboard mark the lead dirty and the next refresh re-reads just those ids.
+
+_lock = threading.Lock()
+
+
+def _empty_meta():
+    return {"last_lead_id": 0, "dirty_ids": [], "generation": 0, "counts": {}, "leads": 0}
+
+
+def load_meta():
+    try:
+        with open(os.path.join(CRM_INDEX_DIR, "meta.json"), "r") as f:
+            meta = json.load(f)
+        base = _empty_meta()
+        base.update(meta)
+        return base
+    except Exception:
+        return _empty_meta()
+
+
+def _save_meta(meta):
+    os.makedirs(CRM_INDEX_DIR, exist_ok=True)
+    tmp_path = os.path.join(CRM_INDEX_DIR, "meta.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(CRM_INDEX_DIR, "meta.json"))
+
+
+def key_hashes_for(field, values):
+    """(hashes, has_key) for one key field; phones keep their last 10 digits, others use the dedup normalization."""
+    values = pd.Series(list(values), dtype=object)
+    if field == "phone":
+        norm = values.map(phone_digits).replace("", None)
+    else:
+        norm = normalize_series(values)
+    return hash_keys(pd.DataFrame({0: norm})), norm.notna().to_numpy()
+
+
+def _arrays(meta, field):
+    gen = meta["generation"]
+    if not gen:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint32)
+    keys = np.load(os.path.join(CRM_INDEX_DIR, f"{field}-keys-{gen}.npy"), mmap_mode="r")
+    ids = np.load(os.path.join(CRM_INDEX_DIR, f"{field}-ids-{gen}.npy"), mmap_mode="r")
+    return keys, ids
+
+
+def _fetch_keys(params):
+    r = requests.get(f"{BACKEND_BASE}/leads/keys", params=params, timeout=30)
+    r.raise_for_status()
+    return r.json()
+
+
+def _fetch_new(after_id):
+    rows = []
+    while True:
+        page = _fetch_keys({"afterId": after_id, "limit": PAGE_SIZE})
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        after_id = page[-1]["id"]
+
+
+def mark_lead_dirty(lead_id):
+    """Call after a lead's phone/email/name changed or it was deleted."""
+    if not os.path.exists(os.path.join(CRM_INDEX_DIR, "meta.json")):
+        return  # not built yet: the first refresh reads every lead anyway
+    try:
+        with _lock:
+            meta = load_meta()
+            if int(lead_id) not in meta["dirty_ids"]:
+                meta["dirty_ids"].append(int(lead_id))
+                _save_meta(meta)
+    except Exception as e:
+        print(f"CRM index update failed: {e}")
+
+
+def refresh_index(rebuild=False):
+    """
+    Brings the index up to date: fetches keys of leads past last_lead_id and
+    re-reads dirty ids. rebuild=True starts from an empty index.
+    Returns (meta, fetched_rows). Raises requests exceptions when the backend is down.
+    """
+    with _lock:
+        meta = _empty_meta() if rebuild else load_meta()
+        # Dirty leads past last_lead_id are re-read with the new rows anyway
+        dirty = sorted(d for d in set(meta["dirty_ids"]) if d <= meta["last_lead_id"])
+        new_rows = _fetch_new(meta["last_lead_id"])
+        changed_rows = _fetch_keys({"ids": ",".join(map(str, dirty))}) if dirty else []
+        if not new_rows and not dirty and meta["generation"]:
+            if meta["dirty_ids"]:
+                meta["dirty_ids"] = []
+                _save_meta(meta)
+            return meta, 0
+
+        frame = pd.DataFrame(new_rows + changed_rows, columns=["id", "businessName", "phone", "email"])
+        frame["id"] = pd.to_numeric(frame["id"], errors="coerce").fillna(0).astype(np.int64)
+        gen = meta["generation"] + 1
+        counts = {}
+        for field, col in KEY_FIELDS.items():
+            keys, ids = _arrays(meta, field)
+            # Drop stale entries of edited / deleted leads; their current keys are in changed_rows
+            if dirty and len(ids):
+                keep = ~np.isin(ids, np.array(dirty, dtype=np.uint32))
+                keys, ids = keys[keep], ids[keep]
+            hashes, has_key = key_hashes_for(field, frame[col])
+            keys = np.concatenate([np.asarray(keys), hashes[has_key]])
+            ids = np.concatenate([np.asarray(ids), frame["id"].to_numpy()[has_key].astype(np.uint32)])
+            order = np.argsort(keys, kind="stable")
+            os.makedirs(CRM_INDEX_DIR, exist_ok=True)
+            np.save(os.path.join(CRM_INDEX_DIR, f"{field}-keys-{gen}.npy"), keys[order])
+            np.save(os.path.join(CRM_INDEX_DIR, f"{field}-ids-{gen}.npy"), ids[order])
+            counts[field] = int(len(keys))
+
+        old_gen = meta["generation"]
+        if new_rows:
+            meta["last_lead_id"] = max(meta["last_lead_id"], int(max(r["id"] for r in new_rows)))
+        meta.update(generation=gen, counts=counts, dirty_ids=[],
+                    leads=meta.get("leads", 0) + len(new_rows) - (len(dirty) - len(changed_rows)),
+                    updated_at=datetime.now().isoformat(timespec="seconds"))
+        _save_meta(meta)
+        for field in KEY_FIELDS:
+            for part in ("keys", "ids"):
+                try:
+                    os.remove(os.path.join(CRM_INDEX_DIR, f"{field}-{part}-{old_gen}.npy"))
+                except OSError:
+                    pass  # first generation, or still mapped by a reader (Windows)
+        return meta, len(new_rows) + len(changed_rows)
+
+
+def match_against_crm(df, columns):
+    """
+    columns: {"phone" | "email" | "name": column of df}. A row is in the CRM when
+    any mapped key matches an indexed lead. Returns (in_crm mask, matched_on, lead_id)
+    where matched_on lists the fields that hit ("phone+email") and lead_id is the
+    first matching lead (None elsewhere).
+    """
+    meta = load_meta()
+    n = len(df)
+    in_crm = np.zeros(n, dtype=bool)
+    lead_id = np.full(n, None, dtype=object)
+    matched_on = pd.Series([""] * n, dtype=object)
+    for field, col in columns.items():
+        if col not in df.columns:
+            continue
+        keys, ids = _arrays(meta, field)
+        hashes, has_key = key_hashes_for(field, df[col])
+        if not len(keys):
+            continue
+        pos = np.minimum(np.searchsorted(keys, hashes), len(keys) - 1)
+        found = has_key & (keys[pos] == hashes)
+        fill = found & ~in_crm
+        lead_id[fill] = np.asarray(ids)[pos[fill]].astype(int)
+        in_crm |= found
+        matched_on[found] = (matched_on[found] + "+" + field).str.lstrip("+")
+    return in_crm, matched_on.where(in_crm, None).to_numpy(), lead_id
@@ -0,0 +1,326 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+import requests
+
+# --- CONFIG ---
+BACKEND_BASE = os.getenv("BACKEND_URL", "http://localhost:3000")
+CRM_DATA_DIR = "crm_data"
+STATS_FILE = "crm_stats.json"
+STATS_VERSION = 2
+BACKEND_OWNER = "crm"  # leads living in the backend pipeline (CRM Grid / Power Dialer)
+
+# Materialized per-owner counters:
+#   {"version": 2,
+#    "owners": {"crm": {"statuses": {"meeting set": 4, ...},
+#                       "priorities": {"hot": 3, ...},
+#                       "by_status": {"meeting set": {"hot": 1, ...}, ...},
+#                       "days": {"2026-02-12": {"meeting set": 2, ...}}},
+#               "alice": {..., "files": {"leads.json": [mtime_ns, size]}}}}
+# "statuses"/"priorities"/"by_status" are the current snapshot (one entry per
+# lead), "days" counts leads entering each status on that day. Headline metrics
+# are derived from the snapshot, so reading them never touches lead rows.
+# The backend owner is kept in sync by update/create/delete_lead (2xx responses
+# only). Inserts made server-side (/lead-gen, /leads/bulk) are caught by
+# sync_if_drifted(): when the lead count or newest id ("max_id") of rows a page
+# already fetched disagrees with the store, the owner is re-counted once. crm_data folders
+# are re-counted whenever one of their files changes (mtime/size in "files").
+# Counters are never clamped at zero: a negative count is drift and shows up in
+# rebuild_stats().
+
+_lock = threading.Lock()
+
+
+def status_key(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip().lower()
+
+
+def _empty_owner():
+    return {"statuses": {}, "priorities": {}, "by_status": {}, "days": {}}
+
+
+def load_stats():
+    if not os.path.exists(STATS_FILE):
+        return {"owners": {}}
+    try:
+        with open(STATS_FILE, "r") as f:
+            data = json.load(f)
+        data.setdefault("owners", {})
+        return data
+    except Exception:
+        return {"owners": {}}
+
+
+def save_stats(stats):
+    stats["version"] = STATS_VERSION
+    stats["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    tmp_path = f"{STATS_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f, indent=2)
+    os.replace(tmp_path, STATS_FILE)
+
+
+def _bump(counter, key, delta):
+    counter[key] = counter.get(key, 0) + delta
+    if counter[key] == 0:
+        del counter[key]
+
+
+def _apply_change(owner_stats, before, after, day):
+    """`before`/`after` are (status, priority) of one lead, None when it did not / no longer exists."""
+    for lead, delta in ((before, -1), (after, 1)):
+        if lead is None:
+            continue
+        status, prio = status_key(lead[0]), status_key(lead[1])
+        _bump(owner_stats["statuses"], status, delta)
+        _bump(owner_stats["priorities"], prio, delta)
+        by_status = owner_stats.setdefault("by_status", {})
+        _bump(by_status.setdefault(status, {}), prio, delta)
+        if not by_status[status]:
+            del by_status[status]
+    if after is not None and (before is None or status_key(before[0]) != status_key(after[0])):
+        _bump(owner_stats["days"].setdefault(day, {}), status_key(after[0]), 1)
+
+
+def _record(owner, before, after, lead_id=None):
+    day = datetime.now().date().isoformat()
+    try:
+        with _lock:
+            stats = load_stats()
+            if stats.get("version") != STATS_VERSION:
+                # Not materialized yet: the first read rebuilds from rows that already include this change
+                return
+            owner_stats = stats["owners"].setdefault(owner, _empty_owner())
+            _apply_change(owner_stats, before, after, day)
+            if lead_id is not None and owner_stats.get("max_id") is not None:
+                owner_stats["max_id"] = max(owner_stats["max_id"], lead_id)
+            save_stats(stats)
+    except Exception as e:
+        # Stats are derived data; a failed write must never block the CRM edit itself
+        print(f"CRM stats update failed: {e}")
+
+
+def record_lead_created(lead, owner=BACKEND_OWNER, lead_id=None):
+    """Counts a new lead (backend defaults: status Generated, priority WARM); lead_id is the id the backend assigned."""
+    _record(owner, None, (lead.get("status") or "Generated", lead.get("priority") or "WARM"), lead_id)
+
+
+def record_lead_updated(previous, updates, owner=BACKEND_OWNER):
+    """Moves one lead between status/priority buckets. No-op when neither field changed."""
+    before = (previous.get("status"), previous.get("priority"))
+    after = (updates.get("status", before[0]), updates.get("priority", before[1]))
+    if [status_key(v) for v in before] == [status_key(v) for v in after]:
+        return
+    _record(owner, before, after)
+
+
+def record_lead_deleted(previous, owner=BACKEND_OWNER):
+    _record(owner, (previous.get("status"), previous.get("priority")), None)
+
+
+def metrics_from_counts(counts):
+    """Headline numbers from one owner's (or a merged) counters (O(distinct statuses))."""
+    statuses = counts.get("statuses", {})
+    leads = sum(statuses.values())
+    generated = statuses.get("generated", 0)
+    return {
+        "leads": leads,
+        "generated": generated,
+        "pipeline": leads - generated,
+        "calls": sum(n for s, n in statuses.items() if s not in ("", "new")),
+        "meetings": sum(n for s, n in statuses.items() if "meeting" in s),
+        "deals": sum(n for s, n in statuses.items() if "closed" in s),
+        "won": sum(n for s, n in statuses.items() if "won" in s),
+        # Hot opportunities are pipeline leads: fresh Generated ones don't count
+        "hot": sum(p.get("hot", 0) for s, p in counts.get("by_status", {}).items() if s != "generated"),
+    }
+
+
+def headline_metrics(owners=None, exclude=(), stats=None):
+    """
+    Aggregated metrics for the given owners (default: all but `exclude`).
+    Builds the store from raw rows the first time it is read and re-counts
+    crm_data folders whose files changed since.
+    """
+    if stats is None:
+        stats = load_stats()
+        if stats.get("version") != STATS_VERSION:
+            stats = rebuild_stats()[0]
+        else:
+            stats = refresh_folders(stats)
+    merged = _empty_owner()
+    for owner, owner_stats in stats["owners"].items():
+        if (owners is not None and owner not in owners) or owner in exclude:
+            continue
+        for field in ("statuses", "priorities"):
+            for k, n in owner_stats.get(field, {}).items():
+                merged[field][k] = merged[field].get(k, 0) + n
+        for s, prios in owner_stats.get("by_status", {}).items():
+            for p, n in prios.items():
+                merged["by_status"].setdefault(s, {})[p] = merged["by_status"].get(s, {}).get(p, 0) + n
+    return metrics_from_counts(merged)
+
+
+# --- REBUILD ---
+def _count_frame(df):
+    owner_stats = _empty_owner()
+    status_col = "status" if "status" in df.columns else ("Status" if "Status" in df.columns else None)
+    prio_col = "priority" if "priority" in df.columns else ("Priority" if "Priority" in df.columns else None)
+    blank = pd.Series([""] * len(df), index=df.index, dtype=object)
+    statuses = df[status_col].map(status_key) if status_col else blank
+    prios = df[prio_col].map(status_key) if prio_col else blank
+    owner_stats["statuses"] = {k: int(v) for k, v in statuses.value_counts().items()}
+    owner_stats["priorities"] = {k: int(v) for k, v in prios.value_counts().items()}
+    for (s, p), n in pd.DataFrame({"s": statuses, "p": prios}).value_counts().items():
+        owner_stats["by_status"].setdefault(s, {})[p] = int(n)
+    return owner_stats
+
+
+def _snapshot(owner_stats):
+    return {k: owner_stats.get(k, {}) for k in ("statuses", "priorities", "by_status")}
+
+
+def _folder_files(root, names):
+    """{file name: [mtime_ns, size]} for the JSON lead files directly in `root`."""
+    files = {}
+    for f in sorted(names):
+        if f.endswith(".json"):
+            try:
+                st = os.stat(os.path.join(root, f))
+                files[f] = [st.st_mtime_ns, st.st_size]
+            except OSError:
+                pass
+    return files
+
+
+def _count_folder(root, files):
+    frames = []
+    for f in files:
+        try:
+            frames.append(pd.read_json(os.path.join(root, f)))
+        except Exception:
+            pass
+    owner_stats = _count_frame(pd.concat(frames, ignore_index=True)) if frames else _empty_owner()
+    owner_stats["files"] = files
+    return owner_stats
+
+
+def _folders():
+    """{owner: (folder path, file signature)} for every crm_data folder holding JSON files."""
+    found = {}
+    if os.path.exists(CRM_DATA_DIR):
+        for root, dirs, files in os.walk(CRM_DATA_DIR):
+            signature = _folder_files(root, files)
+            if signature:
+                found[os.path.relpath(root, CRM_DATA_DIR).replace(os.sep, "/")] = (root, signature)
+    return found
+
+
+def refresh_folders(stats):
+    """Re-counts crm_data folders whose files were added, removed or modified (one stat per file when nothing changed)."""
+    folders = _folders()
+    stale = [o for o, (_, sig) in folders.items() if stats["owners"].get(o, {}).get("files") != sig]
+    gone = [o for o in stats["owners"] if o != BACKEND_OWNER and o not in folders]
+    if not stale and not gone:
+        return stats
+    counted = {o: _count_folder(*folders[o]) for o in stale}
+    with _lock:
+        stats = load_stats()
+        for owner in gone:
+            stats["owners"].pop(owner, None)
+        for owner, owner_stats in counted.items():
+            owner_stats["days"] = stats["owners"].get(owner, {}).get("days", {})
+            stats["owners"][owner] = owner_stats
+        save_stats(stats)
+    return stats
+
+
+def _max_id(leads):
+    ids = [lead.get("id") for lead in leads if isinstance(lead.get("id"), (int, float))]
+    return max(ids) if ids else None
+
+
+def sync_owner(leads, owner=BACKEND_OWNER):
+    """
+    Replaces `owner`'s snapshot with a count of `leads` (rows the caller already
+    fetched) when they disagree. Returns the (possibly updated) store.
+    """
+    fresh = _count_frame(pd.DataFrame(leads))
+    fresh["max_id"] = _max_id(leads)
+    with _lock:
+        stats = load_stats()
+        if stats.get("version") != STATS_VERSION:
+            stats = {"owners": {}}
+        current = stats["owners"].get(owner, _empty_owner())
+        if _snapshot(current) != _snapshot(fresh) or current.get("max_id") != fresh["max_id"]:
+            fresh["days"] = current.get("days", {})
+            stats["owners"][owner] = fresh
+            save_stats(stats)
+    return stats
+
+
+def sync_if_drifted(leads, owner=BACKEND_OWNER):
+    """
+    The stored counters, re-counted from `leads` only when their count or newest id
+    disagree with the store (e.g. server-side inserts or deletes). Otherwise a plain
+    read: no lead rows are counted and nothing is written.
+    """
+    stats = load_stats()
+    if stats.get("version") == STATS_VERSION:
+        owner_stats = stats["owners"].get(owner)
+        if (owner_stats is not None and sum(owner_stats.get("statuses", {}).values()) == len(leads)
+                and owner_stats.get("max_id") == _max_id(leads)):
+            return stats
+    return sync_owner(leads, owner)
+
+
+def _scan_sources():
+    """Recomputes every owner's snapshot from raw rows (backend leads + crm_data folders)."""
+    owners = {}
+    backend_ok = False
+    try:
+        r = requests.get(f"{BACKEND_BASE}/leads", timeout=10)
+        if r.status_code == 200:
+            leads = r.json()
+            owners[BACKEND_OWNER] = _count_frame(pd.DataFrame(leads))
+            owners[BACKEND_OWNER]["max_id"] = _max_id(leads)
+            backend_ok = True
+    except Exception:
+        pass
+
+    for owner, (root, files) in _folders().items():
+        owners[owner] = _count_folder(root, files)
+    return owners, backend_ok
+
+
+def rebuild_stats():
+    """
+    Recomputes the snapshot counters from scratch and compares them with the
+    incrementally maintained ones. Per-day transition counts cannot be derived
+    from current rows, so they are carried over from the existing store.
+    Returns (stats, drift) where drift maps owner -> {field: (incremental, rebuilt)}.
+    """
+    with _lock:
+        old = load_stats()
+        fresh, backend_ok = _scan_sources()
+        if not backend_ok and BACKEND_OWNER in old["owners"]:
+            # Backend unreachable: keep its incremental counters rather than zeroing them
+            fresh[BACKEND_OWNER] = dict(old["owners"][BACKEND_OWNER])
+        drift = {}
+        for owner in sorted(set(old["owners"]) | set(fresh)):
+            before = old["owners"].get(owner, _empty_owner())
+            after = fresh.get(owner, _empty_owner())
+            m_before = metrics_from_counts(before)
+            m_after = metrics_from_counts(after)
+            diff = {k: (m_before[k], m_after[k]) for k in m_after if m_before[k] != m_after[k]}
+            if diff:
+                drift[owner] = diff
+            after["days"] = before.get("days", {})
+        stats = {"owners": fresh}
+        save_stats(stats)
+    return stats, drift
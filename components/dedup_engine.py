@@ -0,0 +1,179 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow ships with streamlit; plain-pandas fallback otherwise
+    pa = pc = None
+
+# Key building for the Spreadsheet Tool's duplicate detection.
+# Keys are normalized the same way everywhere: trimmed, lower-cased, punctuation
+# stripped, and noise tokens ("", none, nan, null) treated as missing.
+
+NOISE_TOKENS = ["", "none", "nan", "null"]
+_STRIP_PATTERN = r"[^a-zA-Z0-9\s]"
+_STRIP_RE = re.compile(_STRIP_PATTERN)
+
+# Python's str.strip()/\s whitespace set, spelled out so Arrow (RE2) matches it exactly
+_WHITESPACE = "".join(chr(c) for c in range(0x3001) if chr(c).isspace())
+_ARROW_STRIP = "[^a-zA-Z0-9" + _WHITESPACE + "]"
+# Only non-ASCII characters whose lower() survives the strip: 'İ' -> 'i̇' -> 'i', Kelvin 'K' -> 'k'
+_ARROW_FOLD = {"\u0130": "i", "\u212a": "k"}
+# Byte lookup for ASCII-only strings: keep [a-zA-Z0-9] and ASCII whitespace
+_KEEP_BYTE = np.array([chr(b).isascii() and (chr(b).isalnum() or chr(b).isspace()) for b in range(256)])
+
+
+def _normalize_str(s):
+    s = s.strip().lower()
+    if s in NOISE_TOKENS:
+        return None
+    s = _STRIP_RE.sub("", s)
+    return s if s.strip() != "" else None
+
+
+def normalize_text(text):
+    """Strict normalization: lower, trim, remove special chars. Returns None for noise."""
+    if pd.isna(text):
+        return None
+    return _normalize_str(str(text))
+
+
+def _strip_ascii(arr):
+    """Drops every byte outside _KEEP_BYTE straight from the UTF-8 buffer (exact for ASCII rows)."""
+    offsets = np.frombuffer(arr.buffers()[1], dtype=np.int64)[arr.offset:arr.offset + len(arr) + 1]
+    data = np.frombuffer(arr.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]]
+    keep = _KEEP_BYTE[data]
+    dropped = np.flatnonzero(~keep)
+    if not len(dropped):
+        return arr
+    # Removed bytes are sparse: shift each offset by the number dropped before it
+    rel = offsets - offsets[0]
+    new_offsets = rel - np.searchsorted(dropped, rel)
+    return pa.LargeStringArray.from_buffers(len(arr), pa.py_buffer(new_offsets), pa.py_buffer(data[keep].tobytes()))
+
+
+def _normalize_arrow(text):
+    arr = pa.array(text, type=pa.large_string())
+    trimmed = pc.utf8_trim(arr, characters=_WHITESPACE)
+    # Noise tokens are ASCII, so ASCII lowering is enough to detect them
+    noise = pc.is_in(pc.ascii_lower(trimmed), value_set=pa.array(NOISE_TOKENS, type=pa.large_string()))
+
+    # Strip-then-lower equals lower-then-strip for ASCII; the regex path handles the rest
+    stripped = pc.ascii_lower(_strip_ascii(trimmed))
+    blank = pc.equal(pc.utf8_trim(stripped, characters=_WHITESPACE), "").to_numpy(zero_copy_only=False)
+    out = stripped.to_numpy(zero_copy_only=False)
+    non_ascii = np.flatnonzero(~pc.string_is_ascii(trimmed).to_numpy(zero_copy_only=False))
+    if len(non_ascii):
+        rest = trimmed.take(pa.array(non_ascii))
+        for src, dst in _ARROW_FOLD.items():
+            rest = pc.replace_substring(rest, src, dst)
+        rest = pc.ascii_lower(pc.replace_substring_regex(rest, _ARROW_STRIP, ""))
+        out[non_ascii] = rest.to_numpy(zero_copy_only=False)
+        blank[non_ascii] = pc.equal(pc.utf8_trim(rest, characters=_WHITESPACE), "").to_numpy(zero_copy_only=False)
+    return out, noise.to_numpy(zero_copy_only=False) | blank
+
+
+def _normalize_factorized(text):
+    codes, uniques = pd.factorize(text)
+    norm_uniques = np.array([_normalize_str(u) for u in uniques], dtype=object)
+    out = norm_uniques[codes]
+    return out, pd.isna(out)
+
+
+def normalize_series(values):
+    """
+    Column-at-a-time normalize_text producing identical keys (object dtype, None
+    for missing). Cells are stringified in one C-level pass, then trimmed,
+    lower-cased and stripped with Arrow compute kernels. Without pyarrow the
+    per-value work runs once per distinct value instead of once per cell.
+    """
+    s = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if s.empty:
+        return pd.Series([], index=s.index, dtype=object, name=s.name)
+    missing = s.isna().to_numpy(copy=True)
+    if pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty"):
+        text = s.to_numpy(dtype=object, na_value="")
+    else:
+        # Cast through object so numbers/timestamps stringify exactly like str(x)
+        text = s.astype(object).where(~missing, "").astype(str).to_numpy(dtype=object)
+    if pc is not None:
+        out, noise = _normalize_arrow(text)
+    else:
+        out, noise = _normalize_factorized(text)
+    out[missing | noise] = None
+    return pd.Series(out, index=s.index, dtype=object, name=s.name)
+
+
+# --- HASHED KEYS ---
+# Composite keys are reduced to one uint64 per row (pandas' vectorized SipHash over
+# the normalized columns, combined in column order). 64 bits keep the collision
+# odds around 1 in 10^7 even for a billion-row pair, and a 2M-row baseline is a
+# 16 MB array instead of millions of Python tuples.
+def hash_keys(norm_frame):
+    """uint64 per row over already-normalized key columns (column order matters, names do not)."""
+    if norm_frame.shape[1] == 0:
+        return np.zeros(len(norm_frame), dtype=np.uint64)
+    return pd.util.hash_pandas_object(norm_frame, index=False, categorize=False).to_numpy()
+
+
+def normalize_keys(df, cols):
+    """Normalized key columns of df in `cols` order; columns df lacks are all empty."""
+    return pd.DataFrame({i: normalize_series(df[c]) if c in df.columns else None for i, c in enumerate(cols)}, index=df.index)
+
+
+def key_hashes(df, cols, norm=None):
+    """
+    Normalizes `cols` of df and hashes them (pass `norm` from normalize_keys to skip
+    the normalization). Returns (hashes, has_key) where has_key is False for rows
+    whose key columns are all empty.
+    """
+    if norm is None:
+        norm = normalize_keys(df, cols)
+    return hash_keys(norm), norm.notna().any(axis=1).to_numpy()
+
+
+def duplicate_masks(hashes):
+    """
+    Returns (codes, any_dup, later_dup): group code per row, rows whose key occurs
+    more than once (keep=False), and every occurrence after the first (keep='first').
+    """
+    codes, _ = pd.factorize(hashes)
+    any_dup = np.bincount(codes)[codes] > 1
+    later_dup = any_dup.copy()
+    later_dup[np.unique(codes, return_index=True)[1]] = False
+    return codes, any_dup, later_dup
+
+
+def join_by_group(codes, labels, mask):
+    """", ".join of labels per group code for rows in mask (row order kept); None elsewhere."""
+    out = np.full(len(codes), None, dtype=object)
+    idx = np.flatnonzero(mask)
+    if not len(idx):
+        return out
+    labels = np.asarray(labels, dtype=object)
+    order = idx[np.argsort(codes[idx], kind="stable")]
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    joined = {codes[chunk[0]]: ", ".join(labels[chunk]) for chunk in np.split(order, bounds)}
+    out[idx] = [joined[c] for c in codes[idx]]
+    return out
+
+
+def build_baseline(hash_arrays):
+    """Sorted unique uint64 keys from one or more hash arrays."""
+    arrays = [np.asarray(h, dtype=np.uint64) for h in hash_arrays]
+    if not arrays:
+        return np.empty(0, dtype=np.uint64)
+    return np.unique(np.concatenate(arrays))
+
+
+def in_baseline(hashes, baseline):
+    """Membership of each hash in a sorted unique baseline (binary search, no Python sets)."""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    if not len(baseline):
+        return np.zeros(len(hashes), dtype=bool)
+    pos = np.searchsorted(baseline, hashes)
+    np.minimum(pos, len(baseline) - 1, out=pos)
+    return baseline[pos] == hashes
@@ -0,0 +1,199 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIG ---
+FUZZY_THRESHOLD = 0.8   # minimum pair confidence to link two rows
+MAX_BLOCK_SIZE = 200    # blocks larger than this are too generic to compare pairwise
+PHONE_SUFFIX = 7        # trailing digits used as the phone block key
+PHONE_WEIGHT = 0.8      # how much an identical phone alone is worth
+
+NAME_STOPWORDS = {"dr", "the", "and", "of", "a", "pvt", "ltd", "llp", "inc", "co"}
+
+# Fuzzy duplicate clusters in near-linear time:
+#   1. Blocking: rows only meet rows that share a phone suffix or any name token
+#      at most max_block rows carry; tokens above that ("dental", "clinic" in a
+#      sheet of clinics) are too generic to block on, so candidate pairs grow
+#      with N rather than N^2.
+#   2. Scoring: IDF-weighted token overlap for names (containment blended with
+#      Jaccard, so "Shah Dental Clinic" matches "Dr. Shah Dental Clinic & Implant
+#      Centre"), exact match on the last 10 digits for phones, combined as
+#      1 - (1 - name) * (1 - PHONE_WEIGHT * phone).
+#      An identical phone is its own rule: those pairs link at any threshold, so
+#      raising the slider only tightens name matching (a phone-only pair scores
+#      exactly PHONE_WEIGHT and would otherwise vanish above it).
+#   3. Clustering: union-find over pairs above the threshold or sharing a phone.
+
+
+def name_tokens(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+    words = re.findall(r"[a-z0-9]+", str(value).lower().replace("&", " "))
+    return [w for w in words if len(w) > 1 and w not in NAME_STOPWORDS]
+
+
+def phone_digits(value):
+    """Last 10 digits of a phone number (drops country codes / trunk zeros), '' if too short."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    s = str(value)
+    if s.endswith(".0"):
+        s = s[:-2]  # numeric cells read as floats
+    digits = re.sub(r"\D", "", s)
+    return digits[-10:] if len(digits) >= PHONE_SUFFIX else ""
+
+
+def _candidate_pairs(block_rows, block_keys, n_rows, max_block):
+    """Unique (i, j) pairs, i < j, of rows sharing a block key, skipping oversized blocks."""
+    if not len(block_rows):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    codes, _ = pd.factorize(block_keys)
+    order = np.argsort(codes, kind="stable")
+    rows, codes = block_rows[order], codes[order]
+    starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+    sizes = np.diff(np.concatenate([starts, [len(codes)]]))
+    left, right = [], []
+    # Blocks of equal size form a (blocks x size) matrix: all their pairs in one step
+    for size in np.unique(sizes[(sizes >= 2) & (sizes <= max_block)]):
+        block_starts = starts[sizes == size]
+        members = rows[block_starts[:, None] + np.arange(size)]
+        ii, jj = np.triu_indices(size, 1)
+        a, b = members[:, ii].ravel(), members[:, jj].ravel()
+        left.append(np.minimum(a, b))
+        right.append(np.maximum(a, b))
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pair_code = np.unique(np.concatenate(left).astype(np.int64) * n_rows + np.concatenate(right))
+    pair_code = pair_code[pair_code // n_rows != pair_code % n_rows]
+    return pair_code // n_rows, pair_code % n_rows
+
+
+def _name_similarity(left, right, indptr, tok, w, row_weight, n_tokens):
+    """Vectorized IDF-weighted overlap for every pair: CSR explode of the left rows, probe the right rows."""
+    sim = np.full(len(left), np.nan)
+    lens = np.diff(indptr)
+    has = (lens[left] > 0) & (lens[right] > 0)
+    if not has.any():
+        return sim
+    pair_idx = np.flatnonzero(has)
+    counts = lens[left[pair_idx]]
+    owner = np.repeat(pair_idx, counts)
+    # Position of each exploded token within its left row's CSR slice
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    pos = np.repeat(indptr[left[pair_idx]], counts) + offsets
+    entry_codes = np.repeat(np.arange(len(lens)), lens).astype(np.int64) * n_tokens + tok
+    probe = right[owner].astype(np.int64) * n_tokens + tok[pos]
+    hit = np.searchsorted(entry_codes, probe)
+    hit = entry_codes[np.minimum(hit, len(entry_codes) - 1)] == probe
+    common = np.bincount(owner, weights=w[pos] * hit, minlength=len(left))[pair_idx]
+    wa, wb = row_weight[left[pair_idx]], row_weight[right[pair_idx]]
+    ok = (wa > 0) & (wb > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        containment = common / np.minimum(wa, wb)
+        jaccard = common / (wa + wb - common)
+    sim[pair_idx[ok]] = (0.7 * containment + 0.3 * jaccard)[ok]
+    return sim
+
+
+def _phone_similarity(left, right, number, length):
+    """1.0 when the shorter number is a suffix of the longer one, 0.0 otherwise, NaN when either is missing."""
+    sim = np.full(len(left), np.nan)
+    both = (length[left] > 0) & (length[right] > 0)
+    m = np.minimum(length[left], length[right])[both]
+    mod = np.power(10, m, dtype=np.int64)
+    sim[both] = (number[left][both] % mod == number[right][both] % mod).astype(float)
+    return sim
+
+
+def fuzzy_clusters(names=None, phones=None, threshold=FUZZY_THRESHOLD, max_block=MAX_BLOCK_SIZE):
+    """
+    names / phones: row-aligned sequences (either may be None).
+    Returns a DataFrame with one row per input row:
+      cluster     cluster id (-1 for rows with no match)
+      size        rows in the cluster (1 for singletons)
+      confidence  best pair score linking the row into its cluster
+      matched_on  "name", "phone" or "name+phone" for that best pair
+      is_primary  True for the first row of each cluster and for singletons
+    """
+    n = len(names) if names is not None else len(phones)
+    tokens = [sorted(set(name_tokens(v))) for v in names] if names is not None else [[] for _ in range(n)]
+    digits = [phone_digits(v) for v in phones] if phones is not None else [""] * n
+
+    # Token vocabulary + IDF over the sheet: common words ("dental", "clinic") weigh little
+    lens = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=n)
+    flat = [t for toks in tokens for t in toks]
+    tok, vocab = pd.factorize(pd.Series(flat, dtype=object)) if flat else (np.empty(0, dtype=np.int64), [])
+    tok = tok.astype(np.int64)
+    doc_freq = np.bincount(tok, minlength=len(vocab))
+    idf = np.log((n + 1) / np.maximum(doc_freq, 1))
+    indptr = np.concatenate([[0], np.cumsum(lens)])
+    # Sort tokens inside each row by id so (row, token) codes are globally sorted
+    row_of = np.repeat(np.arange(n), lens)
+    order = np.lexsort((tok, row_of))
+    tok = tok[order]
+    w = idf[tok]
+    row_weight = np.bincount(row_of, weights=w, minlength=n)
+
+    number = np.array([int(d) if d else 0 for d in digits], dtype=np.int64)
+    length = np.fromiter((len(d) for d in digits), dtype=np.int64, count=n)
+
+    # 1. Blocking keys: every name token within the size cap + phone suffix.
+    # (Blocking on only a row's rarest tokens misses pairs whose shared words are
+    # not the rarest on either side, e.g. "Shah Dental Clinic" vs "Shah Dental
+    # Clinic & Implant Centre".)
+    eligible = doc_freq[tok] <= max_block
+    name_rows, name_toks = row_of[eligible], tok[eligible]
+    phone_rows = np.flatnonzero(length > 0)
+    block_rows = np.concatenate([name_rows, phone_rows])
+    # Phone blocks live in their own key range, above every token id
+    block_keys = np.concatenate([name_toks, len(vocab) + number[phone_rows] % 10 ** PHONE_SUFFIX])
+    left, right = _candidate_pairs(block_rows, block_keys, n, max_block)
+
+    # 2. Score candidate pairs
+    name_sim = _name_similarity(left, right, indptr, tok, w, row_weight, max(len(vocab), 1))
+    phone_sim = _phone_similarity(left, right, number, length)
+    score = 1 - (1 - np.nan_to_num(name_sim)) * (1 - PHONE_WEIGHT * np.nan_to_num(phone_sim))
+    phone_match = np.nan_to_num(phone_sim) > 0
+    keep = ((score >= threshold) | phone_match) & ~(np.isnan(name_sim) & np.isnan(phone_sim))
+    left, right, score = left[keep], right[keep], score[keep]
+    phone_hit = phone_match[keep]
+    name_hit = np.nan_to_num(name_sim[keep]) >= threshold / 2
+    basis = np.where(phone_hit & name_hit, "name+phone", np.where(phone_hit, "phone", "name")).astype(object)
+
+    best_score = np.zeros(n)
+    np.maximum.at(best_score, left, score)
+    np.maximum.at(best_score, right, score)
+    best_basis = np.full(n, None, dtype=object)
+    # Basis of each row's best pair (ascending sort: the last write wins)
+    by_score = np.argsort(score, kind="stable")
+    best_basis[left[by_score]] = basis[by_score]
+    best_basis[right[by_score]] = basis[by_score]
+
+    # 3. Union-find over accepted pairs (root = lowest row index = primary)
+    parent = np.arange(n)
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in zip(left.tolist(), right.tolist()):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    roots = np.array([find(i) for i in range(n)], dtype=np.int64)
+    sizes = np.bincount(roots, minlength=n)[roots]
+    linked = sizes > 1
+    cluster = np.full(n, -1, dtype=np.int64)
+    if linked.any():
+        cluster[linked] = pd.factorize(roots[linked])[0]
+    return pd.DataFrame({
+        "cluster": cluster,
+        "size": sizes,
+        "confidence": np.round(best_score, 3),
+        "matched_on": best_basis,
+        "is_primary": roots == np.arange(n),
+    })
@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import requests
+
+# --- CONFIG ---
+BACKEND_BASE = os.getenv("BACKEND_URL", "http://localhost:3000")
+ROLLUP_FILE = "lead_rollups.json"
+REFRESH_INTERVAL_S = 60
+
+# A rollup is a small JSON table keyed by day:
+#   {"days": {"2026-02-12": {"crm_leads": 3, "scraped_leads": 40}},
+#    "last_lead_id": 34, "last_execution_id": 12}
+# Leads and executions only ever get appended (ids are autoincrement), so each
+# refresh asks the backend for rows past the stored ids and buckets just those.
+# Deleting a lead later does not "un-generate" it, so buckets are never decremented.
+# The Analytics page renders on every interaction, so the backend is polled at most
+# once per REFRESH_INTERVAL_S; in between, the last rollup is reused as long as the
+# file still holds the same last ids (a --rebuild or another process resets it).
+
+_lock = threading.Lock()
+_last_refresh = {"at": 0.0, "ids": None, "rollups": None}
+
+
+def _stored_ids(rollups):
+    return rollups["last_lead_id"], rollups["last_execution_id"]
+
+
+def _empty_rollups():
+    return {"days": {}, "last_lead_id": 0, "last_execution_id": 0}
+
+
+def load_rollups():
+    if not os.path.exists(ROLLUP_FILE):
+        return _empty_rollups()
+    try:
+        with open(ROLLUP_FILE, "r") as f:
+            data = json.load(f)
+        base = _empty_rollups()
+        base.update(data)
+        return base
+    except Exception:
+        return _empty_rollups()
+
+
+def save_rollups(rollups):
+    # Write-then-rename so a concurrent reader never sees a half-written file
+    tmp_path = f"{ROLLUP_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(rollups, f, indent=2)
+    os.replace(tmp_path, ROLLUP_FILE)
+
+
+def _fetch_after(endpoint, after_id):
+    try:
+        r = requests.get(f"{BACKEND_BASE}/{endpoint}", params={"afterId": after_id}, timeout=5)
+        if r.status_code == 200:
+            return r.json()
+    except Exception:
+        pass
+    return None
+
+
+def _bump_days(rollups, dates, values, field):
+    """Add per-row values into the day buckets for one rollup field."""
+    df = pd.DataFrame({"day": list(dates), "value": values}).dropna(subset=["day"])
+    if df.empty:
+        return
+    per_day = df.groupby("day")["value"].sum()
+    for day, value in per_day.items():
+        bucket = rollups["days"].setdefault(day.isoformat(), {"crm_leads": 0, "scraped_leads": 0})
+        bucket[field] = int(bucket.get(field, 0) + value)
+
+
+def apply_leads(rollups, leads):
+    """Fold newly created CRM leads (by createdAt) into the rollup."""
+    df = pd.DataFrame(leads)
+    if df.empty or "id" not in df.columns or "createdAt" not in df.columns:
+        return rollups
+    df = df[pd.to_numeric(df["id"], errors="coerce") > rollups["last_lead_id"]]
+    if df.empty:
+        return rollups
+    created = pd.to_datetime(df["createdAt"], errors="coerce", utc=True).dt.date
+    _bump_days(rollups, created, 1, "crm_leads")
+    rollups["last_lead_id"] = int(pd.to_numeric(df["id"], errors="coerce").max())
+    return rollups
+
+
+def apply_executions(rollups, executions):
+    """Fold newly logged scrape runs (by execution date) into the rollup."""
+    df = pd.DataFrame(executions)
+    if df.empty or "id" not in df.columns or "date" not in df.columns:
+        return rollups
+    df = df[pd.to_numeric(df["id"], errors="coerce") > rollups["last_execution_id"]]
+    if df.empty:
+        return rollups
+    run_day = pd.to_datetime(df["date"], errors="coerce", utc=True).dt.date
+    generated = pd.to_numeric(df.get("leadsGenerated", 0), errors="coerce").fillna(0).astype(int)
+    _bump_days(rollups, run_day, generated.values, "scraped_leads")
+    rollups["last_execution_id"] = int(pd.to_numeric(df["id"], errors="coerce").max())
+    return rollups
+
+
+def _pull_new(rollups):
+    new_leads = _fetch_after("leads", rollups["last_lead_id"])
+    new_execs = _fetch_after("executions", rollups["last_execution_id"])
+
+    changed = False
+    if new_leads:
+        apply_leads(rollups, new_leads)
+        changed = True
+    if new_execs:
+        apply_executions(rollups, new_execs)
+        changed = True
+    if changed:
+        try:
+            save_rollups(rollups)
+        except Exception as e:
+            print(f"Rollup save failed: {e}")
+    return rollups
+
+
+def refresh_rollups(max_age=REFRESH_INTERVAL_S):
+    """
+    Pull only new leads/executions from the backend and persist the updated rollup.
+    Within max_age seconds of the previous pull the cached rollup is returned without
+    any request; max_age=0 always asks the backend.
+    """
+    with _lock:
+        rollups = load_rollups()
+        cached = _last_refresh["rollups"]
+        if (cached is not None and _last_refresh["ids"] == _stored_ids(rollups)
+                and time.monotonic() - _last_refresh["at"] < max_age):
+            return cached
+        rollups = _pull_new(rollups)
+        _last_refresh.update(at=time.monotonic(), ids=_stored_ids(rollups), rollups=rollups)
+        return rollups
+
+
+def rebuild_rollups():
+    """Discard the stored rollup and rebuild it from the full lead/execution history."""
+    rollups = apply_executions(apply_leads(_empty_rollups(), _fetch_after("leads", 0) or []),
+                               _fetch_after("executions", 0) or [])
+    with _lock:
+        save_rollups(rollups)
+        _last_refresh.update(at=time.monotonic(), ids=_stored_ids(rollups), rollups=rollups)
+    return rollups
+
+
+def trend_series(rollups, days=15, today=None):
+    """
+    Returns (dates, current, previous) for the Lead Generation Trend chart.
+    `previous` is the same window shifted back by `days`, aligned day-by-day.
+    """
+    today = today or datetime.now().date()
+    dates = [today - timedelta(days=x) for x in range(days - 1, -1, -1)]
+
+    def total(day):
+        b = rollups["days"].get(day.isoformat())
+        if not b:
+            return 0
+        return b.get("crm_leads", 0) + b.get("scraped_leads", 0)
+
+    current = [total(d) for d in dates]
+    previous = [total(d - timedelta(days=days)) for d in dates]
+    return dates, current, previous
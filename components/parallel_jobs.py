@@ -0,0 +1,162 @@
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from components.dedup_engine import build_baseline, in_baseline, key_hashes, normalize_keys
+from components.workbook_reader import ROW_IDX_COL, cache_workbook, cached_workbook, content_hash, read_workbook
+
+# --- CONFIG ---
+POOL_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # leave one core for the Streamlit server
+
+# Multi-File tab work fanned out one file per worker process. Workers use the
+# "spawn" start method: forking the threaded Streamlit server is not safe, and
+# spawn behaves the same on Linux, macOS and Windows. Only file bytes, key columns
+# and small result arrays cross the process boundary; the baseline is shared as
+# a .npy file that every worker memory-maps.
+# Hash and clean workers also time their steps; on_stage(stage, seconds) gets each
+# file's "normalize" / "key" / "compare" / "write" seconds (worker time, not wall time).
+
+
+def _pool(jobs):
+    return ProcessPoolExecutor(max_workers=min(POOL_WORKERS, jobs), mp_context=multiprocessing.get_context("spawn"))
+
+
+def _run(fn, jobs, on_progress=None):
+    """
+    Runs fn(*args) for every job; in-process when there is a single job or a single core.
+    Results come back in job order (never matched up by file name: two uploads may share
+    one). on_progress(done, total, name) gets each job's first argument as its name.
+    """
+    results = [None] * len(jobs)
+    if len(jobs) <= 1 or POOL_WORKERS == 1:
+        for i, args in enumerate(jobs):
+            results[i] = fn(*args)
+            if on_progress:
+                on_progress(i + 1, len(jobs), args[0])
+        return results
+    with _pool(len(jobs)) as pool:
+        futures = {pool.submit(fn, *args): i for i, args in enumerate(jobs)}
+        for done, fut in enumerate(as_completed(futures), 1):
+            i = futures[fut]
+            results[i] = fut.result()
+            if on_progress:
+                on_progress(done, len(jobs), jobs[i][0])
+    return results
+
+
+# --- WORKERS (module level so they pickle) ---
+def _parse_worker(name, data, respect_filters, keep_row_numbers):
+    return read_workbook(io.BytesIO(data), respect_filters, keep_row_numbers)
+
+
+def _keys_timed(df, match_cols, timings):
+    t0 = time.perf_counter()
+    norm = normalize_keys(df, match_cols)
+    t1 = time.perf_counter()
+    out = key_hashes(df, match_cols, norm)
+    timings["normalize"] = timings.get("normalize", 0.0) + t1 - t0
+    timings["key"] = timings.get("key", 0.0) + time.perf_counter() - t1
+    return out
+
+
+def _hash_worker(name, key_frames, match_cols):
+    parts, count, timings = [], 0, {}
+    for df in key_frames.values():
+        hashes, has_key = _keys_timed(df, match_cols, timings)
+        parts.append(hashes[has_key])
+        count += int(has_key.sum())
+    t0 = time.perf_counter()
+    keys = build_baseline(parts)
+    timings["key"] = timings.get("key", 0.0) + time.perf_counter() - t0
+    return keys, count, timings
+
+
+def _clean_worker(name, data, key_frames, match_cols, baseline_path):
+    from components.workbook_cleaner import remove_rows
+
+    baseline = np.load(baseline_path, mmap_mode="r")
+    rows_by_sheet, timings = {}, {"compare": 0.0}
+    for s_name, df in key_frames.items():
+        hashes, has_key = _keys_timed(df, match_cols, timings)
+        t0 = time.perf_counter()
+        dup = has_key & in_baseline(hashes, baseline)
+        if dup.any():
+            rows_by_sheet[s_name] = (df.loc[dup, ROW_IDX_COL].tolist(), hashes[dup])
+        timings["compare"] += time.perf_counter() - t0
+    t0 = time.perf_counter()
+    cleaned = remove_rows(data, {s: rows for s, (rows, _) in rows_by_sheet.items()})
+    timings["write"] = time.perf_counter() - t0
+    return cleaned, rows_by_sheet, timings
+
+
+def _report_stages(on_stage, timings):
+    if on_stage:
+        for stage, seconds in timings.items():
+            on_stage(stage, seconds)
+
+
+# --- PUBLIC ---
+def parse_workbooks(files, respect_filters=True, keep_row_numbers=False, on_progress=None):
+    """
+    Parsed sheets of every upload, as a list in upload order. Cached parses are
+    reused; the rest are parsed in parallel and added to the shared workbook cache
+    under their own content hash.
+    """
+    out = [None] * len(files)
+    pending, jobs = [], []  # (position, digest) of each job
+    for i, f in enumerate(files):
+        digest = content_hash(f)
+        hit = cached_workbook(digest, respect_filters, keep_row_numbers)
+        if hit is not None:
+            out[i] = hit[0]
+        else:
+            pending.append((i, digest))
+            jobs.append((f.name, f.getvalue(), respect_filters, keep_row_numbers))
+    for (i, digest), (sheets, hidden) in zip(pending, _run(_parse_worker, jobs, on_progress)):
+        cache_workbook(digest, respect_filters, keep_row_numbers, sheets, hidden)
+        out[i] = sheets
+    return out
+
+
+def _key_frames(sheets, match_cols, keep_row_numbers=False):
+    cols = list(match_cols) + ([ROW_IDX_COL] if keep_row_numbers else [])
+    return {s: df[cols] for s, df in sheets.items() if all(c in df.columns for c in match_cols)}
+
+
+def hash_baseline_files(files, parsed, match_cols, on_progress=None, on_stage=None):
+    """Sorted unique baseline keys and key-row count across the uploads (parsed: parse_workbooks output)."""
+    jobs = [(f.name, _key_frames(sheets, match_cols), match_cols) for f, sheets in zip(files, parsed)]
+    results = _run(_hash_worker, jobs, on_progress)
+    for _, _, timings in results:
+        _report_stages(on_stage, timings)
+    return build_baseline([keys for keys, _, _ in results]), sum(count for _, count, _ in results)
+
+
+def clean_files(files, parsed, match_cols, baseline_keys, on_progress=None, baseline_path=None, on_stage=None):
+    """
+    Removes rows whose key is in the baseline from every upload, one file per worker.
+    parsed is parse_workbooks output for the same files (keep_row_numbers=True).
+    Returns [(cleaned_bytes, {sheet: (row_numbers, key_hashes)})] in upload order.
+    baseline_path may point at an existing .npy of baseline_keys (e.g. a saved index).
+    """
+    tmp_path = None
+    if baseline_path is None:
+        fd, tmp_path = tempfile.mkstemp(suffix=".npy")
+        os.close(fd)
+        np.save(tmp_path, np.asarray(baseline_keys, dtype=np.uint64))
+        baseline_path = tmp_path
+    try:
+        jobs = [(f.name, f.getvalue(), _key_frames(sheets, match_cols, keep_row_numbers=True),
+                 match_cols, baseline_path) for f, sheets in zip(files, parsed)]
+        results = _run(_clean_worker, jobs, on_progress)
+        for _, _, timings in results:
+            _report_stages(on_stage, timings)
+        return [(cleaned, rows_by_sheet) for cleaned, rows_by_sheet, _ in results]
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
@@ -0,0 +1,62 @@
+import json
+import mmap
+import os
+
+# The scraper writes `<csv>.manifest.json` (see dental_scraper/extensions.py) with
+# row count, columns, sha256, size and mtime. A manifest only counts as current
+# when size and mtime still match the CSV; otherwise we fall back to counting lines.
+
+SCRAPED_RESULTS_FILE = "scraped_results.csv"
+COUNT_CHUNK = 8 * 1024 * 1024
+
+
+def manifest_path(path):
+    return f"{path}.manifest.json"
+
+
+def read_manifest(path=SCRAPED_RESULTS_FILE):
+    """Returns the manifest dict if it describes the current file, else None."""
+    try:
+        with open(manifest_path(path), "r") as f:
+            manifest = json.load(f)
+        st = os.stat(path)
+        if manifest.get("size") == st.st_size and manifest.get("mtime_ns") == st.st_mtime_ns:
+            return manifest
+    except Exception:
+        pass
+    return None
+
+
+def count_csv_rows(path):
+    """Data rows via a memory-mapped newline count (header excluded, no CSV parsing)."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    newlines = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start in range(0, size, COUNT_CHUNK):
+            newlines += mm[start:start + COUNT_CHUNK].count(b"\n")
+        if mm[size - 1:size] != b"\n":
+            newlines += 1  # last line without trailing newline
+    return max(newlines - 1, 0)
+
+
+def scraped_row_count(path=SCRAPED_RESULTS_FILE):
+    if not os.path.exists(path):
+        return 0
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return int(manifest.get("rows", 0))
+    try:
+        return count_csv_rows(path)
+    except Exception:
+        return 0
+
+
+def content_key(path=SCRAPED_RESULTS_FILE):
+    """Cheap cache key for the CSV: manifest hash when available, else size + mtime."""
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return manifest["sha256"]
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
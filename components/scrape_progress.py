@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+
+import pandas as pd
+
+# --- CONFIG ---
+PROGRESS_FILE = "scraper_progress.jsonl"
+LIVE_RESULTS_FILE = "scraped_results.jsonl"
+RECENT_ERRORS = 5  # error messages kept for the status card
+
+# Readers for the two append-only streams a running crawl writes:
+#   scraper_progress.jsonl  progress events (dental_scraper/progress.py)
+#   scraped_results.jsonl   one line per kept item (LiveResultsPipeline)
+# Each poll reads only the bytes appended since the previous one (offset kept per
+# path) and folds them into cached state, so a refresh costs one stat and a small
+# read however long the crawl runs.
+
+_tails = {}  # path -> {"offset", "inode", "state"}
+_lock = threading.Lock()
+
+
+def _empty_state():
+    return {"stage": "Starting...", "query": "", "done": 0, "total": 0, "rate": 0.0,
+            "eta_s": None, "errors": 0, "recent_errors": [], "ts": None, "events": 0}
+
+
+def reset(path=PROGRESS_FILE):
+    """Forget the tail position (call when a new crawl starts)."""
+    with _lock:
+        _tails.pop(path, None)
+
+
+def _tail(path, new_state):
+    """(tail, new JSON events) since the last call; tail["state"] starts as new_state()."""
+    tail = _tails.setdefault(path, {"offset": 0, "inode": None, "state": new_state()})
+    try:
+        st = os.stat(path)
+    except OSError:
+        return tail, []
+    # Rewritten by a new crawl: start over
+    if st.st_ino != tail["inode"] or st.st_size < tail["offset"]:
+        tail.update(offset=0, inode=st.st_ino, state=new_state())
+    if st.st_size <= tail["offset"]:
+        return tail, []
+    with open(path, "rb") as f:
+        f.seek(tail["offset"])
+        chunk = f.read(st.st_size - tail["offset"])
+    # A line may be mid-write: keep the partial last line for the next poll
+    complete = chunk[:chunk.rfind(b"\n") + 1]
+    tail["offset"] += len(complete)
+    events = []
+    for line in complete.splitlines():
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return tail, events
+
+
+def read_progress(path=PROGRESS_FILE):
+    """Latest progress state: stage, query, done, total, rate (items/s), eta_s, errors, recent_errors."""
+    with _lock:
+        tail, events = _tail(path, _empty_state)
+        state = tail["state"]
+        for event in events:
+            if event.get("message") and event.get("errors", 0) > state["errors"]:
+                state["recent_errors"] = (state["recent_errors"] + [event["message"]])[-RECENT_ERRORS:]
+            state.update({k: event[k] for k in ("stage", "query", "done", "total", "rate", "eta_s", "errors", "ts") if k in event})
+            state["events"] += 1
+        return dict(state)
+
+
+def read_live_results(path=LIVE_RESULTS_FILE):
+    """Every item scraped so far as a DataFrame (object columns, values as scraped, in scrape order)."""
+    with _lock:
+        tail, events = _tail(path, list)
+        tail["state"].extend(events)
+        rows = list(tail["state"])
+    return pd.DataFrame(rows, dtype=object)
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "—"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
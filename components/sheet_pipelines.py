@@ -0,0 +1,118 @@
+import time
+
+import pandas as pd
+
+from components.dedup_engine import build_baseline, duplicate_masks, hash_keys, in_baseline, join_by_group, key_hashes, normalize_keys
+from components.fuzzy_dedup import FUZZY_THRESHOLD, fuzzy_clusters
+
+# Spreadsheet Tool pipelines for the Single File and 1-vs-1 tabs, kept free of
+# Streamlit so app.py and bench_spreadsheet.py run exactly the same code. Each
+# takes parsed sheets ({sheet: DataFrame}, as from load_workbook_cached) and
+# returns frames ready for write_workbook; rendering stays in the tab.
+# on_stage(stage, seconds), when given, is called after every step ("normalize",
+# "key", "dedup", "compare"); a stage that runs once per sheet reports each run.
+
+
+def _timed(on_stage, stage, fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    if on_stage:
+        on_stage(stage, time.perf_counter() - t0)
+    return out
+
+
+def split_duplicates(sheets, key_cols, fuzzy=False, name_col=None, phone_col=None, threshold=FUZZY_THRESHOLD, on_stage=None):
+    """
+    Tab 1: duplicates across every sheet of one workbook. The first row of each key
+    stays Unique; later ones go to "<sheet>_Dups" with duplicate_locations (every
+    "Sheet (Row n)" sharing the key). Rows with all key columns empty, or key columns
+    missing from their sheet, count as Unique. Fuzzy mode clusters on name_col /
+    phone_col instead and adds match_confidence and matched_on.
+    Returns (out_sheets, summary) where summary maps sheet -> {"dups", "uniques"}.
+    """
+    if not sheets:
+        return {}, {}
+    master = pd.concat([df.assign(_sheet=s, _idx=df.index) for s, df in sheets.items()], ignore_index=True)
+
+    dup_extra_cols = ["duplicate_locations"]
+    if fuzzy:
+        clusters = _timed(on_stage, "dedup", lambda: fuzzy_clusters(
+            master[name_col].tolist() if name_col in master.columns else None,
+            master[phone_col].tolist() if phone_col in master.columns else None,
+            threshold=threshold,
+        ))
+        key_codes = clusters["cluster"].to_numpy()
+        all_dups_mask = key_codes >= 0
+        is_dup = ~clusters["is_primary"].to_numpy()
+        master["match_confidence"] = clusters["confidence"].where(all_dups_mask).to_numpy()
+        master["matched_on"] = clusters["matched_on"].to_numpy()
+        dup_extra_cols += ["match_confidence", "matched_on"]
+    else:
+        # Composite keys hashed to uint64, grouped by factorize
+        norm = _timed(on_stage, "normalize", normalize_keys, master, key_cols)
+        hashes = _timed(on_stage, "key", hash_keys, norm)
+
+        def dedup():
+            codes, any_dup, later_dup = duplicate_masks(hashes)
+            empty_mask = norm.isna().all(axis=1).to_numpy()
+            # every instance (for location reporting), and 2nd+ instances only (for the split)
+            return codes, any_dup & ~empty_mask, later_dup & ~empty_mask
+        key_codes, all_dups_mask, is_dup = _timed(on_stage, "dedup", dedup)
+
+    t0 = time.perf_counter()
+    if all_dups_mask.any():
+        loc_labels = master["_sheet"] + " (Row " + (master["_idx"] + 2).astype(str) + ")"
+        master["duplicate_locations"] = join_by_group(key_codes, loc_labels.to_numpy(dtype=object), all_dups_mask)
+    else:
+        master["duplicate_locations"] = None
+    if on_stage:
+        on_stage("dedup", time.perf_counter() - t0)
+
+    out_sheets, summary = {}, {}
+    sheet_col = master["_sheet"].to_numpy()
+    for s_name, df in sheets.items():
+        in_sheet = sheet_col == s_name
+        orig_cols = list(df.columns)
+        dups = master.loc[in_sheet & is_dup, orig_cols + dup_extra_cols]
+        uniques = master.loc[in_sheet & ~is_dup, orig_cols]
+        summary[s_name] = {"dups": len(dups), "uniques": len(uniques)}
+        if not dups.empty:
+            out_sheets[f"{s_name[:20]}_Dups"] = dups
+        if not uniques.empty:
+            out_sheets[f"{s_name[:20]}_Uniques"] = uniques
+    return out_sheets, summary
+
+
+def _sheet_keys(df, key_cols, on_stage):
+    norm = _timed(on_stage, "normalize", normalize_keys, df, key_cols)
+    return _timed(on_stage, "key", key_hashes, df, key_cols, norm)
+
+
+def baseline_from_sheets(sheets, key_cols, on_stage=None):
+    """
+    Tab 2 baseline: sorted unique key hashes of every sheet holding all key columns.
+    Returns (baseline, rows) where rows counts rows with a non-empty key.
+    """
+    parts, rows = [], 0
+    for df in sheets.values():
+        if any(c not in df.columns for c in key_cols):
+            continue
+        hashes, has_key = _sheet_keys(df, key_cols, on_stage)
+        rows += int(has_key.sum())
+        parts.append(hashes[has_key])
+    return _timed(on_stage, "key", build_baseline, parts), rows
+
+
+def rows_not_in_baseline(sheets, key_cols, baseline, on_stage=None):
+    """
+    Tab 2: {sheet: rows whose key is not in `baseline`} for every sheet holding all
+    key columns ("Unnamed" columns dropped; rows with an empty key are skipped).
+    """
+    new_rows = {}
+    for s_name, df in sheets.items():
+        df = df.loc[:, ~df.columns.astype(str).str.contains("^Unnamed")]
+        if any(c not in df.columns for c in key_cols):
+            continue
+        hashes, has_key = _sheet_keys(df, key_cols, on_stage)
+        new_rows[s_name] = _timed(on_stage, "compare", lambda: df[has_key & ~in_baseline(hashes, baseline)])
+    return new_rows
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIG ---
+EVENTS_FILE = "status_events.jsonl"
+
+# Append-only log, one JSON object per line:
+#   {"ts": "2026-02-12T16:16:17", "lead_id": 34, "from": "Generated", "to": "Meeting set", "owner": "crm"}
+# "from" is null for lead creation. Lines are never rewritten, so the log doubles as
+# an audit trail and the funnel can be recomputed for any date window.
+
+# Ordered funnel stages; every status maps to the furthest stage it implies.
+FUNNEL_STAGES = ["Generated", "Contacted", "Interested", "Meeting Set", "Meeting Done", "Proposal Sent", "Won"]
+STATUS_STAGE = {
+    "generated": 0, "new": 0, "": 0,
+    "not picking": 1, "asked to call later": 1, "call later": 1, "follow-up scheduled": 1,
+    "not interested": 1, "closed - lost": 1,
+    "interested": 2, "qualified": 2,
+    "meeting set": 3,
+    "meeting done": 4,
+    "proposal sent": 5,
+    "closed - won": 6,
+}
+
+_lock = threading.Lock()
+
+
+def _status_norm(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip().lower().replace("–", "-")
+
+
+def log_status_event(lead_id, old_status, new_status, owner="crm", ts=None):
+    """Appends one transition. No-op when the status did not actually change."""
+    if old_status is not None and _status_norm(old_status) == _status_norm(new_status):
+        return
+    event = {
+        "ts": (ts or datetime.now()).isoformat(timespec="seconds"),
+        "lead_id": lead_id,
+        "from": None if old_status is None else str(old_status),
+        "to": str(new_status),
+        "owner": owner,
+    }
+    try:
+        with _lock, open(EVENTS_FILE, "a") as f:
+            f.write(json.dumps(event) + "\n")
+    except Exception as e:
+        print(f"Status event log failed: {e}")
+
+
+def load_status_events(path=EVENTS_FILE):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame(columns=["ts", "lead_id", "from", "to", "owner"])
+    events = pd.read_json(path, lines=True, dtype={"lead_id": str})
+    events["ts"] = pd.to_datetime(events["ts"], errors="coerce")
+    return events.dropna(subset=["ts"])
+
+
+def compute_funnel(events, start=None, end=None):
+    """
+    Stage reach, conversion and latency for the cohort of leads whose first
+    logged event falls in [start, end]; their progress is followed past `end`.
+
+    One vectorized pass: events are mapped to stage codes, reduced to a
+    (lead x stage) matrix of first-arrival times, and a reversed running minimum
+    turns that into "first time at or beyond stage k" for every lead at once.
+    Returns a DataFrame with one row per stage.
+    """
+    K = len(FUNNEL_STAGES)
+    empty = pd.DataFrame({
+        "Stage": FUNNEL_STAGES, "Leads": 0, "Conversion %": 0.0, "Drop-off %": 0.0,
+        "Median Days": np.nan, "P90 Days": np.nan,
+    })
+    if events.empty:
+        return empty
+
+    lead_key = events["lead_id"].astype(str)
+    entered = events["ts"].groupby(lead_key).transform("min")
+    in_cohort = pd.Series(True, index=events.index)
+    if start is not None:
+        in_cohort &= entered >= pd.Timestamp(start)
+    if end is not None:
+        in_cohort &= entered < pd.Timestamp(end) + pd.Timedelta(days=1)
+    ev = events[in_cohort]
+    if ev.empty:
+        return empty
+
+    # Unknown statuses still mean someone worked the lead
+    stage = ev["to"].map(_status_norm).map(STATUS_STAGE).fillna(1).astype(np.int64).to_numpy()
+    lead_codes, leads = pd.factorize(ev["lead_id"].astype(str))
+    ts_ns = ev["ts"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+    # First arrival per (lead, stage); unreached cells stay at +inf
+    first = np.full((len(leads), K), np.inf)
+    np.minimum.at(first, (lead_codes, stage), ts_ns.astype(np.float64))
+
+    # Reaching stage k implies passing every earlier stage
+    at_or_beyond = np.minimum.accumulate(first[:, ::-1], axis=1)[:, ::-1]
+    reached = np.isfinite(at_or_beyond)
+    counts = reached.sum(axis=0)
+
+    entry = at_or_beyond[:, 0]
+    with np.errstate(invalid="ignore"):
+        lag_days = (at_or_beyond - entry[:, None]) / (86400 * 1e9)
+    lag_days[~reached] = np.nan
+
+    prev = np.concatenate([[counts[0]], counts[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        conversion = np.where(prev > 0, counts / prev * 100, 0.0)
+    nxt = np.concatenate([counts[1:], [counts[-1]]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drop_off = np.where(counts > 0, (counts - nxt) / counts * 100, 0.0)
+    drop_off[-1] = 0.0
+
+    def pct(q):
+        out = np.full(K, np.nan)
+        has = reached.any(axis=0)
+        if has.any():
+            out[has] = np.nanpercentile(lag_days[:, has], q, axis=0)
+        return out
+
+    return pd.DataFrame({
+        "Stage": FUNNEL_STAGES,
+        "Leads": counts.astype(int),
+        "Conversion %": conversion.round(1),
+        "Drop-off %": drop_off.round(1),
+        "Median Days": pct(50).round(1),
+        "P90 Days": pct(90).round(1),
+    })
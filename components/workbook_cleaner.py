@@ -0,0 +1,282 @@
+import io
+import posixpath
+import re
+import shutil
+import zipfile
+from bisect import bisect_left, bisect_right
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.formula.translate import Translator
+
+from components.workbook_reader import sheet_xml_paths
+
+# --- CONFIG ---
+READ_BLOCK = 1 << 20  # bytes of sheet XML read per step
+
+# Row removal that patches the original .xlsx instead of round-tripping it through
+# openpyxl. Every part except the affected sheets (and their tables) is copied
+# byte for byte. Affected sheets are streamed: <row> elements are cut out of
+# <sheetData>, the remaining rows and their cell references are renumbered, and
+# range references (dimension, autoFilter, merged cells, conditional formatting,
+# data validation, tables, shared/array formula ranges and the sheet's defined
+# names in workbook.xml such as _xlnm._FilterDatabase and print areas) are
+# shrunk to match. Styles, filters, column widths and row attributes are never
+# touched. Like openpyxl's delete_rows, formula text is not rewritten, except
+# that a shared formula whose master row is deleted is expanded into plain
+# formulas on its surviving cells; calcChain.xml is dropped so Excel rebuilds it.
+
+_ROW_START = re.compile(rb"<row[\s>/]")
+_ROW_NUM = re.compile(rb'(<row\b[^>]*?\sr=")(\d+)(")')
+_CELL_REF = re.compile(rb'(<c\b[^>]*?\sr="[A-Z]+)(\d+)(")')
+_RANGE_ATTR = re.compile(rb'(<(?:dimension|autoFilter|table)\b[^>]*?\sref=")([^"]*)(")')
+_MERGE_CELL = re.compile(rb'<mergeCell\b[^>]*?\sref="([^"]*)"[^>]*/>')
+_SQREF_ATTR = re.compile(rb'(<(?:conditionalFormatting|dataValidation)\b[^>]*?\ssqref=")([^"]*)(")')
+_CELL = re.compile(rb'<c\b[^>]*?\sr="([A-Z]+\d+)"[^>]*?(?:/>|>.*?</c>)', re.S)
+_FORMULA = re.compile(rb"<f\b([^>]*?)(?:/>|>(.*?)</f>)", re.S)
+_F_ATTR = re.compile(rb'\s(t|ref|si)="([^"]*)"')
+_DEFINED_NAME = re.compile(rb"(<definedName\b[^>]*>)(.*?)(</definedName>)", re.S)
+_SHEET_REF = re.compile(r"(?:'((?:[^']|'')+)'|([\w.]+))!(\$?[A-Z]*\$?\d+(?::\$?[A-Z]*\$?\d+)?)")
+_A1 = re.compile(r"^(\$?[A-Z]*)(\$?)(\d+)$")  # column optional: print titles use $1:$1
+
+
+class _Shift:
+    """Maps old row numbers to new ones after deleting a sorted list of rows."""
+
+    def __init__(self, deleted):
+        self.deleted = sorted(set(int(r) for r in deleted))
+
+    def start(self, row):
+        # First surviving row at or after `row`
+        return row - bisect_left(self.deleted, row)
+
+    def end(self, row):
+        # Last surviving row at or before `row`
+        return row - bisect_right(self.deleted, row)
+
+    def is_deleted(self, row):
+        i = bisect_left(self.deleted, row)
+        return i < len(self.deleted) and self.deleted[i] == row
+
+    def range(self, ref):
+        """'A2:D100' -> shrunk range, or None when every row of it was deleted."""
+        parts = ref.split(":")
+        m1 = _A1.match(parts[0])
+        m2 = _A1.match(parts[-1])
+        if not (m1 and m2):
+            return ref  # whole-column ranges (A:A) and the like do not move
+        r1, r2 = self.start(int(m1.group(3))), self.end(int(m2.group(3)))
+        if len(parts) == 1:
+            return None if self.is_deleted(int(m1.group(3))) else f"{m1.group(1)}{m1.group(2)}{r1}"
+        if r2 < r1:
+            if int(m1.group(3)) == 1 or r1 == 1:
+                r2 = r1  # keep header-anchored ranges (filters, tables) at least one row tall
+            else:
+                return None
+        return f"{m1.group(1)}{m1.group(2)}{r1}:{m2.group(1)}{m2.group(2)}{r2}"
+
+
+def _fix_ranges(xml, shift):
+    def one(m):
+        new = shift.range(m.group(2).decode())
+        return m.group(1) + (new or m.group(2).decode()).encode() + m.group(3)
+
+    def many(m):
+        refs = [shift.range(r) for r in m.group(2).decode().split()]
+        refs = [r for r in refs if r]
+        return m.group(1) + " ".join(refs or [m.group(2).decode()]).encode() + m.group(3)
+
+    def merge(m):
+        new = shift.range(m.group(1).decode())
+        if new is None or ":" not in new:
+            return b""  # every row of the merge was deleted (or it shrank to one cell)
+        return m.group(0).replace(m.group(1), new.encode())
+
+    xml = _RANGE_ATTR.sub(one, xml)
+    xml = _SQREF_ATTR.sub(many, xml)
+    if b"<mergeCell" in xml:
+        xml = _MERGE_CELL.sub(merge, xml)
+        count = len(_MERGE_CELL.findall(xml))
+        if count:
+            xml = re.sub(rb'(<mergeCells\b[^>]*?\scount=")\d+(")', lambda m: m.group(1) + str(count).encode() + m.group(2), xml)
+        else:
+            xml = re.sub(rb"<mergeCells\b[^>]*>\s*</mergeCells>|<mergeCells\b[^>]*/>", b"", xml)
+    return xml
+
+
+def _shared_masters(row_xml, orphans):
+    """Records {si: (cell, formula)} for shared-formula masters in a row being deleted."""
+    for cell in _CELL.finditer(row_xml):
+        for f in _FORMULA.finditer(cell.group(0)):
+            attrs = dict(_F_ATTR.findall(f.group(1)))
+            if attrs.get(b"t") == b"shared" and b"ref" in attrs and f.group(2):
+                orphans[attrs[b"si"]] = (cell.group(1).decode(), unescape(f.group(2).decode()))
+
+
+def _fix_formulas(row_xml, shift, orphans):
+    """Shrinks shared/array formula ranges; expands dependents of deleted masters into plain formulas."""
+    def fix_f(m, cell_ref):
+        attrs = dict(_F_ATTR.findall(m.group(1)))
+        if attrs.get(b"t") == b"shared" and b"ref" not in attrs and attrs.get(b"si") in orphans:
+            origin, formula = orphans[attrs[b"si"]]
+            text = Translator("=" + formula, origin=origin).translate_formula(cell_ref)[1:]
+            return b"<f>" + escape(text).encode() + b"</f>"
+        if b"ref" in attrs:
+            new = shift.range(attrs[b"ref"].decode())
+            if new:
+                return m.group(0).replace(b'ref="' + attrs[b"ref"] + b'"', b'ref="' + new.encode() + b'"', 1)
+        return m.group(0)
+
+    def fix_cell(m):
+        if b"<f" not in m.group(0):
+            return m.group(0)
+        return _FORMULA.sub(lambda f: fix_f(f, m.group(1).decode()), m.group(0))
+
+    return _CELL.sub(fix_cell, row_xml)
+
+
+def _fix_defined_names(xml, shifts_by_sheet):
+    """Shrinks sheet-qualified ranges (Sheet1!$A$1:$D$9) of defined names in workbook.xml."""
+    def ref(m):
+        sheet = unescape((m.group(1) or "").replace("''", "'") or m.group(2))
+        if sheet not in shifts_by_sheet:
+            return m.group(0)
+        new = shifts_by_sheet[sheet].range(m.group(3))
+        return m.group(0)[:-len(m.group(3))] + (new or "#REF!")
+
+    def name(m):
+        return m.group(1) + _SHEET_REF.sub(ref, m.group(2).decode()).encode() + m.group(3)
+
+    return _DEFINED_NAME.sub(name, xml)
+
+
+def _renumber_row(row_xml, new_num):
+    row_xml = _ROW_NUM.sub(lambda m: m.group(1) + str(new_num).encode() + m.group(3), row_xml, count=1)
+    return _CELL_REF.sub(lambda m: m.group(1) + str(new_num).encode() + m.group(3), row_xml)
+
+
+def _stream_sheet(src, dst, shift):
+    """Copies sheet XML from src to dst minus the deleted rows."""
+    buf = b""
+    eof = False
+
+    def fill():
+        nonlocal buf, eof
+        block = src.read(READ_BLOCK)
+        if not block:
+            eof = True
+        buf += block
+
+    # Head: everything up to and including the opening <sheetData> tag
+    while b"<sheetData" not in buf and not eof:
+        fill()
+    start = buf.find(b"<sheetData")
+    if start < 0:
+        dst.write(buf)
+        return
+    while buf.find(b">", start) < 0 and not eof:
+        fill()
+    head_end = buf.find(b">", start) + 1
+    dst.write(_fix_ranges(buf[:head_end], shift))
+    buf = buf[head_end:]
+
+    # Rows: unchanged runs are copied as one slice; deleted rows are skipped,
+    # later rows get their row number and cell references rewritten. Rows with
+    # formulas are patched for range shrinking and orphaned shared formulas.
+    pos = flushed = 0
+    next_row = 1
+    orphans = {}
+    while True:
+        m = _ROW_START.search(buf, pos)
+        if m is not None and buf.find(b"</sheetData>", pos, m.start()) >= 0:
+            break
+        tag_end = buf.find(b">", m.start()) if m else -1
+        end = -1
+        if tag_end >= 0:
+            end = tag_end + 1 if buf[tag_end - 1:tag_end] == b"/" else buf.find(b"</row>", tag_end)
+            if end >= 0 and buf[tag_end - 1:tag_end] != b"/":
+                end += len(b"</row>")
+        if end < 0:
+            if eof:
+                break
+            # Need more XML: flush what is settled and drop it from the buffer
+            dst.write(buf[flushed:pos])
+            buf, pos, flushed = buf[pos:], 0, 0
+            fill()
+            continue
+        num_m = _ROW_NUM.match(buf, m.start())
+        num_m = num_m if num_m and num_m.end() <= tag_end + 1 else None
+        row_num = int(num_m.group(2)) if num_m else next_row
+        next_row = row_num + 1
+        has_formula = buf.find(b"<f", m.start(), end) >= 0
+        if shift.is_deleted(row_num):
+            if has_formula:
+                _shared_masters(buf[m.start():end], orphans)
+            dst.write(buf[flushed:m.start()])
+            flushed = end
+        elif has_formula or (num_m and shift.start(row_num) != row_num):
+            row_xml = buf[m.start():end]
+            if has_formula:
+                row_xml = _fix_formulas(row_xml, shift, orphans)
+            if num_m and shift.start(row_num) != row_num:
+                row_xml = _renumber_row(row_xml, shift.start(row_num))
+            dst.write(buf[flushed:m.start()])
+            dst.write(row_xml)
+            flushed = end
+        pos = end
+
+    # Tail: </sheetData> onwards (filters, merges, formatting rules)
+    dst.write(buf[flushed:pos])
+    buf = buf[pos:]
+    while not eof:
+        fill()
+    dst.write(_fix_ranges(buf, shift))
+
+
+def _table_parts(zf, sheet_path):
+    rels_path = posixpath.join(posixpath.dirname(sheet_path), "_rels", posixpath.basename(sheet_path) + ".rels")
+    try:
+        rels = zf.read(rels_path)
+    except KeyError:
+        return []
+    targets = re.findall(rb'Type="[^"]*/table"[^>]*Target="([^"]+)"|Target="([^"]+)"[^>]*Type="[^"]*/table"', rels)
+    out = []
+    for a, b in targets:
+        target = (a or b).decode()
+        out.append(target.lstrip("/") if target.startswith("/") else
+                   posixpath.normpath(posixpath.join(posixpath.dirname(sheet_path), target)))
+    return out
+
+
+def remove_rows(data, rows_by_sheet):
+    """
+    Deletes the given 1-based row numbers from each named sheet of an .xlsx
+    (bytes in, bytes out). Untouched parts are copied as-is.
+    """
+    rows_by_sheet = {s: rows for s, rows in rows_by_sheet.items() if len(rows)}
+    if not rows_by_sheet:
+        return data
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as zin, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zout:
+        paths = sheet_xml_paths(zin)
+        shifts_by_sheet = {s: _Shift(rows) for s, rows in rows_by_sheet.items() if s in paths}
+        shifts = {paths[s]: shift for s, shift in shifts_by_sheet.items()}
+        tables = {t: shift for path, shift in shifts.items() for t in _table_parts(zin, path)}
+        for item in zin.infolist():
+            name = item.filename
+            if name == "xl/calcChain.xml":
+                continue
+            if name == "[Content_Types].xml":
+                zout.writestr(item, re.sub(rb'<Override[^>]*PartName="/xl/calcChain.xml"[^>]*/>', b"", zin.read(name)))
+            elif name == "xl/_rels/workbook.xml.rels":
+                zout.writestr(item, re.sub(rb'<Relationship[^>]*Target="[^"]*calcChain.xml"[^>]*/>', b"", zin.read(name)))
+            elif name == "xl/workbook.xml":
+                zout.writestr(item, _fix_defined_names(zin.read(name), shifts_by_sheet))
+            elif name in tables:
+                zout.writestr(item, _fix_ranges(zin.read(name), tables[name]))
+            elif name in shifts:
+                with zin.open(item) as src, zout.open(item, "w", force_zip64=True) as dst:
+                    _stream_sheet(src, dst, shifts[name])
+            else:
+                with zin.open(item) as src, zout.open(item, "w", force_zip64=True) as dst:
+                    shutil.copyfileobj(src, dst, READ_BLOCK)
+    return out.getvalue()
@@ -0,0 +1,466 @@
+import hashlib
+import posixpath
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from components.column_profile import merge_profiles, new_profile, summarize, update_profile
+
+# Streaming .xlsx reader for the Spreadsheet Tool.
+# Sheet XML is walked with iterparse one <row> at a time (hidden flags come straight
+# from <row hidden="1">), values land in per-column lists, and each sheet becomes a
+# DataFrame whose columns pandas types once at the end. No Cell objects are built,
+# so peak memory stays close to the size of the extracted values.
+# On request the column profile (column_profile.py) is built in the same loop, every
+# PROFILE_ROWS parsed rows, so it never needs a second pass over the finished frames.
+
+ROW_IDX_COL = "__row_idx"
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # parsed-workbook LRU budget (in-memory DataFrame size)
+PROFILE_ROWS = 50_000  # rows per profile update while a sheet is parsed
+
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_BUILTIN_DATE_FMTS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+_CELL_REF = re.compile(r"([A-Z]+)")
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _col_index(ref):
+    """'AB12' -> 27 (0-based column index)."""
+    m = _CELL_REF.match(ref)
+    idx = 0
+    for ch in m.group(1):
+        idx = idx * 26 + (ord(ch) - 64)
+    return idx - 1
+
+
+def _is_date_format(code):
+    code = re.sub(r'"[^"]*"|\\.|\[[^\]]*\]', "", code or "")
+    return any(ch in code.lower() for ch in "dmyhs") and "general" not in code.lower()
+
+
+def _read_xml(zf, name):
+    try:
+        with zf.open(name) as f:
+            return ET.parse(f).getroot()
+    except KeyError:
+        return None
+
+
+def _shared_strings(zf):
+    strings = []
+    try:
+        f = zf.open("xl/sharedStrings.xml")
+    except KeyError:
+        return strings
+    with f:
+        for _, el in ET.iterparse(f):
+            if _local(el.tag) == "si":
+                # Plain <t> or rich-text <r><t> runs; phonetic <rPh> hints are skipped
+                parts = []
+                for child in el:
+                    tag = _local(child.tag)
+                    if tag == "t":
+                        parts.append(child.text or "")
+                    elif tag == "r":
+                        parts.extend(t.text or "" for t in child if _local(t.tag) == "t")
+                strings.append("".join(parts))
+                el.clear()
+    return strings
+
+
+def _date_styles(zf):
+    """Set of cellXfs indexes whose number format is a date/time."""
+    root = _read_xml(zf, "xl/styles.xml")
+    if root is None:
+        return set()
+    custom = {}
+    for el in root.iter():
+        if _local(el.tag) == "numFmt":
+            custom[int(el.get("numFmtId", 0))] = el.get("formatCode", "")
+    date_xfs = set()
+    for el in root.iter():
+        if _local(el.tag) == "cellXfs":
+            for i, xf in enumerate(x for x in el if _local(x.tag) == "xf"):
+                fmt_id = int(xf.get("numFmtId", 0))
+                if fmt_id in _BUILTIN_DATE_FMTS or (fmt_id in custom and _is_date_format(custom[fmt_id])):
+                    date_xfs.add(i)
+            break
+    return date_xfs
+
+
+def _sheet_entries(zf):
+    """[(name, xml_path, state)] in workbook order, plus the 1904 date-system flag."""
+    wb = _read_xml(zf, "xl/workbook.xml")
+    rels = _read_xml(zf, "xl/_rels/workbook.xml.rels")
+    targets = {}
+    if rels is not None:
+        for rel in rels:
+            target = rel.get("Target", "")
+            path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+            targets[rel.get("Id")] = path
+    date1904 = False
+    sheets = []
+    for el in wb.iter():
+        tag = _local(el.tag)
+        if tag == "workbookPr":
+            date1904 = el.get("date1904") in ("1", "true")
+        elif tag == "sheet":
+            sheets.append((el.get("name"), targets.get(el.get(_REL_NS)), el.get("state", "visible")))
+    return sheets, date1904
+
+
+def sheet_xml_paths(zf):
+    """{sheet name: xml part path} for every sheet of an open .xlsx zip, hidden ones included."""
+    sheets, _ = _sheet_entries(zf)
+    return {name: path for name, path, _ in sheets if path}
+
+
+def _convert(cell_type, raw, style, ctx):
+    if cell_type == "s":
+        return ctx["strings"][int(raw)]
+    if cell_type in ("str", "inlineStr", "e"):
+        return raw
+    if cell_type == "b":
+        return raw == "1"
+    if cell_type == "d":
+        return pd.to_datetime(raw, errors="coerce")
+    # Numeric
+    num = float(raw)
+    if style in ctx["date_xfs"]:
+        return ctx["epoch"] + timedelta(days=num)
+    if num.is_integer() and "." not in raw and "E" not in raw.upper():
+        return int(num)
+    return num
+
+
+def _dedupe_headers(raw_headers):
+    headers = []
+    counts = {}
+    for i, h in enumerate(raw_headers):
+        h_str = str(h).strip() if h is not None else f"Unnamed: {i}"
+        if h_str == "": h_str = f"Unnamed: {i}"
+        if h_str in counts:
+            counts[h_str] += 1
+            headers.append(f"{h_str}.{counts[h_str]}")
+        else:
+            counts[h_str] = 0
+            headers.append(h_str)
+    return headers
+
+
+def iter_sheet_rows(zf, xml_path, ctx):
+    """Yields (row_number, is_hidden, {col_index: value}) for rows that carry values."""
+    with zf.open(xml_path) as f:
+        sheet_data = None
+        next_row = 1
+        for event, el in ET.iterparse(f, events=("start", "end")):
+            tag = _local(el.tag)
+            if event == "start":
+                if tag == "sheetData":
+                    sheet_data = el
+                continue
+            if tag != "row":
+                continue
+            row_num = int(el.get("r", next_row))
+            next_row = row_num + 1
+            hidden = el.get("hidden") in ("1", "true")
+            values = {}
+            next_col = 0
+            for c in el:
+                if _local(c.tag) != "c":
+                    continue
+                ref = c.get("r")
+                col = _col_index(ref) if ref else next_col
+                next_col = col + 1
+                cell_type = c.get("t", "n")
+                raw = None
+                for child in c:
+                    ctag = _local(child.tag)
+                    if ctag == "v":
+                        raw = child.text
+                    elif ctag == "is":
+                        raw = "".join(t.text or "" for t in child.iter() if _local(t.tag) == "t")
+                if raw is None or raw == "":
+                    continue
+                try:
+                    values[col] = _convert(cell_type, raw, int(c.get("s", 0)), ctx)
+                except (ValueError, IndexError):
+                    values[col] = raw
+            el.clear()
+            if sheet_data is not None:
+                sheet_data.clear()
+            if values:
+                yield row_num, hidden, values
+
+
+def _frame(columns, n, headers, row_numbers=None, infer=True):
+    """
+    DataFrame from lazily padded per-column value lists (see read_sheet).
+    infer=False keeps every column as the cells' own Python values (object dtype).
+    """
+    data = {}
+    for i, h in enumerate(headers):
+        lst = columns.get(i, [])
+        if len(lst) < n:
+            lst.extend([None] * (n - len(lst)))
+        data[h] = pd.Series(lst, dtype=object).infer_objects() if n and infer else pd.Series(lst, dtype=object)
+    if row_numbers is not None:
+        data[ROW_IDX_COL] = pd.Series(row_numbers, dtype="int64")
+    return pd.DataFrame(data)
+
+
+def _profile_rows(profiles, columns, start, stop):
+    """Profiles rows [start, stop) of the per-column value lists (keyed by column index)."""
+    for col, lst in columns.items():
+        seg = lst[start:stop]
+        seg.extend([None] * (stop - start - len(seg)))
+        update_profile(profiles.setdefault(col, new_profile()), pd.Series(seg, dtype=object).infer_objects())
+
+
+def read_sheet(zf, xml_path, ctx, respect_filters=True, keep_row_numbers=False, profiles=None):
+    """
+    Reads one sheet into a DataFrame. Returns (df, hidden_rows_skipped).
+    With a `profiles` dict, {header: column profile} of the kept rows is added to it.
+    """
+    rows = iter_sheet_rows(zf, xml_path, ctx)
+    try:
+        _, _, header_vals = next(rows)
+    except StopIteration:
+        return None, 0
+
+    columns = {}  # col_index -> list of values (lazily padded)
+    row_numbers = []
+    hidden_skipped = 0
+    n = 0
+    by_index, profiled = {}, 0  # column profiles by index; rows already profiled
+    for row_num, hidden, values in rows:
+        if hidden and respect_filters:
+            hidden_skipped += 1
+            continue
+        for col, val in values.items():
+            lst = columns.setdefault(col, [])
+            if len(lst) < n:
+                lst.extend([None] * (n - len(lst)))
+            lst.append(val)
+        row_numbers.append(row_num)
+        n += 1
+        if profiles is not None and n - profiled >= PROFILE_ROWS:
+            _profile_rows(by_index, columns, profiled, n)
+            profiled = n
+
+    width = max([max(header_vals) + 1] + [c + 1 for c in columns])
+    headers = _dedupe_headers([header_vals.get(i) for i in range(width)])
+    if profiles is not None and n:
+        _profile_rows(by_index, columns, profiled, n)
+        for i, h in enumerate(headers):
+            p = by_index.get(i, new_profile())
+            # Columns first seen part-way down were empty above that point
+            p["nulls"] += n - p["count"]
+            p["count"] = n
+            profiles[h] = merge_profiles(profiles[h], p) if h in profiles else p
+    return _frame(columns, n, headers, row_numbers if keep_row_numbers else None), hidden_skipped
+
+
+def read_workbook(source, respect_filters=True, keep_row_numbers=False, profiles=None):
+    """
+    Reads every sheet of an .xlsx (path or file-like, e.g. a Streamlit upload).
+
+    respect_filters: skip hidden rows and hidden sheets (Excel filters).
+    keep_row_numbers: add a ROW_IDX_COL column with the original 1-based row number.
+    profiles: optional dict filled with {column: profile} over every sheet's kept rows
+    while they are parsed (see read_sheet).
+    Returns ({sheet_name: DataFrame}, total_hidden_rows_skipped). Header-only sheets
+    come back as empty DataFrames; sheets with no cells at all are omitted.
+    """
+    if hasattr(source, "seek"):
+        source.seek(0)
+    result = {}
+    total_hidden = 0
+    with zipfile.ZipFile(source) as zf:
+        sheets, ctx = _open_sheets(zf, respect_filters)
+        for name, xml_path in sheets:
+            df, hidden = read_sheet(zf, xml_path, ctx, respect_filters, keep_row_numbers, profiles)
+            if df is None:
+                continue
+            result[name] = df
+            total_hidden += hidden
+    return result, total_hidden
+
+
+def _open_sheets(zf, respect_filters):
+    sheets, date1904 = _sheet_entries(zf)
+    ctx = {
+        "strings": _shared_strings(zf),
+        "date_xfs": _date_styles(zf),
+        "epoch": datetime(1904, 1, 1) if date1904 else datetime(1899, 12, 30),
+    }
+    visible = [(name, path) for name, path, state in sheets
+               if path is not None and not (respect_filters and state != "visible")]
+    return visible, ctx
+
+
+def sheet_headers(source, respect_filters=True):
+    """{sheet name: header names} from the first row of every sheet; no data rows are parsed."""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    headers = {}
+    with zipfile.ZipFile(source) as zf:
+        sheets, ctx = _open_sheets(zf, respect_filters)
+        for name, xml_path in sheets:
+            rows = iter_sheet_rows(zf, xml_path, ctx)
+            try:
+                _, _, header_vals = next(rows)
+            except StopIteration:
+                continue
+            finally:
+                rows.close()
+            headers[name] = _dedupe_headers([header_vals.get(i) for i in range(max(header_vals) + 1)])
+    return headers
+
+
+def iter_sheet_chunks(source, respect_filters=True, chunk_rows=100_000, widths=None):
+    """
+    Yields (sheet_name, DataFrame) chunks of at most chunk_rows rows, each with
+    ROW_IDX_COL, so arbitrarily large workbooks can be processed in bounded memory.
+    Columns come from the header row plus any wider cells seen so far in the sheet;
+    pass widths={sheet: column_count} (e.g. from an earlier pass) to pin every chunk
+    of a sheet to the same columns. Empty sheets yield nothing.
+    Columns stay object dtype with each cell's own value (no per-chunk dtype
+    inference): a blank cell must not turn one chunk's integer phones into floats
+    and change their keys, so keys never depend on where a chunk boundary falls.
+    """
+    if hasattr(source, "seek"):
+        source.seek(0)
+    with zipfile.ZipFile(source) as zf:
+        sheets, ctx = _open_sheets(zf, respect_filters)
+        for name, xml_path in sheets:
+            rows = iter_sheet_rows(zf, xml_path, ctx)
+            try:
+                _, _, header_vals = next(rows)
+            except StopIteration:
+                continue
+            width = max(max(header_vals) + 1, (widths or {}).get(name, 0))
+            columns, row_numbers = {}, []
+            for row_num, hidden, values in rows:
+                if hidden and respect_filters:
+                    continue
+                n = len(row_numbers)
+                for col, val in values.items():
+                    lst = columns.setdefault(col, [])
+                    if len(lst) < n:
+                        lst.extend([None] * (n - len(lst)))
+                    lst.append(val)
+                row_numbers.append(row_num)
+                if len(row_numbers) >= chunk_rows:
+                    width = max([width] + [c + 1 for c in columns])
+                    yield name, _frame(columns, len(row_numbers), _dedupe_headers([header_vals.get(i) for i in range(width)]), row_numbers, infer=False)
+                    columns, row_numbers = {}, []
+            if row_numbers:
+                width = max([width] + [c + 1 for c in columns])
+                yield name, _frame(columns, len(row_numbers), _dedupe_headers([header_vals.get(i) for i in range(width)]), row_numbers, infer=False)
+
+
+# --- CACHE ---
+# Parsed workbooks keyed by (sha256 of the file bytes, loader options). Streamlit
+# reruns the whole page on every widget change; with this, only the first
+# interaction with an upload pays the parse. Module state survives reruns.
+_cache = OrderedDict()  # key -> (sheets, hidden, nbytes)
+_profiles = {}  # (digest, respect_filters) -> column profile summary built during a parse
+_cache_lock = threading.Lock()
+
+
+def content_hash(source):
+    if hasattr(source, "getvalue"):
+        return hashlib.sha256(source.getvalue()).hexdigest()
+    sha = hashlib.sha256()
+    if hasattr(source, "read"):
+        source.seek(0)
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            sha.update(chunk)
+        source.seek(0)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+    return sha.hexdigest()
+
+
+def cached_workbook(digest, respect_filters=True, keep_row_numbers=False):
+    """Cache lookup by content hash: (sheets, hidden) or None."""
+    key = (digest, bool(respect_filters), bool(keep_row_numbers))
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is None:
+            return None
+        _cache.move_to_end(key)
+        return dict(hit[0]), hit[1]
+
+
+def cache_workbook(digest, respect_filters, keep_row_numbers, sheets, hidden):
+    """Stores a parse (e.g. one produced in a worker process) and applies the LRU budget."""
+    key = (digest, bool(respect_filters), bool(keep_row_numbers))
+    nbytes = sum(int(df.memory_usage(deep=True).sum()) for df in sheets.values())
+    with _cache_lock:
+        _cache[key] = (sheets, hidden, nbytes)
+        _cache.move_to_end(key)
+        # Evict least recently used, but always keep the entry just added
+        total = sum(v[2] for v in _cache.values())
+        while total > CACHE_MAX_BYTES and len(_cache) > 1:
+            (old_digest, old_filters, _), (_, _, freed) = _cache.popitem(last=False)
+            total -= freed
+            if not any(k[:2] == (old_digest, old_filters) for k in _cache):
+                _profiles.pop((old_digest, old_filters), None)
+
+
+def load_workbook_cached(source, respect_filters=True, keep_row_numbers=False, profile=False):
+    """
+    read_workbook() behind a size-bounded LRU. Returned DataFrames are shared with
+    the cache and must be treated as read-only (copy before mutating).
+    profile=True also returns the column profile summary (column_profile.summarize),
+    built during the parse: (sheets, hidden, summary).
+    """
+    digest = content_hash(source)
+    hit = cached_workbook(digest, respect_filters, keep_row_numbers)
+    with _cache_lock:
+        summary = _profiles.get((digest, bool(respect_filters)))
+    if hit is not None and (not profile or summary is not None):
+        return hit + (summary,) if profile else hit
+    # Miss, or cached by a caller that did not ask for the profile: parse (and profile) once more
+    profiles = {} if profile else None
+    sheets, hidden = read_workbook(source, respect_filters, keep_row_numbers, profiles)
+    cache_workbook(digest, respect_filters, keep_row_numbers, sheets, hidden)
+    if not profile:
+        return dict(sheets), hidden
+    summary = summarize(profiles)
+    with _cache_lock:
+        _profiles[(digest, bool(respect_filters))] = summary
+    return dict(sheets), hidden, summary
+
+
+def evict_workbook(digest=None):
+    """Drops cached parses of one file (all option variants), or everything when digest is None."""
+    with _cache_lock:
+        if digest is None:
+            n = len(_cache)
+            _cache.clear()
+            _profiles.clear()
+            return n
+        for k in [k for k in _profiles if k[0] == digest]:
+            del _profiles[k]
+        keys = [k for k in _cache if k[0] == digest]
+        for k in keys:
+            del _cache[k]
+        return len(keys)
+
+
+def workbook_cache_info():
+    with _cache_lock:
+        return {"entries": len(_cache), "bytes": sum(v[2] for v in _cache.values()), "max_bytes": CACHE_MAX_BYTES}
@@ -0,0 +1,222 @@
+import io
+import math
+import re
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+# Streaming .xlsx writer for the Spreadsheet Tool's result files.
+# Sheet XML is generated a chunk of rows at a time straight into the zip entry:
+# no openpyxl Cell objects, no shared-string table, so memory stays at one chunk
+# of cell text regardless of output size. Styling is fixed per workbook (header,
+# wrapped data cells, dates) and column widths come from a bounded row sample.
+
+CHUNK_ROWS = 10_000      # rows rendered per write
+AUTOFIT_SAMPLE = 200     # rows sampled per column for width
+MIN_WIDTH, MAX_WIDTH = 8, 50
+MAX_CELL_CHARS = 32_767  # Excel's per-cell text limit
+
+# cellXfs indexes in _STYLES
+_PLAIN, _HEADER_BOLD, _HEADER_GREEN, _WRAP_TOP, _DATE = range(5)
+
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy\\-mm\\-dd\\ hh:mm:ss"/></numFmts>
+<fonts count="3"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font></fonts>
+<fills count="3"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill><fill><patternFill patternType="solid"><fgColor rgb="FF2E7D32"/><bgColor rgb="FF2E7D32"/></patternFill></fill></fills>
+<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border><border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="5">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" applyBorder="1" applyAlignment="1"><alignment horizontal="center" vertical="top"/></xf>
+<xf numFmtId="0" fontId="2" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1"><alignment horizontal="left" vertical="center" wrapText="1"/></xf>
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" applyAlignment="1"><alignment vertical="top" wrapText="1"/></xf>
+<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+{sheets}</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_BAD_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def column_letter(idx):
+    """0 -> 'A', 27 -> 'AB'."""
+    letters = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _sheet_names(names):
+    """Excel-safe, unique sheet names (31 chars, no []:*?/\\)."""
+    out, seen = [], set()
+    for name in names:
+        base = _BAD_SHEET_CHARS.sub("_", str(name))[:31] or "Sheet"
+        candidate, n = base, 1
+        while candidate.lower() in seen:
+            suffix = f"_{n}"
+            candidate, n = base[:31 - len(suffix)] + suffix, n + 1
+        seen.add(candidate.lower())
+        out.append(candidate)
+    return out
+
+
+def _text(value):
+    s = _ILLEGAL_XML.sub("", str(value))[:MAX_CELL_CHARS]
+    return escape(s)
+
+
+def _cell(value, style):
+    """XML for one cell. Cells carry no r="A1" reference: positions are implied by order."""
+    s = f' s="{style}"' if style else ""
+    if value is None or value is pd.NaT:
+        return f"<c{s}/>"
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c{s} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f"<c{s}><v>{int(value)}</v></c>"
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value):
+            return f"<c{s}/>"
+        if math.isinf(value):
+            return f'<c{s} t="inlineStr"><is><t>{value}</t></is></c>'
+        return f"<c{s}><v>{float(value)!r}</v></c>"
+    if isinstance(value, (datetime, date)):
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        if getattr(value, "tzinfo", None) is not None:
+            value = value.replace(tzinfo=None)
+        serial = (value - _EXCEL_EPOCH) / timedelta(days=1)
+        return f'<c s="{_DATE}"><v>{serial!r}</v></c>'
+    return f'<c{s} t="inlineStr"><is><t xml:space="preserve">{_text(value)}</t></is></c>'
+
+
+def _column_cells(series, style):
+    """Cell XML for a chunk of one column; numeric and string columns skip the per-type dispatch."""
+    s = f' s="{style}"' if style else ""
+    values = series.to_numpy(dtype=object)
+    empty = pd.isna(series).to_numpy()
+    if pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype) and not empty.any():
+        return [f"<c{s}><v>{v}</v></c>" for v in values.tolist()]
+    if pd.api.types.is_string_dtype(series.dtype) and pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+        return [f"<c{s}/>" if e else f'<c{s} t="inlineStr"><is><t xml:space="preserve">{_text(v)}</t></is></c>'
+                for v, e in zip(values.tolist(), empty.tolist())]
+    return [f"<c{s}/>" if e else _cell(v, style) for v, e in zip(values.tolist(), empty.tolist())]
+
+
+def _column_widths(df, sample=AUTOFIT_SAMPLE):
+    """Width per column from the header and an evenly spaced sample of at most `sample` rows."""
+    n = len(df)
+    pos = np.unique(np.linspace(0, n - 1, min(n, sample)).astype(int)) if n else np.empty(0, dtype=int)
+    widths = []
+    for i, col in enumerate(df.columns):
+        longest = len(str(col)) + 4
+        sampled = df.iloc[pos, i].dropna()
+        if len(sampled):
+            longest = max(longest, int(sampled.astype(str).str.len().max()))
+        widths.append(max(MIN_WIDTH, min(longest + 2, MAX_WIDTH)))
+    return widths
+
+
+def _write_sheet(f, df, header_style, data_style, autofit):
+    n_rows, n_cols = df.shape
+    last = f"{column_letter(max(n_cols, 1) - 1)}{n_rows + 1}"
+    f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">')
+    f.write(f'<dimension ref="A1:{last}"/>'.encode())
+    if header_style == _HEADER_GREEN:
+        f.write(b'<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                b'<selection pane="bottomLeft"/></sheetView></sheetViews>')
+    if autofit and n_cols:
+        cols = "".join(f'<col min="{i}" max="{i}" width="{w}" customWidth="1"/>'
+                       for i, w in enumerate(_column_widths(df), 1))
+        f.write(f"<cols>{cols}</cols>".encode())
+    f.write(b"<sheetData>")
+    header = "".join(_cell(str(c), header_style) for c in df.columns)
+    f.write(f'<row r="1">{header}</row>'.encode())
+    for start in range(0, n_rows, CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        columns = [_column_cells(chunk.iloc[:, i], data_style) for i in range(n_cols)]
+        rows = [f'<row r="{start + j + 2}">{"".join(cells)}</row>' for j, cells in enumerate(zip(*columns))]
+        f.write("".join(rows).encode())
+    f.write(b"</sheetData>")
+    if header_style == _HEADER_GREEN and n_cols:
+        f.write(f'<autoFilter ref="A1:{last}"/>'.encode())
+    f.write(b"</worksheet>")
+
+
+def write_workbook(sheets, styled=False, autofit=True):
+    """
+    sheets: {sheet name: DataFrame}, written in order (index not written).
+    styled=False gives pandas' look (bold bordered header); styled=True adds the
+    green header, frozen header row, auto-filter and wrapped data cells.
+    Returns (xlsx bytes, stats) with stats = {"sheets", "rows", "cells", "seconds", "rows_per_s", "bytes"}.
+    """
+    t0 = time.perf_counter()
+    if not sheets:
+        sheets = {"Sheet1": pd.DataFrame()}
+    names = _sheet_names(sheets.keys())
+    header_style = _HEADER_GREEN if styled else _HEADER_BOLD
+    data_style = _WRAP_TOP if styled else _PLAIN
+
+    out = io.BytesIO()
+    rows = cells = 0
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i, df in enumerate(sheets.values(), 1):
+            with zf.open(f"xl/worksheets/sheet{i}.xml", "w", force_zip64=True) as f:
+                _write_sheet(f, df, header_style, data_style, autofit)
+            rows += len(df)
+            cells += df.size
+
+        overrides = "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\n'
+                            for i in range(1, len(names) + 1))
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES.format(sheets=overrides))
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        sheet_tags = "".join(f'<sheet name="{escape(n, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+                             for i, n in enumerate(names, 1))
+        zf.writestr("xl/workbook.xml",
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                    f"<sheets>{sheet_tags}</sheets></workbook>")
+        rels = "".join(f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                       for i in range(1, len(names) + 1))
+        style_id = len(names) + 1
+        rels += f'<Relationship Id="rId{style_id}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        zf.writestr("xl/_rels/workbook.xml.rels",
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}</Relationships>')
+        zf.writestr("xl/styles.xml", _STYLES)
+
+    data = out.getvalue()
+    seconds = time.perf_counter() - t0
+    stats = {"sheets": len(names), "rows": rows, "cells": int(cells), "seconds": round(seconds, 3),
+             "rows_per_s": int(rows / seconds) if seconds > 0 else rows, "bytes": len(data)}
+    return data, stats
+
+
+def throughput_caption(stats):
+    """One-line summary of a write_workbook() run for st.caption."""
+    return (f"Wrote {stats['rows']:,} rows ({stats['cells']:,} cells) across {stats['sheets']} sheet(s) "
+            f"in {stats['seconds']:.2f}s · {stats['rows_per_s']:,} rows/s · {stats['bytes'] / 1_048_576:.1f} MB")
@@ -0,0 +1,69 @@
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime
+from urllib.parse import urlparse
+
+from scrapy import signals
+
+
+class FeedManifestExtension:
+    """
+    Writes `<feed>.manifest.json` next to every local CSV feed once the crawl ends:
+    row count, column names and a sha256 of the file, so the app can show counts
+    without parsing the CSV.
+    """
+
+    def __init__(self, feeds):
+        self.feeds = feeds
+        self.rows = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ext = cls(crawler.settings.getdict("FEEDS"))
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        # engine_stopped fires after the feed exporter has flushed and closed its files
+        crawler.signals.connect(ext.engine_stopped, signal=signals.engine_stopped)
+        return ext
+
+    def item_scraped(self, item, spider):
+        self.rows += 1
+
+    def engine_stopped(self):
+        for uri, options in self.feeds.items():
+            if (options or {}).get("format") != "csv":
+                continue
+            parsed = urlparse(str(uri))
+            path = parsed.path if parsed.scheme == "file" else str(uri)
+            if not os.path.exists(path):
+                continue
+            try:
+                write_manifest(path, self.rows)
+            except Exception:
+                pass
+
+
+def write_manifest(path, rows):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        columns = next(csv.reader(f), [])
+
+    st = os.stat(path)
+    manifest = {
+        "file": os.path.basename(path),
+        "rows": rows,
+        "columns": columns,
+        "sha256": sha.hexdigest(),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    tmp_path = f"{path}.manifest.json.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, f"{path}.manifest.json")
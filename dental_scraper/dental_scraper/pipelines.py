@@ -1,3 +1,6 @@
+import json
+from datetime import datetime
+
 from itemadapter import ItemAdapter
 
 class DentalScraperPipeline:
@@ -35,5 +38,50 @@ class DentalScraperPipeline:
                  from scrapy.exceptions import DropItem
                  raise DropItem(f"Duplicate item found with name: {name}")
              self.seen_names.add(name)
-            
+
+        # 3. Cross-run: businesses kept by an earlier crawl (spider.place_index)
+        index = getattr(spider, "place_index", None)
+        if index is not None:
+            if getattr(spider, "skip_known", False) and index.is_known(phone, name):
+                from scrapy.exceptions import DropItem
+                raise DropItem(f"Already scraped in an earlier run: {name or phone}")
+            index.record(adapter.get('place_url'), phone, name, getattr(spider, "search_query", None))
+
+        return item
+
+
+class LiveResultsPipeline:
+    """
+    Appends every kept item to LIVE_RESULTS_FILE as one JSON line the moment it
+    is scraped, so the app can show leads while the crawl is still running (the
+    -O CSV feed only lands at the end). Values keep their JSON types (numbers,
+    booleans, lists); empty strings become null and anything JSON cannot hold
+    is written as str. "seq" counts items and "scraped_at" is an ISO timestamp.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.seq = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings.get("LIVE_RESULTS_FILE", "../scraped_results.jsonl"))
+
+    def open_spider(self, spider):
+        # A new crawl starts a new stream
+        self.file = open(self.path, "w", encoding="utf-8")
+
+    def close_spider(self, spider):
+        if self.file:
+            self.file.close()
+
+    def process_item(self, item, spider):
+        self.seq += 1
+        row = {"seq": self.seq, "scraped_at": datetime.now().isoformat(timespec="seconds")}
+        for field, value in ItemAdapter(item).items():
+            row[field] = None if value == "" else value
+        # One write + flush per item: readers only ever see whole lines
+        self.file.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        self.file.flush()
         return item
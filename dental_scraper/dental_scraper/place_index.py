@@ -0,0 +1,110 @@
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+# --- CONFIG ---
+COMMIT_EVERY = 50      # recorded places per transaction
+LOOKUP_BATCH = 500     # keys per IN (...) query (SQLite caps bound parameters)
+
+# Cross-run index of places already scraped (SQLite, shared by every crawl):
+#   places(key, url, phone, name, query, first_seen, last_seen)
+# key is the Maps feature id (!1s0x..:0x.. in the place URL), which stays the same
+# across searches and URL variants; URLs without one fall back to the URL minus
+# its query string. phone (last 10 digits) and name (lowercased, single-spaced)
+# are indexed too, so a known business is recognised even under a new URL.
+# The spider consults the index before requesting detail pages; the pipeline
+# records every kept item. On first use the legacy lead_history_index.json
+# ("name|phone" keys) is imported.
+
+_FEATURE_ID = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", re.I)
+
+
+def place_key(url):
+    m = _FEATURE_ID.search(url or "")
+    return m.group(1).lower() if m else (url or "").split("?")[0]
+
+
+def norm_phone(phone):
+    # "9586487859.0" (from a float column) and "Phone: +91 95864 87859" both -> "9586487859"
+    digits = re.sub(r"\D", "", re.sub(r"\.0$", "", str(phone or "").strip()))
+    return digits[-10:] if len(digits) >= 7 else None
+
+
+def norm_name(name):
+    name = re.sub(r"\s+", " ", str(name or "")).strip().lower()
+    return name or None
+
+
+class PlaceIndex:
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        fresh = not os.path.exists(path)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS places (key TEXT PRIMARY KEY, url TEXT, phone TEXT, name TEXT,"
+            " query TEXT, first_seen TEXT, last_seen TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS places_phone ON places(phone)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS places_name ON places(name)")
+        self.pending = 0
+        if fresh and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+        self.conn.commit()
+
+    def _import_legacy(self, legacy_path):
+        try:
+            with open(legacy_path, "r") as f:
+                keys = json.load(f)
+        except Exception:
+            return
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for k in keys:
+            name, _, phone = str(k).rpartition("|")
+            rows.append((f"legacy:{k}", None, norm_phone(phone), norm_name(name), "lead_history_index.json", now, now))
+        self.conn.executemany("INSERT OR IGNORE INTO places VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _existing(self, column, values):
+        values = sorted({v for v in values if v})
+        found = set()
+        for i in range(0, len(values), LOOKUP_BATCH):
+            batch = values[i:i + LOOKUP_BATCH]
+            marks = ",".join("?" * len(batch))
+            found.update(r[0] for r in self.conn.execute(f"SELECT {column} FROM places WHERE {column} IN ({marks})", batch))
+        return found
+
+    def known_urls(self, urls):
+        """Subset of `urls` whose place is already in the index."""
+        keys = self._existing("key", [place_key(u) for u in urls])
+        return {u for u in urls if place_key(u) in keys}
+
+    def is_known(self, phone=None, name=None):
+        """Phone decides when there is one (as in the per-run pipeline dedup), else the name."""
+        phone = norm_phone(phone)
+        if phone:
+            return bool(self._existing("phone", [phone]))
+        name = norm_name(name)
+        return bool(name and self._existing("name", [name]))
+
+    def record(self, url, phone=None, name=None, query=None):
+        now = datetime.now().isoformat(timespec="seconds")
+        self.conn.execute(
+            "INSERT INTO places VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET"
+            " url=excluded.url, phone=COALESCE(excluded.phone, phone), name=COALESCE(excluded.name, name),"
+            " last_seen=excluded.last_seen",
+            (place_key(url), url, norm_phone(phone), norm_name(name), query, now, now),
+        )
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
@@ -0,0 +1,85 @@
+import json
+import os
+import time
+from collections import deque
+
+# --- CONFIG ---
+FLUSH_EVENTS = 25      # buffered events written per append
+FLUSH_SECONDS = 2.0    # ...or sooner once the oldest buffered event is this old
+RATE_WINDOW = 30.0     # seconds of history behind items/s and the ETA
+
+# Append-only JSON-lines progress stream read by the app's scraper page
+# (components/scrape_progress.py). One event per line:
+#   {"ts", "stage", "query", "done", "total", "rate", "eta_s", "errors", "message"}
+# Item updates are buffered and written in batches; stage changes, errors and
+# the final event are flushed at once so the UI never lags on them.
+
+
+class ProgressLog:
+    def __init__(self, path, query=""):
+        self.path = path
+        self.query = query
+        self.stage = "Starting..."
+        self.done = 0
+        self.total = 0
+        self.errors = 0
+        self._buffer = []
+        self._first_buffered = None
+        self._history = deque()  # (ts, done) inside RATE_WINDOW
+        # A new crawl starts a new stream
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _rate(self, now):
+        self._history.append((now, self.done))
+        while len(self._history) > 2 and now - self._history[0][0] > RATE_WINDOW:
+            self._history.popleft()
+        t0, d0 = self._history[0]
+        return (self.done - d0) / (now - t0) if now > t0 else 0.0
+
+    def update(self, stage=None, done=None, total=None, error=None, message=None):
+        """Records the current state; writes happen in batches (see FLUSH_*)."""
+        now = time.time()
+        urgent = error is not None or (stage is not None and stage != self.stage)
+        if stage is not None:
+            self.stage = stage
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if error is not None:
+            self.errors += 1
+        rate = self._rate(now)
+        remaining = max(self.total - self.done, 0)
+        self._buffer.append({
+            "ts": round(now, 3),
+            "stage": self.stage,
+            "query": self.query,
+            "done": self.done,
+            "total": self.total,
+            "rate": round(rate, 3),
+            "eta_s": round(remaining / rate) if rate > 0 and remaining else None,
+            "errors": self.errors,
+            "message": error if error is not None else message,
+        })
+        if self._first_buffered is None:
+            self._first_buffered = now
+        if urgent or len(self._buffer) >= FLUSH_EVENTS or now - self._first_buffered >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e) + "\n" for e in self._buffer))
+        except OSError:
+            pass  # progress is best effort; the crawl must not fail on it
+        self._buffer = []
+        self._first_buffered = None
+
+    def close(self, reason="finished"):
+        self.update(stage="Finished" if reason == "finished" else f"Stopped ({reason})", message=reason)
+        self.flush()
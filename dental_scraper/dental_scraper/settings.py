@@ -60,6 +60,12 @@ RANDOMIZE_DOWNLOAD_DELAY = True
 # Pipelines
 ITEM_PIPELINES = {
    "dental_scraper.pipelines.DentalScraperPipeline": 300,
+   "dental_scraper.pipelines.LiveResultsPipeline": 400,  # scraped_results.jsonl, written as items arrive
+}
+
+# Extensions
+EXTENSIONS = {
+   "dental_scraper.extensions.FeedManifestExtension": 500,  # scraped_results.csv.manifest.json
 }
 
 # Logging
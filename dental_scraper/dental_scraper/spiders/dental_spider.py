@@ -1,7 +1,13 @@
 import scrapy
+from scrapy.http import TextResponse
+from scrapy.utils.defer import maybe_deferred_to_future
 from scrapy_playwright.page import PageMethod
 from dental_scraper.items import DentalScraperItem
+from dental_scraper.progress import ProgressLog
+from dental_scraper.place_index import PlaceIndex
+import asyncio
 import re
+import time
 import urllib.parse
 import os
 
@@ -14,17 +20,46 @@ class DentalSpider(scrapy.Spider):
         self.search_query = search_query
         self.total_places = 0
         self.processed_places = 0
-        self.progress_file = "../scraper_progress.txt"
+        self.progress = ProgressLog("../scraper_progress.jsonl", query=search_query)
         self.seen_urls = set()
+        # Cross-run index: places from earlier crawls are skipped before their detail page is opened
+        self.place_index = PlaceIndex("../place_index.sqlite3", legacy_path="../lead_history_index.json")
+        self.skip_known = str(kwargs.get("skip_known", "true")).lower() == "true"
+        self.skipped_known = 0
+        # Websites are fetched over plain HTTP; a browser page only when opted in and the HTML looks JS-rendered
+        self.browser_fallback = str(kwargs.get("browser_fallback", "false")).lower() == "true"
+        # Search variants collected in parallel, one browser page each (1..QUERY_WORKERS_MAX)
+        try:
+            query_workers = int(kwargs.get("query_workers", 3))
+        except (TypeError, ValueError):
+            query_workers = 3
+        self.query_workers = max(1, min(query_workers, self.QUERY_WORKERS_MAX))
         self.update_progress("Starting...")
 
-    def update_progress(self, status=None):
-        try:
-            display = status if status else f"{self.processed_places}/{self.total_places}"
-            with open(self.progress_file, "w") as f:
-                f.write(f"{display}|{self.search_query}")
-        except Exception:
-            pass
+    def update_progress(self, status=None, error=None, message=None):
+        # Buffered: item-level updates reach the file in batches (see progress.py)
+        self.progress.update(stage=status, done=self.processed_places, total=self.total_places, error=error, message=message)
+
+    def record_feed_stats(self, stats, links, seconds):
+        """Per-feed scroll instrumentation: log line, progress message and crawl stats (feed/*)."""
+        summary = (f"Feed scrolled in {seconds:.1f}s: {links} places, {stats['rounds']} rounds, "
+                   f"{stats['waitedMs'] / 1000:.1f}s waiting, {stats['timeouts']} timeouts, stop={stats['endReason']}")
+        self.logger.info(f"📜 {summary}")
+        self.update_progress(message=summary)
+        crawler_stats = self.crawler.stats
+        crawler_stats.inc_value("feed/count")
+        crawler_stats.inc_value("feed/places", links)
+        crawler_stats.inc_value("feed/rounds", stats["rounds"])
+        crawler_stats.inc_value("feed/timeouts", stats["timeouts"])
+        crawler_stats.inc_value("feed/wait_ms", int(stats["waitedMs"]))
+        crawler_stats.inc_value("feed/seconds_x1000", int(seconds * 1000))
+        crawler_stats.inc_value(f"feed/stop/{stats['endReason']}")
+
+    def closed(self, reason):
+        self.place_index.close()
+        if self.skipped_known:
+            self.logger.info(f"⏭️ Skipped {self.skipped_known} places already in the place index.")
+        self.progress.close(reason)
 
     def start_requests(self):
         # STRATEGY: Start at Google Home to handle global consent cookie first.
@@ -140,40 +175,92 @@ class DentalSpider(scrapy.Spider):
         queries_to_run = list(set(queries_to_run))
         self.logger.info(f"🚀 Generated {len(queries_to_run)} search variations.")
 
-        # 3. START MAPS SCRAPING (Using SAME Context/Page)
-        # We drive the page manually here to ensure session continuity
-        
-        for idx, q in enumerate(queries_to_run):
-            # Using + for spaces
-            encoded_q = q.replace(" ", "+")
-            # Force English result interface
-            search_url = f"https://www.google.com/maps/search/{encoded_q}?hl=en"
-            
-            self.logger.info(f"📍 Manually navigating to: {search_url}")
-            self.update_progress("Navigating to Maps...")
-            
+        # 3. COLLECT FEEDS ON A POOL OF PAGES (same persistent_session context)
+        # Variants run concurrently, at most `query_workers` at a time; detail requests
+        # for a variant are yielded as soon as its feed is collected. Extra pages are
+        # opened through scrapy-playwright so they count against
+        # PLAYWRIGHT_MAX_PAGES_PER_CONTEXT, and one slot is always left for detail pages.
+        max_pages = self.settings.getint("PLAYWRIGHT_MAX_PAGES_PER_CONTEXT", self.settings.getint("CONCURRENT_REQUESTS"))
+        workers = max(1, min(self.query_workers, len(queries_to_run), max_pages - 1))
+        pages = [page]
+        for _ in range(workers - 1):
             try:
-                await page.goto(search_url, timeout=30000)
-                await page.wait_for_load_state("domcontentloaded")
-                
-                # Copy of the waiting logic from previous `parse_search_results` params
-                try:
-                    await page.wait_for_selector("div[role='feed'], h1", timeout=15000, state="attached")
-                except:
-                    pass
-                
-                # Now invoke the scraping logic directly
-                # We iterate over the async generator
-                async for req in self.scrape_maps_results(page, search_url):
-                    yield req
-                    
+                extra = await self.open_search_page()
+                pages.append(extra)
             except Exception as e:
-                self.logger.error(f"Failed to navigate/scrape {search_url}: {e}")
-                
-        # Close page only after all searches are done
-        await page.close()
+                self.logger.warning(f"⚠️ Could not open an extra search page: {e}")
+                break
+        self.logger.info(f"🧭 Running {len(queries_to_run)} variants on {len(pages)} pages.")
+
+        page_pool = asyncio.Queue()
+        for p in pages:
+            page_pool.put_nowait(p)
+
+        async def run_variant(q):
+            p = await page_pool.get()
+            try:
+                return await self.search_variant(p, q)
+            finally:
+                page_pool.put_nowait(p)
+
+        tasks = [asyncio.ensure_future(run_variant(q)) for q in queries_to_run]
+        try:
+            for done, fut in enumerate(asyncio.as_completed(tasks), 1):
+                place_links = await fut
+                self.update_progress(f"Collected {done}/{len(tasks)} search variants...")
+                for req in self.place_requests(place_links):
+                    yield req
+        finally:
+            for t in tasks:
+                t.cancel()
+            # Let cancelled searches unwind before their pages go away
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for p in pages:
+                try:
+                    await p.close()
+                except Exception as e:
+                    self.logger.warning(f"⚠️ Could not close a search page: {e}")
+
+    async def open_search_page(self):
+        """Another page in the persistent_session context, opened (and accounted for) by scrapy-playwright."""
+        request = scrapy.Request(
+            "https://www.google.com/?hl=en",
+            meta={
+                "playwright": True,
+                "playwright_include_page": True,
+                "playwright_context": "persistent_session",
+            },
+            dont_filter=True,
+        )
+        response = await maybe_deferred_to_future(self.crawler.engine.download(request))
+        return response.meta["playwright_page"]
 
-    async def scrape_maps_results(self, page, url):
+    async def search_variant(self, page, q):
+        """Runs one search query on `page` and returns the place links of its feed."""
+        # Using + for spaces
+        encoded_q = q.replace(" ", "+")
+        # Force English result interface
+        search_url = f"https://www.google.com/maps/search/{encoded_q}?hl=en"
+
+        self.logger.info(f"📍 Manually navigating to: {search_url}")
+        self.update_progress("Navigating to Maps...")
+
+        try:
+            await page.goto(search_url, timeout=30000)
+            await page.wait_for_load_state("domcontentloaded")
+
+            # Copy of the waiting logic from previous `parse_search_results` params
+            try:
+                await page.wait_for_selector("div[role='feed'], h1", timeout=15000, state="attached")
+            except:
+                pass
+
+            return await self.collect_place_links(page, search_url)
+        except Exception as e:
+            self.logger.error(f"Failed to navigate/scrape {search_url}: {e}")
+            return []
+
+    async def collect_place_links(self, page, url):
         self.update_progress("Arrived at Maps...")
         self.logger.info(f"📍 Parsing Maps URL: {url}")
         
@@ -207,10 +294,11 @@ class DentalSpider(scrapy.Spider):
              self.logger.warning("⚠️ Feed selector timeout. Trying JS fallback...")
              self.update_progress("Retrying Feed...")
 
-        place_links = await page.evaluate("""
-            async () => {
-                const delay = ms => new Promise(res => setTimeout(res, ms));
+        t0 = time.monotonic()
+        feed = await page.evaluate("""
+            async ({maxRounds, waitMs, idleRounds}) => {
                 const collectedLinks = new Set();
+                const stats = {rounds: 0, waitedMs: 0, timeouts: 0, endReason: "max_rounds"};
                 
                 // Verified Selector from Browser Audit
                 const scrapeGlobal = () => {
@@ -237,61 +325,89 @@ class DentalSpider(scrapy.Spider):
                 if (!element) {
                     console.log("⚠️ No specific feed element found. Scraping body...");
                     scrapeGlobal();
-                    // Try to scroll the body just in case
                     window.scrollTo(0, document.body.scrollHeight);
-                    await delay(1000);
+                    await new Promise(res => setTimeout(res, 1000));
                     scrapeGlobal();
-                    return Array.from(collectedLinks);
+                    stats.endReason = "no_feed";
+                    return {links: Array.from(collectedLinks), stats};
                 }
 
-                console.log("✅ using element:", element);
+                // Maps appends "You've reached the end of the list." (span.HlvSq) after the last card
+                const endOfList = () => {
+                    if (element.querySelector('span.HlvSq')) return true;
+                    const last = element.lastElementChild;
+                    return !!last && /reached the end of the list/i.test(last.textContent || "");
+                };
+
+                // Resolves as soon as the feed grows (new cards) or the end marker shows up,
+                // or after waitMs without either: no fixed sleeps
+                const waitForGrowth = () => new Promise(resolve => {
+                    const started = performance.now();
+                    const before = element.scrollHeight;
+                    let timer = null;
+                    const finish = (grew) => {
+                        observer.disconnect();
+                        clearTimeout(timer);
+                        resolve({grew, ms: performance.now() - started});
+                    };
+                    const observer = new MutationObserver(() => {
+                        if (element.scrollHeight > before || endOfList()) finish(true);
+                    });
+                    observer.observe(element, {childList: true, subtree: true});
+                    timer = setTimeout(() => finish(false), waitMs);
+                });
 
-                // Scroll Strategy
-                let previousHeight = 0;
-                let sameHeightCount = 0;
-                
-                for(let i=0; i<40; i++) { 
+                let idle = 0;
+                while (stats.rounds < maxRounds) {
                     scrapeGlobal(); // Scrape everything visible
+                    if (endOfList()) { stats.endReason = "end_marker"; break; }
                     
                     element.scrollTop = element.scrollHeight;
-                    await delay(1000); 
-                    
-                    let currentHeight = element.scrollHeight;
-                    if (currentHeight === previousHeight) {
-                         await delay(1500);
-                         currentHeight = element.scrollHeight;
-                         if(currentHeight === previousHeight) {
-                             sameHeightCount++;
-                             // Try to press End key
-                             // document.dispatchEvent(new KeyboardEvent('keydown', {'key': 'End'})); 
-                             
-                             if(sameHeightCount >= 5) break;
-                         } else { sameHeightCount = 0; }
-                    } else { sameHeightCount = 0; }
-                    previousHeight = currentHeight;
+                    stats.rounds++;
+                    const r = await waitForGrowth();
+                    stats.waitedMs += r.ms;
+                    if (r.grew) {
+                        idle = 0;
+                    } else {
+                        stats.timeouts++;
+                        if (++idle >= idleRounds) { stats.endReason = "no_growth"; break; }
+                    }
                 }
                 
                 scrapeGlobal();
-                return Array.from(collectedLinks);
+                return {links: Array.from(collectedLinks), stats};
             }
-        """)
-        
+        """, {"maxRounds": self.FEED_MAX_ROUNDS, "waitMs": self.FEED_WAIT_MS, "idleRounds": self.FEED_IDLE_ROUNDS})
+        place_links = feed["links"]
+        self.record_feed_stats(feed["stats"], len(place_links), time.monotonic() - t0)
         self.logger.info(f"Found {len(place_links)} places.")
         
         if len(place_links) == 0:
             self.logger.warning("⚠️ No places found! Taking debug screenshot...")
             await page.screenshot(path="../debug_failure.png", full_page=True)
             self.update_progress("No leads found (Check debug_failure.png)")
-        
-        self.update_progress(f"Extracting {len(place_links)} leads...")
-        self.total_places += len(place_links)
-        self.update_progress()
-        
+        return place_links
+
+    def place_requests(self, place_links):
+        """Detail-page requests for new places of one feed (known and already queued ones are skipped)."""
+        known = self.place_index.known_urls(place_links) if self.skip_known else set()
+        if known:
+            self.skipped_known += len(known)
+            self.logger.info(f"⏭️ {len(known)} of {len(place_links)} places already scraped in earlier runs. Skipping them.")
+            place_links = [link for link in place_links if link not in known]
+
+        # Variants overlap: only places no other feed has queued count towards the total
+        new_links = []
         for link in place_links:
             clean_link = link.split('?')[0]
             if clean_link in self.seen_urls: continue
             self.seen_urls.add(clean_link)
+            new_links.append(clean_link)
+
+        self.total_places += len(new_links)
+        self.update_progress(f"Extracting {len(new_links)} leads..." + (f" ({len(known)} known skipped)" if known else ""))
 
+        for clean_link in new_links:
             yield scrapy.Request(
                 clean_link,
                 meta={
@@ -334,25 +450,55 @@ class DentalSpider(scrapy.Spider):
                 break
         
         if item['website_url']:
-             # Visit website for email
-             yield scrapy.Request(
-                item['website_url'],
-                callback=self.parse_website,
-                meta={'item': item},
-                errback=self.errback_website,
-                dont_filter=True
-             )
+             # Visit website for email (plain HTTP, no browser page)
+             yield self.website_request(item['website_url'], item, "home")
         else:
             item['email'] = None
             self.processed_places += 1
             self.update_progress()
             yield item
 
+    def website_request(self, url, item, stage, browser=False):
+        # Only requests with meta["playwright"] go through Chromium; the rest use
+        # Scrapy's normal HTTP downloader even with the Playwright handler installed.
+        meta = {'item': item, 'site_stage': stage, 'playwright': browser}
+        if browser:
+            meta['playwright_context'] = "website_fallback"
+            meta['playwright_page_methods'] = [PageMethod("wait_for_timeout", 1500)]
+        return scrapy.Request(url, callback=self.parse_website, errback=self.errback_website, meta=meta, dont_filter=True)
+
+    def contact_link(self, response):
+        for a in response.css('a[href]'):
+            href = a.attrib.get('href', '')
+            text = " ".join(a.css('::text').getall()).lower()
+            if href.startswith(('mailto:', 'tel:', '#', 'javascript:')):
+                continue
+            if any(k in f"{href.lower()} {text}" for k in ('contact', 'kontakt', 'reach-us', 'get-in-touch')):
+                return response.urljoin(href)
+        return None
+
+    def looks_js_only(self, response):
+        # Barely any server-rendered text: the content is built by scripts
+        text = " ".join(response.xpath('//body//text()[not(ancestor::script) and not(ancestor::style)]').getall())
+        return len(text.split()) < 30
+
     def parse_website(self, response):
         item = response.meta['item']
-        html = response.text
+        stage = response.meta.get('site_stage', "home")
+        html = response.text if isinstance(response, TextResponse) else ""
         emails = set(re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', html))
         emails = {e for e in emails if not any(x in e.lower() for x in ['example.com', 'sentry', 'w3.org', '.png', '.jpg'])}
+
+        if not emails and html and stage == "home":
+            # Homepage without an address: try its contact page (still plain HTTP)
+            contact = self.contact_link(response)
+            if contact and contact.split('#')[0] != response.url.split('#')[0]:
+                yield self.website_request(contact, item, "contact")
+                return
+        if not emails and html and stage != "browser" and self.browser_fallback and self.looks_js_only(response):
+            yield self.website_request(response.url, item, "browser", browser=True)
+            return
+
         item['email'] = ", ".join(emails) if emails else None
         self.processed_places += 1
         self.update_progress()
@@ -362,7 +508,7 @@ class DentalSpider(scrapy.Spider):
         item = failure.request.meta['item']
         item['email'] = None
         self.processed_places += 1
-        self.update_progress()
+        self.update_progress(error=f"Website failed: {failure.request.url} ({failure.value})")
         yield item
 
     def errback_detail(self, failure):
@@ -371,7 +517,15 @@ class DentalSpider(scrapy.Spider):
         # Since we don't have partial data here (only URL), we just skip it.
         # But we MUST update progress.
         self.processed_places += 1
-        self.update_progress()
+        self.update_progress(error=f"Detail page failed: {failure.request.url} ({failure.value})")
+
+    # Feed scrolling: wait up to FEED_WAIT_MS per scroll for new cards, stop after
+    # FEED_IDLE_ROUNDS scrolls in a row bring none (or at once on the end-of-list marker)
+    FEED_MAX_ROUNDS = 40
+    FEED_WAIT_MS = 4000
+    FEED_IDLE_ROUNDS = 2
+    # Upper bound for the query_workers spider argument (one browser page per worker)
+    QUERY_WORKERS_MAX = 6
 
     custom_settings = {
         "PLAYWRIGHT_LAUNCH_OPTIONS": {
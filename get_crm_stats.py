@@ -1,39 +1,31 @@
-import os
-import json
-import pandas as pd
+import sys
 
-total_leads_in_crm = 0
-total_calls = 0
-total_meetings = 0
-total_deals = 0
+from components.crm_stats import BACKEND_OWNER, STATS_VERSION, headline_metrics, load_stats, rebuild_stats, refresh_folders
 
-if os.path.exists("crm_data"):
-    for root, dirs, files in os.walk("crm_data"):
-        for f in files:
-            if f.endswith(".json"):
-                try:
-                    df = pd.read_json(os.path.join(root, f))
-                    total_leads_in_crm += len(df)
-                    if 'status' in df.columns:
-                        statuses = df['status'].dropna().astype(str).str.lower().str.strip()
-                        
-                        # Assuming every non-empty status except 'new' or '' implies a call was made, OR maybe any status implies a call? 
-                        # Let's count any non-empty non-"new" status as a call.
-                        # Wait, the user has "Called By" or "Call Notes"? In the json:
-                        # "status" has values like "Interested", "Meeting Done ", "Not picking", "Call Later", "Closed - Won", "Meeting set "
-                        
-                        # Total calls: let's count anything where status is not empty/null and not "New"
-                        total_calls += len(statuses[(statuses != '') & (statuses != 'new')])
+# Usage:
+#   python get_crm_stats.py            -> print totals from the materialized store (crm_stats.json)
+#   python get_crm_stats.py --rebuild  -> recompute from backend leads + crm_data, report drift
 
-                        # Total meetings: "meeting set" or "meeting done"
-                        total_meetings += len(statuses[statuses.str.contains('meeting')])
+if "--rebuild" in sys.argv:
+    stats, drift = rebuild_stats()
+    if drift:
+        print("⚠️ Incremental counters drifted from raw rows (now corrected):")
+        for owner, fields in drift.items():
+            for field, (incremental, rebuilt) in fields.items():
+                print(f"  {owner}: {field} {incremental} -> {rebuilt}")
+    else:
+        print("✅ Incremental counters match a full recompute.")
+else:
+    stats = load_stats()
+    stats = refresh_folders(stats) if stats.get("version") == STATS_VERSION else rebuild_stats()[0]
 
-                        # Total deals closed: "closed"
-                        total_deals += len(statuses[statuses.str.contains('closed')])
-                except Exception as e:
-                    pass
+# Totals over crm_data folders (the backend pipeline is reported separately)
+folder_totals = headline_metrics(exclude=[BACKEND_OWNER], stats=stats)
+print("Total CRM Leads:", folder_totals["leads"])
+print("Total Calls:", folder_totals["calls"])
+print("Total Meetings:", folder_totals["meetings"])
+print("Total Deals:", folder_totals["deals"])
 
-print("Total CRM Leads:", total_leads_in_crm)
-print("Total Calls:", total_calls)
-print("Total Meetings:", total_meetings)
-print("Total Deals:", total_deals)
+if BACKEND_OWNER in stats["owners"]:
+    pipeline = headline_metrics([BACKEND_OWNER], stats=stats)
+    print("Backend Pipeline:", pipeline["pipeline"], "| Hot:", pipeline["hot"], "| Won:", pipeline["won"])
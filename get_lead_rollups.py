@@ -0,0 +1,19 @@
+import sys
+
+from components.lead_rollups import rebuild_rollups, refresh_rollups, trend_series
+
+# Usage:
+#   python get_lead_rollups.py            -> pull new leads/executions into lead_rollups.json, print the trend
+#   python get_lead_rollups.py --rebuild  -> discard the rollup and rebuild it from the full history
+
+if "--rebuild" in sys.argv:
+    rollups = rebuild_rollups()
+    print(f"✅ Rollup rebuilt: {len(rollups['days'])} days, "
+          f"last lead id {rollups['last_lead_id']}, last execution id {rollups['last_execution_id']}")
+else:
+    rollups = refresh_rollups(max_age=0)
+
+dates, current, previous = trend_series(rollups, days=15)
+print("Last 15 days (all users):", sum(current), "| previous 15 days:", sum(previous))
+for day, count in zip(dates, current):
+    print(f"  {day.isoformat()}: {count}")
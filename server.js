@@ -2,6 +2,7 @@ const express = require("express");
 const axios = require("axios");
 const cors = require("cors");
 const { parse } = require("csv-parse/sync");
+const { Op } = require("sequelize");
 const { initDB, Lead, Execution, sequelize } = require("./database");
 
 // ✅ App MUST be initialized first
@@ -324,8 +325,10 @@ app.post("/lead-gen", async (req, res) => {
 // Get All Leads
 app.get("/leads", async (req, res) => {
   try {
-    const { status } = req.query;
+    const { status, afterId } = req.query;
     const where = status ? { status } : {};
+    // Incremental readers (analytics rollups) only need rows they have not seen yet
+    if (afterId) where.id = { [Op.gt]: Number(afterId) };
     const leads = await Lead.findAll({
       where,
       order: [['createdAt', 'DESC']]
@@ -336,6 +339,29 @@ app.get("/leads", async (req, res) => {
   }
 });
 
+// Lead keys only (id, businessName, phone, email), id ascending, for the
+// dashboard's CRM dedup index. Pages with afterId + limit; ids=1,2,3 re-reads
+// specific leads after an edit (missing ids were deleted).
+app.get("/leads/keys", async (req, res) => {
+  try {
+    const { afterId, ids } = req.query;
+    const limit = Math.min(Number(req.query.limit) || 50000, 200000);
+    const where = {};
+    if (ids) where.id = { [Op.in]: String(ids).split(",").map(Number).filter(Boolean) };
+    else if (afterId) where.id = { [Op.gt]: Number(afterId) };
+    const keys = await Lead.findAll({
+      where,
+      attributes: ["id", "businessName", "phone", "email"],
+      order: [["id", "ASC"]],
+      limit: ids ? undefined : limit,
+      raw: true
+    });
+    res.json(keys);
+  } catch (e) {
+    res.status(500).json({ error: e.message });
+  }
+});
+
 // Update Lead
 app.put("/leads/:id", async (req, res) => {
   try {
@@ -587,7 +613,10 @@ app.get("/stats", async (req, res) => {
 // Get Executions
 app.get("/executions", async (req, res) => {
   try {
+    const { afterId } = req.query;
+    const where = afterId ? { id: { [Op.gt]: Number(afterId) } } : {};
     const history = await Execution.findAll({
+      where,
       attributes: { exclude: ['fileContent'] },
       order: [['date', 'DESC']]
     });
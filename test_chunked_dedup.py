@@ -0,0 +1,32 @@
+import io
+
+import pandas as pd
+
+from components.chunked_dedup import input_columns
+from components.workbook_writer import write_workbook
+
+
+def _upload(name, data):
+    f = io.BytesIO(data)
+    f.name = name
+    return f
+
+
+def test_input_columns_reads_every_sheet_header():
+    data, _ = write_workbook({
+        "A": pd.DataFrame({"name": ["x", "y", "z"], "phone": ["1", "2", "3"]}),
+        "B": pd.DataFrame({"email": ["a@b.c", "d@e.f"], "phone": ["4", "5"]}),
+    })
+    assert input_columns([_upload("multi.xlsx", data)]) == ["email", "name", "phone"]
+
+
+def test_input_columns_merges_csv_and_xlsx_inputs():
+    data, _ = write_workbook({"A": pd.DataFrame({"name": ["x"]})})
+    csv = _upload("more.csv", b"Email,City\na@b.c,Pune\n")
+    assert input_columns([_upload("one.xlsx", data), csv]) == ["City", "Email", "name"]
+
+
+if __name__ == "__main__":
+    test_input_columns_reads_every_sheet_header()
+    test_input_columns_merges_csv_and_xlsx_inputs()
+    print("ok")
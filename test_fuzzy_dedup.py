@@ -0,0 +1,32 @@
+from components.fuzzy_dedup import fuzzy_clusters
+
+
+def test_names_only_links_request_example():
+    names = ["Dr. Shah Dental Clinic", "Shah Dental Clinic & Implant Centre", "Patel Eye Hospital", "Smile Care Dental"]
+    out = fuzzy_clusters(names, None)
+    assert out.loc[0, "cluster"] != -1
+    assert out.loc[0, "cluster"] == out.loc[1, "cluster"]
+    assert out.loc[0, "matched_on"] == "name"
+    assert (out.loc[2:, "cluster"] == -1).all()
+
+
+def test_phone_only_match_links_differently_written_numbers():
+    out = fuzzy_clusters(["Shah Dental", "Sunrise Clinic"], ["+91 98765 43210", "098765-43210"])
+    assert out.loc[0, "cluster"] == out.loc[1, "cluster"] != -1
+    assert out.loc[0, "matched_on"] == "phone"
+
+
+def test_phone_match_survives_threshold_above_phone_weight():
+    out = fuzzy_clusters(["Shah Dental", "Sunrise Clinic"], ["+91 98765 43210", "098765-43210"], threshold=0.81)
+    assert out.loc[0, "cluster"] == out.loc[1, "cluster"] != -1
+    assert out.loc[0, "matched_on"] == "phone"
+    # The threshold still gates name-only pairs
+    names = ["Patel Eye Hospital", "Patel Eye Hospital & Lasik"]
+    assert (fuzzy_clusters(names, None, threshold=0.81)["cluster"] != -1).all()
+    assert (fuzzy_clusters(names, None, threshold=0.95)["cluster"] == -1).all()
+
+if __name__ == "__main__":
+    test_names_only_links_request_example()
+    test_phone_only_match_links_differently_written_numbers()
+    test_phone_match_survives_threshold_above_phone_weight()
+    print("ok")
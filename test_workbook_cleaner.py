@@ -0,0 +1,80 @@
+import io
+import re
+import zipfile
+
+import openpyxl
+
+from components.workbook_cleaner import remove_rows
+
+
+def _workbook():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Leads List"
+    ws.append(["n", "double"])
+    for i in range(1, 7):
+        ws.append([i, f"=A{i + 1}*2"])
+    ws.auto_filter.ref = "A1:B7"
+    ws.print_area = "A1:B7"
+    other = wb.create_sheet("Other")
+    other.append(["x"])
+    other.print_area = "A1:A5"
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _with_shared_formulas(data):
+    """Rewrites B2:B7 as one shared formula group with its master in B2, as Excel saves it."""
+    src = zipfile.ZipFile(io.BytesIO(data))
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as dst:
+        for item in src.infolist():
+            xml = src.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                xml = xml.replace(b"<f>A2*2</f>", b'<f t="shared" ref="B2:B7" si="0">A2*2</f>')
+                xml = re.sub(rb"<f>A[3-7]\*2</f>", b'<f t="shared" si="0"/>', xml)
+            dst.writestr(item, xml)
+    return out.getvalue()
+
+
+def _defined_names(data):
+    """{"<name>#<localSheetId>": text} from workbook.xml."""
+    xml = zipfile.ZipFile(io.BytesIO(data)).read("xl/workbook.xml").decode()
+    found = re.findall(r'<definedName name="([^"]+)"[^>]*localSheetId="(\d+)"[^>]*>([^<]*)<', xml)
+    return {f"{name}#{sheet}": text for name, sheet, text in found}
+
+
+def test_defined_names_shrink_for_the_affected_sheet_only():
+    data = _workbook()
+    before = _defined_names(data)
+    assert before["_xlnm.Print_Area#0"] == "'Leads List'!$A$1:$B$7"
+    after = _defined_names(remove_rows(data, {"Leads List": [3, 5]}))
+    assert after["_xlnm.Print_Area#0"] == "'Leads List'!$A$1:$B$5"
+    assert after["_xlnm._FilterDatabase#0"] == "'Leads List'!$A$1:$B$5"
+    assert after["_xlnm.Print_Area#1"] == before["_xlnm.Print_Area#1"]
+    ws = openpyxl.load_workbook(io.BytesIO(remove_rows(data, {"Leads List": [3, 5]})))["Leads List"]
+    assert ws.auto_filter.ref == "A1:B5"
+
+
+def test_shared_formula_survives_deleting_its_master_row():
+    data = _with_shared_formulas(_workbook())
+    ws = openpyxl.load_workbook(io.BytesIO(remove_rows(data, {"Leads List": [2, 4]})))["Leads List"]
+    assert [c.value for c in ws["A"][1:]] == [2, 4, 5, 6]
+    # Dependents become plain formulas holding the text they had before the delete
+    assert [c.value for c in ws["B"][1:]] == ["=A3*2", "=A5*2", "=A6*2", "=A7*2"]
+
+
+def test_surviving_shared_formula_range_shrinks():
+    data = _with_shared_formulas(_workbook())
+    xml = zipfile.ZipFile(io.BytesIO(remove_rows(data, {"Leads List": [4]}))).read("xl/worksheets/sheet1.xml")
+    assert b'<f t="shared" ref="B2:B6" si="0">A2*2</f>' in xml
+    ws = openpyxl.load_workbook(io.BytesIO(remove_rows(data, {"Leads List": [4]})))["Leads List"]
+    assert ws["B3"].value == "=A3*2"
+
+
+if __name__ == "__main__":
+    test_defined_names_shrink_for_the_affected_sheet_only()
+    test_shared_formula_survives_deleting_its_master_row()
+    test_surviving_shared_formula_range_shrinks()
+    print("ok")